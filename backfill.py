@@ -0,0 +1,50 @@
+import argparse
+import asyncio
+import logging
+
+from database.db import init_db
+from enums.sources import Source
+from services.backfill import BackfillService
+from services.runtime_profile import apply_runtime_profile
+from settings.yandex_direct import BACKFILL_MONTHS, BACKFILL_CHUNK_MONTHS, BACKFILL_WORKERS
+
+# Включаем логирование
+logging.basicConfig(level=logging.INFO)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Загрузка исторической статистики аккаунтов в accounts.db")
+    parser.add_argument("--months", type=int, default=BACKFILL_MONTHS, help="Глубина загрузки в месяцах")
+    parser.add_argument(
+        "--chunk-months", type=int, default=BACKFILL_CHUNK_MONTHS, help="Период одного отчета в месяцах"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=BACKFILL_WORKERS, help="Число аккаунтов, загружаемых одновременно"
+    )
+    parser.add_argument(
+        "--source", default=Source.YANDEX_DIRECT.value, choices=[s.value for s in Source], help="Источник данных"
+    )
+    parser.add_argument("--account-id", type=int, action="append", help="Загрузить только указанные аккаунты")
+    parser.add_argument("--restart", action="store_true", help="Загрузить период заново, игнорируя прогресс")
+    parser.add_argument("--db", default="accounts.db", help="Путь к базе данных")
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    await init_db(args.db)
+
+    service = BackfillService(
+        source=Source(args.source),
+        db_path=args.db,
+        months=args.months,
+        chunk_months=args.chunk_months,
+        workers=args.workers,
+        ignore_checkpoints=args.restart,
+    )
+    await service.run(account_ids=args.account_id)
+
+
+if __name__ == "__main__":
+    apply_runtime_profile()
+    asyncio.run(main())
@@ -0,0 +1,289 @@
+import asyncio
+import random
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+# Значения параметров группировки, из которых составляются синтетические строки отчетов
+DIMENSION_VALUES: Dict[str, List[str]] = {
+    "Age": ["AGE_0_17", "AGE_18_24", "AGE_25_34", "AGE_35_44", "AGE_45_54", "AGE_55", "UNKNOWN"],
+    "Gender": ["GENDER_MALE", "GENDER_FEMALE", "UNKNOWN"],
+    "Device": ["DESKTOP", "MOBILE", "TABLET"],
+}
+
+# Префикс токенов аккаунтов бенчмарка: логин определяется по токену, как у настоящего API
+TOKEN_PREFIX = "token-"
+
+
+def build_report_tsv(login: str, params: dict, rows: int, offset: int = 0, limit: int = 1_000_000, seed: int = 0) -> str:
+    """
+    Формирует синтетический отчет в TSV (без заголовка отчета и итоговой строки).
+    Отчет без параметров группировки состоит из одной строки, иначе - из rows строк.
+    Конверсии выводятся по колонке на каждую цель: Conversions_<цель>_<модель>.
+    Используется сервером и микробенчмарками для генерации наборов данных.
+    """
+    field_names = params["FieldNames"]
+    goals = params.get("Goals") or []
+    models = params.get("AttributionModels") or ["AUTO"]
+    dimensions = [name for name in field_names if name in DIMENSION_VALUES or name in ("CampaignName", "Date")]
+    total_rows = rows if dimensions else 1
+
+    columns = []
+    for name in field_names:
+        if name == "Conversions" and goals:
+            columns.extend(f"Conversions_{goal}_{models[0]}" for goal in goals)
+        else:
+            columns.append(name)
+
+    date_from = date.fromisoformat(params["SelectionCriteria"]["DateFrom"])
+    date_to = date.fromisoformat(params["SelectionCriteria"]["DateTo"])
+    days = (date_to - date_from).days + 1
+
+    lines = ["\t".join(columns)]
+    for i in range(offset, min(offset + limit, total_rows)):
+        rng = random.Random(zlib.crc32(f"{seed}:{login}:{','.join(dimensions)}:{i}".encode()))
+        impressions = rng.randint(100, 20000)
+        clicks = rng.randint(0, impressions // 10)
+        sessions = rng.randint(0, clicks)
+        values = []
+        for name in columns:
+            if name == "CampaignName":
+                values.append(f"Кампания {i + 1}")
+            elif name == "Date":
+                values.append((date_from + timedelta(days=i % days)).isoformat())
+            elif name in DIMENSION_VALUES:
+                options = DIMENSION_VALUES[name]
+                values.append(options[i % len(options)])
+            elif name == "Impressions":
+                values.append(str(impressions))
+            elif name == "Clicks":
+                values.append(str(clicks))
+            elif name == "Cost":
+                values.append(f"{clicks * rng.uniform(5, 60):.2f}")
+            elif name == "Sessions":
+                values.append(str(sessions))
+            elif name == "Bounces":
+                values.append(str(rng.randint(0, sessions)))
+            elif name.startswith("Conversions"):
+                values.append(str(rng.randint(0, max(clicks // 20, 1))))
+            else:
+                values.append("--")
+        lines.append("\t".join(values))
+    return "\n".join(lines) + "\n"
+
+
+@dataclass
+class FakeServerConfig:
+    """Поведение локального сервера API Яндекс.Директ"""
+    # Число строк отчета с параметром группировки (кампании, даты и т.п.) на один запрос
+    rows_per_report: int = 50
+    # Сколько раз отчет отвечает 201/202 (в очереди / формируется), прежде чем вернуть данные
+    offline_polls: int = 1
+    # Значение заголовка retryIn в ответах 201/202, секунд
+    retry_in: float = 0.05
+    # Задержка каждого ответа, секунд (имитация сети)
+    latency: float = 0.0
+    # Каждый N-й запрос отклоняется ошибкой превышения лимита (0 - без ошибок)
+    rate_limit_every: int = 0
+    # Каждый N-й запрос отклоняется временной ошибкой сервера 503 (0 - без ошибок)
+    server_error_every: int = 0
+    # Логины с отозванным доступом: запросы к ним завершаются ошибкой авторизации (код 53)
+    revoked_logins: Tuple[str, ...] = ()
+    # Суточный лимит баллов API на логин (0 - без учета баллов и заголовка Units)
+    units_limit: int = 0
+    # Баллов за запрос отчета
+    units_per_request: int = 10
+    # Логин, с которого списываются баллы всех аккаунтов (агентство); пусто - с логина аккаунта
+    units_payer: str = ""
+    # Начальное значение генератора случайных чисел для метрик
+    seed: int = 0
+
+
+class FakeYandexDirectServer:
+    """
+    Локальная замена API Яндекс.Директ для бенчмарков: v4 Live AccountManagement (бюджеты)
+    и v5 reports (статистика в TSV). Имитирует офлайн-формирование отчетов (201/202 с retryIn),
+    постраничную выдачу по Page.Limit/Offset, ошибки превышения лимита и временные ошибки сервера (503),
+    считает запросы.
+
+    Пример:
+        async with FakeYandexDirectServer(FakeServerConfig(rows_per_report=1000)) as server:
+            YandexDirectAPI.BUDGETS_URL = server.budgets_url
+            YandexDirectAPI.REPORTS_URL = server.reports_url
+    """
+
+    def __init__(self, config: Optional[FakeServerConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        """
+        :param config: Поведение сервера
+        :param host: Адрес для прослушивания
+        :param port: Порт (0 - любой свободный)
+        """
+        self.config = config or FakeServerConfig()
+        self.host = host
+        self.port = port
+        # Счетчики запросов: (endpoint, статус) -> число
+        self.calls: Counter = Counter()
+        self._pending: Dict[tuple, int] = {}
+        # Израсходованные баллы по логинам
+        self.units_spent: Counter = Counter()
+        self._requests = 0
+        self._runner: Optional[web.AppRunner] = None
+
+        self.app = web.Application()
+        self.app.router.add_post("/live/v4/json/", self._handle_v4)
+        self.app.router.add_post("/json/v5/reports", self._handle_reports)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def budgets_url(self) -> str:
+        return f"{self.base_url}/live/v4/json/"
+
+    @property
+    def reports_url(self) -> str:
+        return f"{self.base_url}/json/v5/reports"
+
+    async def start(self) -> None:
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # При port=0 порт выбирает система
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "FakeYandexDirectServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    def reset(self) -> None:
+        """Сбрасывает счетчики запросов и очередь офлайн-отчетов"""
+        self.calls.clear()
+        self._pending.clear()
+        self.units_spent.clear()
+        self._requests = 0
+
+    def summary(self) -> Dict[str, int]:
+        """Сводка запросов: бюджеты, готовые отчеты, ответы 201/202 и ошибки"""
+        return {
+            "budgets": sum(n for (endpoint, status), n in self.calls.items() if endpoint == "v4" and status == 200),
+            "reports": self.calls[("reports", 200)],
+            "offline": self.calls[("reports", 201)] + self.calls[("reports", 202)],
+            "errors": sum(n for (endpoint, status), n in self.calls.items() if status >= 400),
+            "total": sum(self.calls.values()),
+        }
+
+    async def _before_request(self) -> Optional[str]:
+        """
+        Задержка ответа и проверка имитируемых ошибок.
+        Возвращает "rate_limit" или "server_error", если запрос отклонен, иначе None
+        """
+        self._requests += 1
+        if self.config.latency:
+            await asyncio.sleep(self.config.latency)
+        every = self.config.rate_limit_every
+        if every and self._requests % every == 0:
+            return "rate_limit"
+        every = self.config.server_error_every
+        if every and self._requests % every == 0:
+            return "server_error"
+        return None
+
+    def _server_error(self, endpoint: str) -> web.Response:
+        self.calls[(endpoint, 503)] += 1
+        return web.Response(status=503, text="Service Temporarily Unavailable")
+
+    async def _handle_v4(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        rejected = await self._before_request()
+        if rejected == "server_error":
+            return self._server_error("v4")
+        if rejected == "rate_limit":
+            # API v4 сообщает об ошибках в теле ответа со статусом 200
+            self.calls[("v4", 429)] += 1
+            return web.json_response({
+                "error_code": 56,
+                "error_str": "Превышен лимит запросов",
+                "error_detail": "Превышено допустимое число запросов за период",
+            })
+
+        params = payload.get("param", {})
+        logins = params.get("SelectionCriteria", {}).get("Logins")
+        token = payload.get("token", "")
+        login = logins[0] if logins else token[len(TOKEN_PREFIX):]
+        if login in self.config.revoked_logins:
+            self.calls[("v4", 401)] += 1
+            return web.json_response({
+                "error_code": 53, "error_str": "Ошибка авторизации", "error_detail": "Недействительный OAuth-токен",
+            })
+        rng = random.Random(zlib.crc32(f"{self.config.seed}:{login}".encode()))
+        self.calls[("v4", 200)] += 1
+        return web.json_response({
+            "data": {"Accounts": [{"Login": login, "Amount": f"{rng.uniform(0, 50000):.2f}", "Currency": "RUB"}]}
+        })
+
+    async def _handle_reports(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        params = payload["params"]
+        login = request.headers.get("Client-Login", "")
+        rejected = await self._before_request()
+        if rejected == "server_error":
+            return self._server_error("reports")
+        if login in self.config.revoked_logins:
+            self.calls[("reports", 403)] += 1
+            return web.json_response(
+                {"error": {"error_code": "53", "error_string": "Ошибка авторизации",
+                           "error_detail": "Недействительный OAuth-токен"}},
+                status=403,
+            )
+        if rejected == "rate_limit":
+            self.calls[("reports", 429)] += 1
+            return web.json_response(
+                {"error": {"error_code": "56", "error_string": "Превышен лимит запросов",
+                           "error_detail": "Превышено допустимое число запросов за период"}},
+                status=429,
+            )
+        units_headers = {}
+        if self.config.units_limit:
+            payer = self.config.units_payer or login
+            cost = self.config.units_per_request
+            if self.units_spent[payer] + cost > self.config.units_limit:
+                self.calls[("reports", 400)] += 1
+                return web.json_response(
+                    {"error": {"error_code": "152", "error_string": "Недостаточно баллов",
+                               "error_detail": "Для выполнения запроса недостаточно баллов"}},
+                    status=400,
+                )
+            self.units_spent[payer] += cost
+            remaining = self.config.units_limit - self.units_spent[payer]
+            units_headers = {"Units": f"{cost}/{remaining}/{self.config.units_limit}", "Units-Used-Login": payer}
+
+        # Отчет формируется в офлайн-режиме: первые запросы получают 201 (поставлен в очередь) и 202 (формируется)
+        key = (login, params["ReportName"])
+        polls = self._pending.get(key, 0)
+        if polls < self.config.offline_polls:
+            self._pending[key] = polls + 1
+            status = 201 if polls == 0 else 202
+            self.calls[("reports", status)] += 1
+            return web.Response(status=status, headers={"retryIn": f"{self.config.retry_in:g}", **units_headers})
+        self._pending.pop(key, None)
+
+        page = params.get("Page", {})
+        offset = page.get("Offset", 0)
+        limit = page.get("Limit", 1_000_000)
+        text = build_report_tsv(login, params, self.config.rows_per_report, offset, limit, self.config.seed)
+        self.calls[("reports", 200)] += 1
+        return web.Response(text=text, content_type="text/tab-separated-values", headers=units_headers)
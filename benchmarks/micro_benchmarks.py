@@ -0,0 +1,197 @@
+import argparse
+import gc
+import json
+import platform
+import sys
+import timeit
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.fake_yandex_server import build_report_tsv
+from models.account import Account
+from models.yandex_direct import YandexDirectBudget, parse_statistics_tsv
+from modules.yandex_direct.pandas_stat_proccessor import proccess_data
+from modules.yandex_direct.summary_statistics_formatter import SummaryStatisticsFormatter
+from services.serializers import ORJSON_AVAILABLE
+
+# Размеры наборов данных по умолчанию, строк
+DEFAULT_SIZES = [1, 1000, 10000, 100000, 500000]
+
+# Каталог сохраненных результатов для сравнения
+BASELINES_DIR = Path(__file__).parent / "baselines"
+
+# Поля синтетического отчета: параметры группировки, метрики и конверсии по двум целям
+FIELD_NAMES = ["CampaignName", "Date", "Impressions", "Clicks", "Cost", "Conversions", "Sessions", "Bounces"]
+GOALS = [1001, 1002]
+GROUP_BY = "Date"
+
+# Число аккаунтов в отчете для Telegram: строки набора данных распределяются между ними поровну
+FORMAT_ACCOUNTS = 100
+
+
+class Dataset:
+    """Набор данных одного размера во всех представлениях, которые принимают замеряемые функции"""
+
+    def __init__(self, rows: int):
+        params = {
+            "SelectionCriteria": {"DateFrom": "2024-01-01", "DateTo": "2024-01-30"},
+            "FieldNames": FIELD_NAMES,
+            "Goals": GOALS,
+            "AttributionModels": ["AUTO"],
+        }
+        self.rows = rows
+        self.tsv = build_report_tsv("bench", params, rows)
+        # Строки статистики в том виде, в каком их возвращает коннектор
+        self.statistics = parse_statistics_tsv(self.tsv)
+        self.dumped = [stat.as_dict() for stat in self.statistics]
+
+        account_count = min(FORMAT_ACCOUNTS, rows)
+        self.accounts = [
+            Account(account_name=f"Аккаунт {i}", source="YANDEX_DIRECT",
+                    auth={"login": f"bench-{i}", "token": "token", "goals": GOALS})
+            for i in range(account_count)
+        ]
+        self.account_statistics = [self.statistics[i::account_count] for i in range(account_count)]
+        self.budgets = [YandexDirectBudget(budget=1000.0 * i) for i in range(account_count)]
+        # Данные аутентификации аккаунтов в том виде, в каком они хранятся в базе (по одной на строку набора)
+        self.auth_json = [json.dumps({"login": f"bench-{i}", "token": f"token-{i}", "goals": GOALS}) for i in range(rows)]
+
+
+# Замеряемые функции: название -> функция от набора данных.
+# proccess_data выбирает способ расчета по числу строк, варианты _lean всегда считают без pandas
+CASES: Dict[str, Callable[[Dataset], object]] = {
+    "parse_statistics_tsv": lambda data: parse_statistics_tsv(data.tsv),
+    "proccess_data": lambda data: proccess_data(data.dumped),
+    "proccess_data_group_by": lambda data: proccess_data(data.dumped, group_by=GROUP_BY),
+    "proccess_data_lean": lambda data: proccess_data(data.dumped, backend="lean"),
+    "proccess_data_group_by_lean": lambda data: proccess_data(data.dumped, group_by=GROUP_BY, backend="lean"),
+    "format_statistics_for_telegram": lambda data: SummaryStatisticsFormatter.format_statistics_for_telegram(
+        data.accounts, data.account_statistics, data.budgets
+    ),
+    # Чтение и запись аккаунтов в базе (database/db.py) стандартным json
+    "auth_json_roundtrip": lambda data: [json.dumps(json.loads(auth)) for auth in data.auth_json],
+}
+
+# То же через orjson - для сравнения профилей выполнения (services/runtime_profile.py)
+if ORJSON_AVAILABLE:
+    import orjson
+
+    CASES["auth_json_roundtrip_orjson"] = lambda data: [orjson.dumps(orjson.loads(auth)).decode() for auth in data.auth_json]
+
+
+def measure(func: Callable[[], object], repeat: int, min_time: float) -> float:
+    """
+    Возвращает время одного вызова: лучший из repeat замеров, в каждом функция вызывается
+    столько раз, чтобы замер длился не меньше min_time секунд.
+    """
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    while elapsed < min_time:
+        number *= 2
+        elapsed = timer.timeit(number)
+    timings = [elapsed] + timer.repeat(repeat=repeat - 1, number=number) if repeat > 1 else [elapsed]
+    return min(timings) / number
+
+
+def run(sizes: List[int], cases: List[str], repeat: int, min_time: float) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {case: {} for case in cases}
+    for size in sizes:
+        data = Dataset(size)
+        for case in cases:
+            gc.collect()
+            seconds = measure(lambda: CASES[case](data), repeat, min_time)
+            results[case][str(size)] = seconds
+            print(f"{case:<32} {size:>8} строк {_format_time(seconds):>12}")
+        del data
+    return results
+
+
+def _format_time(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} мкс"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f} мс"
+    return f"{seconds:.3f} с"
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            max_regression: float) -> bool:
+    """
+    Выводит отношение текущего времени к сохраненному. Возвращает False, если какой-либо замер
+    медленнее сохраненного больше чем в max_regression раз.
+    """
+    ok = True
+    print(f"\n{'Замер':<32} {'Строк':>8} {'Было':>12} {'Стало':>12} {'Отношение':>10}")
+    for case, by_size in results.items():
+        for size, seconds in by_size.items():
+            before = baseline.get(case, {}).get(size)
+            if before is None:
+                continue
+            ratio = seconds / before
+            mark = ""
+            if ratio > max_regression:
+                ok = False
+                mark = " ❌"
+            print(f"{case:<32} {size:>8} {_format_time(before):>12} {_format_time(seconds):>12} {ratio:>9.2f}x{mark}")
+    return ok
+
+
+def _baseline_path(name: str) -> Path:
+    return BASELINES_DIR / f"{name}.json"
+
+
+def load_baseline(name: str) -> Optional[Dict[str, Dict[str, float]]]:
+    path = _baseline_path(name)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))["results"]
+
+
+def save_baseline(name: str, results: Dict[str, Dict[str, float]]) -> Path:
+    """Сохраняет результаты; замеры, которых не было в прогоне, берутся из ранее сохраненного файла"""
+    merged = load_baseline(name) or {}
+    for case, by_size in results.items():
+        merged.setdefault(case, {}).update(by_size)
+    BASELINES_DIR.mkdir(exist_ok=True)
+    path = _baseline_path(name)
+    path.write_text(json.dumps({
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": merged,
+    }, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    return path
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Микробенчмарки разбора отчетов и расчетов pandas")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Размеры наборов данных, строк")
+    parser.add_argument("--cases", nargs="+", default=list(CASES), choices=list(CASES), help="Замеряемые функции")
+    parser.add_argument("--repeat", type=int, default=3, help="Число замеров, берется лучший")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Минимальная длительность одного замера, секунд")
+    parser.add_argument("--save", metavar="NAME", help="Сохранить результаты в baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="Сравнить с baselines/NAME.json")
+    parser.add_argument(
+        "--max-regression", type=float, default=1.2,
+        help="Допустимое замедление относительно сохраненных результатов (для --compare)",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = run(args.sizes, args.cases, args.repeat, args.min_time)
+
+    ok = True
+    if args.compare:
+        baseline = load_baseline(args.compare)
+        if baseline is None:
+            print(f"Сохраненные результаты {args.compare} не найдены")
+        else:
+            ok = compare(results, baseline, args.max_regression)
+    if args.save:
+        print(f"Результаты сохранены в {save_baseline(args.save, results)}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List
+
+from benchmarks.fake_yandex_server import FakeServerConfig, FakeYandexDirectServer, TOKEN_PREFIX
+from connectors.yandex_direct import RATE_LIMITER, YandexDirectAPI
+from database.db import add_account, init_db
+from enums.sources import Source
+from services.cpu_executor import CPU_EXECUTOR
+from services.report_processor import ReportProcessor
+from services.runtime_profile import PROFILES, apply_runtime_profile
+
+# Число аккаунтов в прогонах по умолчанию
+DEFAULT_ACCOUNT_COUNTS = [10, 100, 1000]
+
+# Отчеты, которые замеряются в каждом прогоне
+REPORTS = ("budgets", "summary", "detailed")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Замер подготовки отчетов на локальном сервере, имитирующем API Яндекс.Директ"
+    )
+    parser.add_argument(
+        "--accounts", type=int, nargs="+", default=DEFAULT_ACCOUNT_COUNTS, help="Число аккаунтов в прогонах"
+    )
+    parser.add_argument("--reports", nargs="+", default=list(REPORTS), choices=REPORTS, help="Замеряемые отчеты")
+    parser.add_argument("--rows", type=int, default=50, help="Строк в отчете с параметром группировки")
+    parser.add_argument("--page-limit", type=int, default=YandexDirectAPI.PAGE_LIMIT, help="Строк в одной странице отчета")
+    parser.add_argument("--offline-polls", type=int, default=1, help="Ответов 201/202 до готовности отчета")
+    parser.add_argument("--retry-in", type=float, default=0.05, help="Значение retryIn в ответах 201/202, секунд")
+    parser.add_argument("--latency", type=float, default=0.0, help="Задержка каждого ответа сервера, секунд")
+    parser.add_argument(
+        "--rate-limit-every", type=int, default=0, help="Отклонять каждый N-й запрос ошибкой лимита (0 - нет)"
+    )
+    parser.add_argument(
+        "--server-error-every", type=int, default=0, help="Отклонять каждый N-й запрос ошибкой 503 (0 - нет)"
+    )
+    parser.add_argument("--max-concurrent", type=int, default=50, help="Одновременных запросов к API")
+    parser.add_argument("--max-requests", type=int, default=100000, help="Запросов к API в окне лимита")
+    parser.add_argument("--window", type=float, default=1.0, help="Длина окна лимита запросов, секунд")
+    parser.add_argument(
+        "--production-limits", action="store_true",
+        help="Использовать лимит запросов из настроек (20 запросов за 10 секунд): прогон на 1000 аккаунтов займет десятки минут",
+    )
+    parser.add_argument(
+        "--runtime-profile", choices=PROFILES, default="standard",
+        help="Профиль выполнения: standard - asyncio и json, fast - uvloop и orjson (если установлены)",
+    )
+    parser.add_argument(
+        "--deadline", type=float, help="Срок готовности отчета, секунд (по умолчанию - без срока, ждать все аккаунты)"
+    )
+    parser.add_argument("--no-memory", action="store_true", help="Не замерять память (tracemalloc замедляет прогон)")
+    parser.add_argument("--json", dest="json_path", help="Сохранить результаты в JSON")
+    parser.add_argument("--verbose", action="store_true", help="Выводить журнал бота")
+    return parser.parse_args()
+
+
+async def _create_accounts(db_path: str, count: int) -> None:
+    """Создает базу с count аккаунтами Яндекс.Директ, токены которых распознает локальный сервер"""
+    await init_db(db_path)
+    for i in range(1, count + 1):
+        login = f"bench-{i}"
+        auth = {"login": login, "token": f"{TOKEN_PREFIX}{login}", "goals": [1001, 1002]}
+        await add_account(Source.YANDEX_DIRECT.value, auth, account_name=f"Аккаунт {i}", db_path=db_path)
+
+
+async def _run_report(processor: ReportProcessor, report: str):
+    if report == "budgets":
+        return await processor.get_budgets_report()
+    if report == "summary":
+        return await processor.get_today_summary_report()
+    return await processor.get_detailed_report(1)
+
+
+async def _measure(server: FakeYandexDirectServer, processor: ReportProcessor, report: str,
+                   track_memory: bool) -> Dict:
+    """Замеряет один отчет: время, пик выделенной памяти Python и запросы к серверу"""
+    server.reset()
+    if track_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    result = await _run_report(processor, report)
+    elapsed = time.perf_counter() - started
+    peak = None
+    if track_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    text = "\n\n".join(result) if isinstance(result, list) else str(result)
+    return {
+        "report": report,
+        "seconds": round(elapsed, 3),
+        "peak_mb": round(peak / 1024 / 1024, 2) if peak is not None else None,
+        "text_chars": len(text),
+        "api_calls": server.summary(),
+    }
+
+
+async def run_benchmarks(args: argparse.Namespace) -> List[Dict]:
+    config = FakeServerConfig(
+        rows_per_report=args.rows,
+        offline_polls=args.offline_polls,
+        retry_in=args.retry_in,
+        latency=args.latency,
+        rate_limit_every=args.rate_limit_every,
+        server_error_every=args.server_error_every,
+    )
+    results = []
+    async with FakeYandexDirectServer(config) as server:
+        YandexDirectAPI.BUDGETS_URL = server.budgets_url
+        YandexDirectAPI.REPORTS_URL = server.reports_url
+        YandexDirectAPI.PAGE_LIMIT = args.page_limit
+
+        for count in args.accounts:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                db_path = os.path.join(tmp_dir, "accounts.db")
+                await _create_accounts(db_path, count)
+                processor = ReportProcessor(Source.YANDEX_DIRECT, db_path=db_path, deadline_seconds=args.deadline)
+                for report in args.reports:
+                    result = await _measure(server, processor, report, track_memory=not args.no_memory)
+                    result["accounts"] = count
+                    results.append(result)
+                    _print_result(result)
+    return results
+
+
+def _print_result(result: Dict) -> None:
+    calls = result["api_calls"]
+    peak = f"{result['peak_mb']:8.2f}" if result["peak_mb"] is not None else "       -"
+    print(
+        f"{result['accounts']:>6} {result['report']:<9} {result['seconds']:9.3f} с {peak} МБ  "
+        f"бюджеты={calls['budgets']} отчеты={calls['reports']} ожидание={calls['offline']} "
+        f"ошибки={calls['errors']} всего={calls['total']}"
+    )
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    # Построитель отчетов настраивает журнал при импорте - без --verbose оставляем только предупреждения
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+    if not args.production_limits:
+        RATE_LIMITER.max_concurrent = args.max_concurrent
+        RATE_LIMITER.max_requests = args.max_requests
+        RATE_LIMITER.window_seconds = args.window
+
+    runtime = apply_runtime_profile(args.runtime_profile)
+    print(f"Цикл событий: {runtime['loop']}, JSON: {runtime['json']}")
+    print(f"{'Акк.':>6} {'Отчет':<9} {'Время':>11} {'Память':>11}  Запросы к API")
+    try:
+        results = asyncio.run(run_benchmarks(args))
+    finally:
+        CPU_EXECUTOR.shutdown()
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"Результаты сохранены в {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
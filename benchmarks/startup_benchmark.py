@@ -0,0 +1,90 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List
+
+# Модули, которые не должны загружаться при запуске бота: они нужны только для расчета отчетов и графиков
+HEAVY_MODULES = ("pandas", "numpy", "matplotlib")
+
+ROOT_DIR = Path(__file__).parent.parent
+
+
+@dataclass
+class ImportRecord:
+    """Строка вывода -X importtime"""
+    module: str
+    self_us: int
+    cumulative_us: int
+    level: int
+
+
+def parse_importtime(output: str) -> List[ImportRecord]:
+    """
+    Разбирает вывод python -X importtime.
+
+    :param output: stderr процесса
+    :return: Записи в порядке вывода (вложенные модули - перед импортировавшим их)
+    """
+    records = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        records.append(ImportRecord(name.strip(), int(self_us), int(cumulative_us), level))
+    return records
+
+
+def measure_import(module: str) -> List[ImportRecord]:
+    """Импортирует модуль в отдельном процессе с -X importtime"""
+    env = dict(os.environ)
+    # main создает объект бота при импорте и проверяет формат токена
+    env.setdefault("BOT_TOKEN", "0:benchmark")
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    return parse_importtime(completed.stderr)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Время импорта модулей при запуске бота (python -X importtime)")
+    parser.add_argument("--module", default="main", help="Импортируемый модуль")
+    parser.add_argument("--runs", type=int, default=5, help="Число запусков, выводится медиана")
+    parser.add_argument("--top", type=int, default=15, help="Сколько самых медленных модулей вывести")
+    parser.add_argument("--max-ms", type=float, help="Завершиться с ошибкой, если медиана импорта дольше, мс")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    runs = [measure_import(args.module) for _ in range(args.runs)]
+    totals = [sum(record.cumulative_us for record in records if record.level == 0) / 1000 for records in runs]
+    median = statistics.median(totals)
+    print(f"Импорт {args.module}: медиана {median:.0f} мс (min {min(totals):.0f}, max {max(totals):.0f}, запусков {args.runs})")
+
+    last = runs[-1]
+    print("\nСамые медленные модули (собственное время, последний запуск):")
+    for record in sorted(last, key=lambda r: r.self_us, reverse=True)[:args.top]:
+        print(f"{record.self_us / 1000:9.1f} мс {record.cumulative_us / 1000:9.1f} мс  {record.module}")
+
+    loaded = {record.module.split(".")[0] for record in last}
+    heavy = [name for name in HEAVY_MODULES if name in loaded]
+    ok = True
+    if heavy:
+        ok = False
+        print(f"\n❌ При запуске загружаются тяжелые модули: {', '.join(heavy)}")
+    else:
+        print(f"\n✓ {', '.join(HEAVY_MODULES)} не загружаются при запуске")
+    if args.max_ms is not None and median > args.max_ms:
+        ok = False
+        print(f"❌ Импорт дольше {args.max_ms:.0f} мс")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,27 @@
+import asyncio
 import json
 from datetime import datetime, timedelta
 from aiogram import Router, F, Bot
-from aiogram.types import Message, CallbackQuery, ErrorEvent, BotCommand, BotCommandScopeDefault
+from aiogram.types import Message, CallbackQuery, ErrorEvent, BotCommand, BotCommandScopeDefault, BufferedInputFile, InputMediaPhoto
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.exceptions import TelegramBadRequest
 
+from connectors.yandex_direct import CIRCUIT_BREAKER
 from database.db import add_account, delete_account, get_all_accounts, get_account_by_id
 from enums.sources import Source
+from models.report import ReportPage
+from modules.report_cache import detailed_report_cache, chart_cache
+from modules.chart_renderer import CHARTS_AVAILABLE
 from services.report_processor import ReportProcessor
-from bot.keyboards import main_menu_keyboard, source_selection_keyboard, source_selection_keyboard, period_selection_keyboard, account_source_selection_keyboard
+from services.cpu_executor import run_cpu_bound
+from services.report_jobs import report_jobs, ReportCancelled
+from services.progress import ProgressReporter
+from services.tracing import start_trace, trace_store, format_trace, Trace
+from settings.bot import get_admin_ids, TELEGRAM_MESSAGE_LIMIT
+from bot.sender import message_sender
+from bot.keyboards import main_menu_keyboard, source_selection_keyboard, source_selection_keyboard, period_selection_keyboard, account_source_selection_keyboard, detailed_report_page_keyboard, report_export_keyboard, cancel_report_keyboard
 
 # Создаем роутер для регистрации хендлеров
 router = Router()
@@ -22,6 +33,23 @@ async def set_commands(bot: Bot):
     ]
     await bot.set_my_commands(commands, scope=BotCommandScopeDefault())
 
+def send_trace_hint(bot: Bot, chat_id: int, user_id: int, trace: Trace) -> None:
+    """Отправляет администратору идентификатор трассировки отчета"""
+    if user_id in get_admin_ids():
+        message_sender.send_message(bot, chat_id, f"🔎 Трассировка: /trace {trace.trace_id}")
+
+def notify_account_circuit_open(bot: Bot, login: str, error: Exception) -> None:
+    """Сообщает администраторам, что аккаунт пропускается в отчетах из-за ошибок авторизации"""
+    minutes = CIRCUIT_BREAKER.cooldown_seconds / 60
+    text = (
+        f"⚠️ Аккаунт {login} пропускается в отчетах после повторных ошибок авторизации.\n"
+        f"{error}\n\n"
+        f"Проверьте токен и доступ к аккаунту. Повторная проверка - через {minutes:g} мин. "
+        f"или сразу после повторного добавления аккаунта."
+    )
+    for admin_id in get_admin_ids():
+        message_sender.send_message(bot, admin_id, text)
+
 # Состояния для добавления одного аккаунта
 class AddAccountStates(StatesGroup):
     waiting_for_source = State()  # Сначала выбор источника
@@ -47,6 +75,8 @@ class DetailedReportStates(StatesGroup):
 # Обновляем хендлеры
 @router.message(Command("start", "menu"))
 async def menu_command(message: Message):
+    # Возврат в меню отменяет отчет, который еще готовится для этого чата
+    report_jobs.cancel(message.chat.id, reason="menu")
     await message.answer("Выберите действие:", reply_markup=main_menu_keyboard())
 
 
@@ -105,6 +135,8 @@ async def process_credentials(message: Message, state: FSMContext):
 
         # Добавляем аккаунт, используя значение из enum
         await add_account(source=Source(source).value, auth=auth, account_name=account_name)
+        # Новый токен проверяется в ближайшем отчете, даже если аккаунт пропускался
+        CIRCUIT_BREAKER.reset(auth["login"])
         await message.answer(
             f"Аккаунт {account_name} успешно добавлен!", reply_markup=main_menu_keyboard()
         )
@@ -138,15 +170,11 @@ async def list_accounts(callback: CallbackQuery):
             f"\n"
         )
 
-    # Разбиваем на части, если сообщение слишком длинное
-    if len(text) > 4096:
-        for x in range(0, len(text), 4096):
-            chunk = text[x : x + 4096]
-            await callback.message.answer(chunk, parse_mode="Markdown")
-    else:
-        await callback.message.answer(text, parse_mode="Markdown")
+    # Разбиваем на сообщения по аккаунтам и отправляем через очередь сообщений
+    chat_id = callback.message.chat.id
+    message_sender.send_report(callback.bot, chat_id, text, parse_mode="Markdown")
 
-    await callback.message.answer("Выберите действие:", reply_markup=main_menu_keyboard())
+    message_sender.send_message(callback.bot, chat_id, "Выберите действие:", reply_markup=main_menu_keyboard())
     await callback.answer()
 
 
@@ -174,6 +202,8 @@ async def bulk_add_account_receive(message: Message, state: FSMContext):
             if not source or not auth:
                 continue
             await add_account(source=source.lower(), auth=auth)
+            if isinstance(auth, dict) and auth.get("login"):
+                CIRCUIT_BREAKER.reset(auth["login"])
         await message.answer("Массовое добавление завершено!", reply_markup=main_menu_keyboard())
     except Exception as e:
         await message.answer(f"Ошибка при разборе данных: {e}")
@@ -224,17 +254,26 @@ async def get_budgets_source(callback: CallbackQuery):
     source = callback.data.replace("source_budgets_", "")
     
     # Отправляем промежуточное сообщение
-    progress_message = await callback.message.answer("⏳ *Готовлю отчет по бюджетам...*", parse_mode="Markdown")
+    progress_message = await callback.message.answer(
+        "⏳ *Готовлю отчет по бюджетам...*", parse_mode="Markdown", reply_markup=cancel_report_keyboard()
+    )
     await callback.answer()
     
     try:
         processor = ReportProcessor(source=Source(source), db_path="accounts.db")
-        report = await processor.get_budgets_report()
+        with start_trace("budgets_report", user_id=callback.from_user.id, source=source) as trace:
+            report = await report_jobs.run(callback.message.chat.id, processor.get_budgets_report())
         
+        # Ждем доставки отчета: ошибка отправки (например, разметки) выводится в промежуточном сообщении
+        await asyncio.gather(*message_sender.send_report(
+            callback.bot, callback.message.chat.id, report, parse_mode="Markdown"
+        ))
+        send_trace_hint(callback.bot, callback.message.chat.id, callback.from_user.id, trace)
+
         # Удаляем промежуточное сообщение
         await progress_message.delete()
-        
-        await callback.message.answer(report, parse_mode="Markdown")
+    except ReportCancelled:
+        await progress_message.edit_text("✖️ *Отчет отменен*", parse_mode="Markdown")
     except Exception as e:
         error_text = str(e).replace("_", "\\_").replace("*", "\\*").replace("`", "\\`").replace("[", "\\[").replace("]", "\\]")
         await progress_message.edit_text(f"❌ *Ошибка при подготовке отчета:*\n{error_text}", parse_mode="Markdown")
@@ -279,36 +318,54 @@ async def get_summary_report_source(callback: CallbackQuery, state: FSMContext):
         period = user_data.get("selected_period", "today")  # По умолчанию - сегодня
     
     # Отправляем промежуточное сообщение
-    progress_message = await callback.message.answer("⏳ *Готовлю сводный отчет...*", parse_mode="Markdown")
+    progress_message = await callback.message.answer(
+        "⏳ *Готовлю сводный отчет...*", parse_mode="Markdown", reply_markup=cancel_report_keyboard()
+    )
     await callback.answer()
     
+    # По мере готовности аккаунтов сообщение о подготовке обновляется: число готовых аккаунтов, итог и их блоки.
+    # Редактирование идет через очередь сообщений и не чаще PROGRESS_EDIT_INTERVAL_SECONDS
+    chat_id = callback.message.chat.id
+    progress = ProgressReporter(lambda text: message_sender.enqueue(
+        chat_id, progress_message.edit_text, text, parse_mode="Markdown", reply_markup=cancel_report_keyboard()
+    ))
+    
     try:
         # Получаем отчет с учетом выбранного периода
         processor = ReportProcessor(source=Source(source), db_path="accounts.db")
         
-        if period == "today":
-            report = await processor.get_today_summary_report()
-        else:  # period == "yesterday"
-            report = await processor.get_yesterday_summary_report()
-
-        print(len(report))
-        report_parts = report.split("•")
-        
-        # Remove empty first element if it exists
-        if report_parts and not report_parts[0].strip():
-            report_parts = report_parts[1:]
-        
-        # Group account entries and add bullet point back
-        for i in range(0, len(report_parts), 10):
-            chunk = report_parts[i:i+10]
-            # Add bullet point back to each part except the first in each message
-            formatted_chunk = "• " + "•".join(chunk)
-            await callback.message.answer(formatted_chunk, parse_mode="Markdown")
+        with start_trace("summary_report", user_id=callback.from_user.id, source=source, period=period) as trace:
+            try:
+                if period == "today":
+                    report_job = processor.get_today_summary_report(progress=progress)
+                else:  # period == "yesterday"
+                    report_job = processor.get_yesterday_summary_report(progress=progress)
+                report = await report_jobs.run(chat_id, report_job)
+            finally:
+                await progress.close()
+
+        reply_markup = None
+        if isinstance(report, ReportPage) and report.report_id:
+            reply_markup = report_export_keyboard(report.report_id)
+            # Отчет по большому числу аккаунтов отправляется одним файлом
+            if report.export_format:
+                report_file = await run_cpu_bound(processor.export_report, report.report_id, report.export_format)
+                if report_file:
+                    message_sender.send_file(callback.bot, chat_id, report_file)
+
+        # Блоки аккаунтов упаковываются в минимальное число сообщений. Ждем доставки, чтобы ошибка отправки
+        # (например, разметки) была выведена в промежуточном сообщении
+        await asyncio.gather(*message_sender.send_report(
+            callback.bot, chat_id, report, parse_mode="Markdown", reply_markup=reply_markup
+        ))
+        send_trace_hint(callback.bot, chat_id, callback.from_user.id, trace)
 
         # Удаляем промежуточное сообщение
         await progress_message.delete()
         
         #await callback.message.answer(report, parse_mode="Markdown")
+    except ReportCancelled:
+        await progress_message.edit_text("✖️ *Отчет отменен*", parse_mode="Markdown")
     except Exception as e:
         error_text = str(e).replace("_", "\\_").replace("*", "\\*").replace("`", "\\`").replace("[", "\\[").replace("]", "\\]")
         await progress_message.edit_text(f"❌ *Ошибка при подготовке отчета:*\n{error_text}", parse_mode="Markdown")
@@ -356,31 +413,45 @@ async def process_detailed_report_account_id(message: Message, state: FSMContext
         # Отправляем промежуточное сообщение
         progress_message = await message.answer(
             f"⏳ *Готовлю детальный отчет для аккаунта {account['account_name']}...*", 
-            parse_mode="Markdown"
+            parse_mode="Markdown",
+            reply_markup=cancel_report_keyboard(),
         )
         
         try:
             # Получаем отчет
             processor = ReportProcessor(source=Source(account['source'].upper()), db_path="accounts.db")
-            reports = await processor.get_detailed_report(account_id)
+            with start_trace("detailed_report", user_id=message.from_user.id, account_id=account_id) as trace:
+                reports = await report_jobs.run(message.chat.id, processor.get_detailed_report(account_id))
             
+            # Отправляем каждый отчет отдельным сообщением через очередь сообщений
+            deliveries = []
+            for report in reports:
+                # К страницам отчета по параметру добавляем кнопки сортировки и перелистывания
+                reply_markup = None
+                if isinstance(report, ReportPage) and report.report_id:
+                    reply_markup = detailed_report_page_keyboard(
+                        report.report_id, report.dimension, report.sort_by, report.page, report.pages,
+                        charts=CHARTS_AVAILABLE,
+                    )
+                # Длинный отчет разбивается по блокам, клавиатура прикрепляется к последнему сообщению
+                deliveries.extend(message_sender.send_report(
+                    message.bot, message.chat.id, report, parse_mode="Markdown", reply_markup=reply_markup
+                ))
+            # Ждем доставки: ошибка отправки (например, разметки) выводится в промежуточном сообщении
+            await asyncio.gather(*deliveries)
+
             # Удаляем промежуточное сообщение
             await progress_message.delete()
             
-            # Отправляем каждый отчет отдельным сообщением
-            for report in reports:
-                # Если отчет слишком длинный, разбиваем его на части
-                if len(report) > 4096:
-                    for x in range(0, len(report), 4096):
-                        chunk = report[x:x + 4096]
-                        await message.answer(chunk, parse_mode="Markdown")
-                else:
-                    await message.answer(report, parse_mode="Markdown")
+            send_trace_hint(message.bot, message.chat.id, message.from_user.id, trace)
             
             # Возвращаем в главное меню
-            await message.answer("Выберите действие:", reply_markup=main_menu_keyboard())
+            message_sender.send_message(message.bot, message.chat.id, "Выберите действие:", reply_markup=main_menu_keyboard())
             await state.clear()
             
+        except ReportCancelled:
+            await progress_message.edit_text("✖️ *Отчет отменен*", parse_mode="Markdown")
+            await state.clear()
         except Exception as e:
             error_text = str(e).replace("_", "\\_").replace("*", "\\*").replace("`", "\\`").replace("[", "\\[").replace("]", "\\]")
             await progress_message.edit_text(f"❌ *Ошибка при подготовке отчета:*\n{error_text}", parse_mode="Markdown")
@@ -393,9 +464,130 @@ async def process_detailed_report_account_id(message: Message, state: FSMContext
         )
 
 
+# --- Просмотр трассировки отчета (для администраторов) ---
+@router.message(Command("trace"))
+async def show_trace(message: Message):
+    if message.from_user.id not in get_admin_ids():
+        return
+
+    parts = message.text.split()
+    trace = trace_store.get(parts[1]) if len(parts) > 1 else None
+    if trace is None:
+        await message.answer("Трассировка не найдена. Использование: /trace <id>")
+        return
+
+    # Дерево замеров выводится блоком кода, длинные трассировки обрезаются до лимита сообщения
+    text = format_trace(trace).replace("`", "'")[:TELEGRAM_MESSAGE_LIMIT - 8]
+    await message.answer(f"```\n{text}\n```", parse_mode="Markdown")
+
+
+# --- Перелистывание страниц детального отчета ---
+@router.callback_query(F.data == "dpage_noop")
+async def detailed_report_page_noop(callback: CallbackQuery):
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith("dpage_"))
+async def detailed_report_page(callback: CallbackQuery):
+    _, report_id, dimension, sort_by, page = callback.data.split("_")
+
+    # Страницы отрисовываются из кеша рассчитанных отчетов, без повторных запросов к API
+    cached_report = detailed_report_cache.get(report_id)
+    report = None
+    if cached_report:
+        processor = ReportProcessor(source=cached_report.source, db_path="accounts.db")
+        report = await run_cpu_bound(processor.get_detailed_report_page, report_id, dimension, sort_by, int(page))
+
+    if report is None:
+        await callback.answer("Отчет устарел. Запросите детальную статистику заново.", show_alert=True)
+        return
+
+    await callback.message.edit_text(
+        report,
+        parse_mode="Markdown",
+        reply_markup=detailed_report_page_keyboard(
+            report_id, dimension, report.sort_by, report.page, report.pages, charts=CHARTS_AVAILABLE
+        ),
+    )
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith("export_"))
+async def export_report(callback: CallbackQuery):
+    _, report_id, export_format = callback.data.split("_")
+
+    # Файл формируется из кеша рассчитанных отчетов, без повторных запросов к API
+    cached_report = detailed_report_cache.get(report_id)
+    report_file = None
+    if cached_report:
+        processor = ReportProcessor(source=cached_report.source, db_path="accounts.db")
+        report_file = await run_cpu_bound(processor.export_report, report_id, export_format)
+
+    if report_file is None:
+        await callback.answer("Отчет устарел. Запросите статистику заново.", show_alert=True)
+        return
+
+    message_sender.send_file(callback.bot, callback.message.chat.id, report_file)
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith("charts_"))
+async def send_report_charts(callback: CallbackQuery):
+    report_id = callback.data.replace("charts_", "")
+    chat_id = callback.message.chat.id
+
+    cached_report = detailed_report_cache.get(report_id)
+    charts = None
+    if cached_report:
+        processor = ReportProcessor(source=cached_report.source, db_path="accounts.db")
+        charts = await processor.get_report_charts(report_id)
+
+    if charts is None:
+        await callback.answer("Отчет устарел. Запросите детальную статистику заново.", show_alert=True)
+        return
+    if not charts:
+        await callback.answer("Нет данных для построения графиков", show_alert=True)
+        return
+    await callback.answer()
+
+    # Уже загруженные графики отправляются по file_id, новые - из памяти
+    photos = [
+        chart.file_id or BufferedInputFile(chart.content, filename=f"chart_{i}.png")
+        for i, chart in enumerate(charts)
+    ]
+    if len(charts) == 1:
+        sent = message_sender.enqueue(chat_id, callback.bot.send_photo, chat_id, photos[0], caption=charts[0].caption)
+    else:
+        media = [InputMediaPhoto(media=photo, caption=chart.caption) for photo, chart in zip(photos, charts)]
+        sent = message_sender.enqueue(chat_id, callback.bot.send_media_group, chat_id, media)
+
+    try:
+        messages = await sent
+    except Exception:
+        # Ошибка отправки уже записана в лог очередью сообщений
+        return
+
+    # Запоминаем file_id загруженных графиков, чтобы не отрисовывать и не загружать их повторно
+    messages = messages if isinstance(messages, list) else [messages]
+    for chart, sent_message in zip(charts, messages):
+        if chart.file_id is None and sent_message.photo:
+            chart_cache.put(chart.key, sent_message.photo[-1].file_id)
+
+
+# --- Отмена отчета ---
+@router.callback_query(F.data == "cancel_report")
+async def cancel_report(callback: CallbackQuery):
+    # Сообщение о подготовке заменяет на "Отчет отменен" обработчик, который ждал отчет
+    if report_jobs.cancel(callback.message.chat.id):
+        await callback.answer("Отчет отменен")
+    else:
+        await callback.answer("Отчет уже готов или отменен")
+
+
 # --- Обработчик кнопки "Назад" ---
 @router.callback_query(F.data == "back_to_menu")
 async def back_to_menu(callback: CallbackQuery):
+    report_jobs.cancel(callback.message.chat.id, reason="menu")
     await callback.message.answer("Выберите действие:", reply_markup=main_menu_keyboard())
     await callback.answer()
 
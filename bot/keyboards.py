@@ -1,6 +1,7 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from enums.sources import Source
+from settings.report_settings import EXPORT_FORMATS
 
 
 def main_menu_keyboard() -> InlineKeyboardMarkup:
@@ -71,3 +72,76 @@ def period_selection_keyboard() -> InlineKeyboardMarkup:
         [InlineKeyboardButton(text="🔙 Назад", callback_data="back_to_menu")]
     ]
     return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def cancel_report_keyboard() -> InlineKeyboardMarkup:
+    """
+    Создает клавиатуру сообщения о подготовке отчета с кнопкой отмены
+    """
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="✖️ Отмена", callback_data="cancel_report")]
+    ])
+
+
+def _export_buttons(report_id: str) -> list[InlineKeyboardButton]:
+    """Кнопки выгрузки отчета файлом во всех поддерживаемых форматах"""
+    return [
+        InlineKeyboardButton(text=f"📎 {export_format.upper()}", callback_data=f"export_{report_id}_{export_format}")
+        for export_format in EXPORT_FORMATS
+    ]
+
+
+def report_export_keyboard(report_id: str) -> InlineKeyboardMarkup:
+    """
+    Создает клавиатуру для выгрузки рассчитанного отчета файлом
+
+    :param report_id: Идентификатор отчета в кеше
+    """
+    return InlineKeyboardMarkup(inline_keyboard=[_export_buttons(report_id)])
+
+
+def detailed_report_page_keyboard(report_id: str, dimension: str, sort_by: str, page: int, pages: int,
+                                  charts: bool = False) -> InlineKeyboardMarkup:
+    """
+    Создает клавиатуру для сортировки и перелистывания страниц детального отчета
+
+    :param report_id: Идентификатор отчета в кеше
+    :param dimension: Параметр группировки
+    :param sort_by: Текущий ключ сортировки
+    :param page: Текущая страница (с нуля)
+    :param pages: Общее число страниц
+    :param charts: Добавить кнопку построения графиков
+    """
+    sort_options = [
+        ("cost", "Расход"),
+        ("conv", "Конверсии"),
+        ("cpa", "CPA"),
+        ("name", "Дата" if dimension == "Date" else "А-Я"),
+    ]
+
+    sort_buttons = []
+    for sort_key, sort_name in sort_options:
+        if sort_key == sort_by:
+            sort_buttons.append(InlineKeyboardButton(text=f"✓ {sort_name}", callback_data="dpage_noop"))
+        else:
+            sort_buttons.append(InlineKeyboardButton(
+                text=sort_name, callback_data=f"dpage_{report_id}_{dimension}_{sort_key}_0"
+            ))
+
+    buttons = [sort_buttons]
+    if pages > 1:
+        page_buttons = []
+        if page > 0:
+            page_buttons.append(InlineKeyboardButton(
+                text="◀️", callback_data=f"dpage_{report_id}_{dimension}_{sort_by}_{page - 1}"
+            ))
+        page_buttons.append(InlineKeyboardButton(text=f"{page + 1}/{pages}", callback_data="dpage_noop"))
+        if page < pages - 1:
+            page_buttons.append(InlineKeyboardButton(
+                text="▶️", callback_data=f"dpage_{report_id}_{dimension}_{sort_by}_{page + 1}"
+            ))
+        buttons.append(page_buttons)
+    buttons.append(_export_buttons(report_id))
+    if charts:
+        buttons.append([InlineKeyboardButton(text="📊 Графики", callback_data=f"charts_{report_id}")])
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
@@ -0,0 +1,100 @@
+from typing import List
+
+from settings.bot import TELEGRAM_MESSAGE_LIMIT
+
+# Символы разметки Markdown (legacy), которые экранируются обратной косой чертой
+MARKDOWN_SPECIAL_CHARS = ("_", "*", "`", "[", "]")
+
+
+def escape_markdown(text: str) -> str:
+    """Экранирует символы разметки Markdown, чтобы текст был отправлен как есть"""
+    for char in MARKDOWN_SPECIAL_CHARS:
+        text = text.replace(char, f"\\{char}")
+    return text
+
+
+def is_markdown_balanced(text: str) -> bool:
+    """
+    Проверяет, что все сущности Markdown (*жирный*, _курсив_, `код`, [ссылка]) в тексте закрыты.
+    Внутри сущности другие символы разметки не учитываются, экранированные символы пропускаются.
+    """
+    closing_char = None
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if closing_char is None:
+            if char == "\\":
+                i += 2
+                continue
+            if char in ("*", "_", "`"):
+                closing_char = char
+            elif char == "[":
+                closing_char = "]"
+        elif char == closing_char:
+            closing_char = None
+        i += 1
+    return closing_char is None
+
+
+def _split_oversized(block: str, limit: int) -> List[str]:
+    """Разбивает блок длиннее лимита по строкам, а слишком длинные строки - по символам"""
+    parts = []
+    for line in block.splitlines(keepends=True):
+        escaped = not is_markdown_balanced(line)
+        if escaped:
+            line = escape_markdown(line)
+        if len(line) <= limit:
+            parts.append(line)
+            continue
+        # Строку приходится резать посередине - разметку в ней сохранить нельзя
+        if not escaped:
+            line = escape_markdown(line)
+        while line:
+            cut = limit
+            # Не отрываем обратную косую черту от экранируемого символа
+            if line[:cut].endswith("\\") and len(line) > cut:
+                cut -= 1
+            parts.append(line[:cut])
+            line = line[cut:]
+    return parts
+
+
+def split_message(text: str, limit: int = TELEGRAM_MESSAGE_LIMIT, separator: str = "\n\n") -> List[str]:
+    """
+    Разбивает отчет на минимальное число сообщений, не разрывая блоки и сущности Markdown.
+
+    Отчет делится на блоки по separator (по умолчанию - пустая строка между аккаунтами или строками отчета),
+    блоки жадно упаковываются в сообщения до limit символов. Блок длиннее лимита делится по строкам.
+    Блок с незакрытой разметкой экранируется, чтобы Telegram не отклонил сообщение.
+
+    :param text: Текст отчета в разметке Markdown
+    :param limit: Максимальная длина сообщения
+    :param separator: Разделитель блоков
+    :return: Список сообщений
+    """
+    pieces = []
+    blocks = text.split(separator)
+    for i, block in enumerate(blocks):
+        if i < len(blocks) - 1:
+            block += separator
+        if not block:
+            continue
+        if not is_markdown_balanced(block):
+            block = escape_markdown(block)
+        if len(block) > limit:
+            pieces.extend(_split_oversized(block, limit))
+        else:
+            pieces.append(block)
+
+    messages = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) > limit:
+            messages.append(current)
+            current = ""
+        current += piece
+    if current:
+        messages.append(current)
+
+    # Пробельные символы на границах сообщений Telegram все равно обрезает
+    return [message.strip() for message in messages if message.strip()]
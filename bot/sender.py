@@ -0,0 +1,195 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Set
+
+from aiogram import Bot
+from aiogram.types import BufferedInputFile
+from aiogram.exceptions import TelegramRetryAfter, TelegramNetworkError, TelegramServerError
+
+from bot.message_splitter import split_message
+from models.report import ReportFile
+from services.metrics import TELEGRAM_QUEUE_WAIT_SECONDS, TELEGRAM_SEND_SECONDS
+from settings.bot import TELEGRAM_GLOBAL_RATE, TELEGRAM_CHAT_INTERVAL, TELEGRAM_SEND_MAX_RETRIES
+
+logger = logging.getLogger(__name__)
+
+
+class _SendJob:
+    __slots__ = ("send_func", "args", "kwargs", "future", "attempt", "enqueued_at")
+
+    def __init__(self, send_func: Callable[..., Awaitable[Any]], args: tuple, kwargs: dict, future: asyncio.Future,
+                 enqueued_at: float):
+        self.send_func = send_func
+        self.args = args
+        self.kwargs = kwargs
+        self.future = future
+        self.attempt = 0
+        self.enqueued_at = enqueued_at
+
+
+class MessageSender:
+    """
+    Очередь исходящих сообщений Telegram.
+
+    Сообщения одного чата отправляются по порядку и не чаще одного раза в chat_interval секунд,
+    все чаты вместе - не чаще global_rate сообщений в секунду. При флуд-контроле (429) отправка
+    в чат откладывается на retry_after секунд и повторяется, сетевые ошибки и ошибки сервера
+    повторяются до max_retries раз.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = TELEGRAM_GLOBAL_RATE,
+        chat_interval: float = TELEGRAM_CHAT_INTERVAL,
+        max_retries: int = TELEGRAM_SEND_MAX_RETRIES,
+    ):
+        self.global_interval = 1 / global_rate
+        self.chat_interval = chat_interval
+        self.max_retries = max_retries
+        self._queues: Dict[int, Deque[_SendJob]] = {}
+        self._chat_ready_at: Dict[int, float] = {}
+        self._in_flight: Set[int] = set()
+        self._deliveries: Set[asyncio.Task] = set()
+        self._global_ready_at = 0.0
+        self._wakeup: asyncio.Event | None = None
+        self._worker: asyncio.Task | None = None
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            self._worker = asyncio.create_task(self._run())
+
+    def enqueue(self, chat_id: int, send_func: Callable[..., Awaitable[Any]], *args, **kwargs) -> asyncio.Future:
+        """
+        Ставит вызов метода Bot в очередь чата.
+
+        :param chat_id: Чат, в который отправляется сообщение
+        :param send_func: Метод бота, например bot.send_message или bot.send_document
+        :return: Future с результатом вызова. Ожидать его не обязательно
+        """
+        self._ensure_worker()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        # Ошибка отправки уже записана в лог, поэтому помечаем ее как обработанную
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._queues.setdefault(chat_id, deque()).append(_SendJob(send_func, args, kwargs, future, loop.time()))
+        self._wakeup.set()
+        return future
+
+    def send_message(self, bot: Bot, chat_id: int, text: str, **kwargs) -> asyncio.Future:
+        """Ставит в очередь отправку текстового сообщения"""
+        return self.enqueue(chat_id, bot.send_message, chat_id, text, **kwargs)
+
+    def send_report(self, bot: Bot, chat_id: int, text: str, reply_markup=None, **kwargs) -> List[asyncio.Future]:
+        """
+        Ставит в очередь отчет, разбитый на минимальное число сообщений по блокам (см. split_message).
+        Клавиатура прикрепляется к последнему сообщению.
+
+        :return: Future каждого сообщения
+        """
+        messages = split_message(text)
+        return [
+            self.send_message(bot, chat_id, message, reply_markup=reply_markup if i == len(messages) - 1 else None, **kwargs)
+            for i, message in enumerate(messages)
+        ]
+
+    def send_file(self, bot: Bot, chat_id: int, report_file: ReportFile, **kwargs) -> asyncio.Future:
+        """Ставит в очередь отправку отчета документом прямо из памяти"""
+        document = BufferedInputFile(report_file.content, filename=report_file.filename)
+        return self.enqueue(chat_id, bot.send_document, chat_id, document, **kwargs)
+
+    def _pick_chat(self, now: float) -> tuple[int | None, float | None]:
+        """Возвращает чат, готовый к отправке, или время ожидания до ближайшего готового чата"""
+        nearest = None
+        for chat_id, queue in self._queues.items():
+            if not queue or chat_id in self._in_flight:
+                continue
+            ready_at = self._chat_ready_at.get(chat_id, 0.0)
+            if ready_at <= now:
+                return chat_id, None
+            nearest = ready_at if nearest is None else min(nearest, ready_at)
+        return None, None if nearest is None else nearest - now
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            if self._global_ready_at > now:
+                await asyncio.sleep(self._global_ready_at - now)
+                continue
+
+            chat_id, wait_time = self._pick_chat(now)
+            if chat_id is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait_time)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            job = self._queues[chat_id].popleft()
+            # Перемещаем чат в конец, чтобы чаты обслуживались по очереди
+            self._queues[chat_id] = self._queues.pop(chat_id)
+            self._in_flight.add(chat_id)
+            self._global_ready_at = now + self.global_interval
+            self._chat_ready_at[chat_id] = now + self.chat_interval
+            delivery = asyncio.create_task(self._deliver(chat_id, job))
+            self._deliveries.add(delivery)
+            delivery.add_done_callback(self._deliveries.discard)
+
+    async def _deliver(self, chat_id: int, job: _SendJob) -> None:
+        loop = asyncio.get_running_loop()
+        if job.attempt == 0:
+            TELEGRAM_QUEUE_WAIT_SECONDS.observe(loop.time() - job.enqueued_at)
+        try:
+            with TELEGRAM_SEND_SECONDS.time(method=getattr(job.send_func, "__name__", "unknown")):
+                result = await job.send_func(*job.args, **job.kwargs)
+        except TelegramRetryAfter as e:
+            self._retry(chat_id, job, loop.time() + e.retry_after, e)
+        except (TelegramNetworkError, TelegramServerError) as e:
+            self._retry(chat_id, job, loop.time() + self.chat_interval * 2 ** job.attempt, e)
+        except Exception as e:
+            logger.error(f"Не удалось отправить сообщение в чат {chat_id}: {e}")
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self._in_flight.discard(chat_id)
+            if not self._queues.get(chat_id):
+                self._queues.pop(chat_id, None)
+                if self._chat_ready_at.get(chat_id, 0.0) <= loop.time():
+                    self._chat_ready_at.pop(chat_id, None)
+            self._wakeup.set()
+
+    def _retry(self, chat_id: int, job: _SendJob, ready_at: float, error: Exception) -> None:
+        job.attempt += 1
+        if job.attempt > self.max_retries:
+            logger.error(f"Не удалось отправить сообщение в чат {chat_id} после {self.max_retries} повторов: {error}")
+            if not job.future.done():
+                job.future.set_exception(error)
+            return
+        logger.warning(f"Повтор отправки в чат {chat_id} (попытка {job.attempt}): {error}")
+        # Возвращаем сообщение в начало очереди чата, чтобы сохранить порядок
+        self._queues.setdefault(chat_id, deque()).appendleft(job)
+        self._chat_ready_at[chat_id] = max(self._chat_ready_at.get(chat_id, 0.0), ready_at)
+
+    async def stop(self) -> None:
+        """Останавливает обработку очереди. Неотправленные сообщения отменяются"""
+        for queue in self._queues.values():
+            for job in queue:
+                job.future.cancel()
+        self._queues.clear()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+
+# Общая очередь исходящих сообщений бота
+message_sender = MessageSender()
@@ -0,0 +1,111 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, List, Optional
+
+from connectors.exceptions import YandexDirectAuthError, YandexDirectCircuitOpenError
+from services.metrics import CIRCUIT_BREAKER_OPENED, CIRCUIT_BREAKER_SKIPPED
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Circuit:
+    # Число ошибок авторизации подряд
+    failures: int = 0
+    # Последняя ошибка авторизации: ее текст возвращается, пока аккаунт пропускается
+    error: Optional[YandexDirectAuthError] = None
+    # Момент размыкания (time.monotonic) или None, если запросы выполняются
+    opened_at: Optional[float] = None
+    # Выполняется пробный запрос после паузы
+    probing: bool = False
+
+
+class CircuitBreaker:
+    """
+    Пропуск аккаунтов с недействительным токеном или закрытым доступом.
+
+    Ошибки авторизации (YandexDirectAuthError) считаются по ключу аккаунта. После failure_threshold ошибок подряд
+    цепь размыкается: запросы к аккаунту не выполняются и не занимают место в лимите запросов, а сразу получают
+    YandexDirectCircuitOpenError с текстом последней ошибки. Через cooldown_seconds один запрос выполняется
+    пробно: успех замыкает цепь, ошибка авторизации продлевает паузу. Успешный запрос сбрасывает счетчик.
+    Остальные ошибки (сеть, лимиты, 5xx) на цепь не влияют.
+    """
+
+    def __init__(self, failure_threshold: int, cooldown_seconds: float):
+        """
+        :param failure_threshold: Число ошибок авторизации подряд до размыкания
+        :param cooldown_seconds: Пауза до пробного запроса, секунд
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._circuits: Dict[Hashable, _Circuit] = {}
+        self._listeners: List[Callable[[Hashable, YandexDirectAuthError], None]] = []
+
+    def add_listener(self, listener: Callable[[Hashable, YandexDirectAuthError], None]) -> None:
+        """
+        Добавляет обработчик размыкания цепи (например, уведомление администраторов).
+        Вызывается синхронно один раз при размыкании, повторные ошибки пробных запросов его не вызывают.
+        """
+        self._listeners.append(listener)
+
+    def is_open(self, key: Hashable) -> bool:
+        circuit = self._circuits.get(key)
+        return circuit is not None and circuit.opened_at is not None
+
+    def open_circuits(self) -> Dict[Hashable, YandexDirectAuthError]:
+        """Пропускаемые аккаунты и последние ошибки по ним"""
+        return {key: circuit.error for key, circuit in self._circuits.items() if circuit.opened_at is not None}
+
+    def reset(self, key: Optional[Hashable] = None) -> None:
+        """Замыкает цепь аккаунта (например, после замены токена) или всех аккаунтов"""
+        if key is None:
+            self._circuits.clear()
+        else:
+            self._circuits.pop(key, None)
+
+    async def call(self, key: Hashable, func, *args, **kwargs):
+        """
+        Выполняет запрос к аккаунту, если его цепь замкнута или пора выполнить пробный запрос.
+
+        :raises YandexDirectCircuitOpenError: Аккаунт пропускается
+        """
+        circuit = self._circuits.get(key)
+        probe = False
+        if circuit is not None and circuit.opened_at is not None:
+            if circuit.probing or time.monotonic() - circuit.opened_at < self.cooldown_seconds:
+                CIRCUIT_BREAKER_SKIPPED.inc()
+                raise YandexDirectCircuitOpenError.from_error(circuit.error)
+            circuit.probing = probe = True
+        try:
+            result = await func(*args, **kwargs)
+        except YandexDirectAuthError as e:
+            self._record_failure(key, e, probe)
+            raise
+        except BaseException:
+            # Пробный запрос не дал ответа (сеть, отмена отчета): следующий запрос будет пробным
+            if probe:
+                circuit.probing = False
+            raise
+        if self._circuits.pop(key, None) is not None and probe:
+            logger.info(f"Аккаунт {key} снова доступен")
+        return result
+
+    def _record_failure(self, key: Hashable, error: YandexDirectAuthError, probe: bool) -> None:
+        circuit = self._circuits.setdefault(key, _Circuit())
+        circuit.failures += 1
+        circuit.error = error
+        if probe:
+            circuit.opened_at = time.monotonic()
+            circuit.probing = False
+            return
+        if circuit.opened_at is not None or circuit.failures < self.failure_threshold:
+            return
+        circuit.opened_at = time.monotonic()
+        CIRCUIT_BREAKER_OPENED.inc()
+        logger.warning(f"Аккаунт {key} пропускается {self.cooldown_seconds:g} с после ошибок авторизации: {error}")
+        for listener in self._listeners:
+            try:
+                listener(key, error)
+            except Exception:
+                logger.exception("Ошибка обработчика размыкания цепи")
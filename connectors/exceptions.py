@@ -0,0 +1,97 @@
+from typing import Optional
+
+# Коды ошибок API Яндекс.Директ, после которых запрос можно повторить
+# 52 - сервер авторизации временно недоступен, 1000-1002 - сервис временно недоступен / внутренняя ошибка
+TRANSIENT_ERROR_CODES = {52, 1000, 1001, 1002}
+# 56 - превышен лимит запросов, 506 - превышен лимит соединений, 9000 - превышено число отчетов в очереди
+RATE_LIMIT_ERROR_CODES = {56, 506, 9000}
+# 53 - ошибка авторизации, 54 - нет прав, 58 - незарегистрированное приложение, 513 - нет доступа к API
+AUTH_ERROR_CODES = {53, 54, 58, 513}
+# 152 - недостаточно баллов API
+UNITS_ERROR_CODES = {152}
+
+# HTTP-статусы, после которых запрос можно повторить
+TRANSIENT_HTTP_STATUSES = {500, 502, 503, 504}
+
+
+class YandexDirectError(Exception):
+    """Ошибка API Яндекс.Директ"""
+    retryable = False
+
+    def __init__(self, message: str, status: Optional[int] = None, error_code: Optional[int] = None,
+                 retry_after: Optional[float] = None):
+        """
+        :param message: Текст ошибки
+        :param status: HTTP-статус ответа
+        :param error_code: Код ошибки API
+        :param retry_after: Рекомендуемая API пауза перед повтором, секунд
+        """
+        super().__init__(message)
+        self.status = status
+        self.error_code = error_code
+        self.retry_after = retry_after
+
+    def __reduce__(self):
+        # Ошибки передаются в пул процессов вместе со статистикой аккаунтов
+        return type(self), (str(self), self.status, self.error_code, self.retry_after)
+
+
+class YandexDirectTransientError(YandexDirectError):
+    """Временная ошибка сервера API (5xx, внутренние ошибки): запрос можно повторить"""
+    retryable = True
+
+
+class YandexDirectRateLimitError(YandexDirectTransientError):
+    """Превышен лимит запросов или соединений: запрос можно повторить после паузы"""
+
+
+class YandexDirectNetworkError(YandexDirectTransientError):
+    """Ошибка соединения или таймаут запроса"""
+
+
+class YandexDirectAuthError(YandexDirectError):
+    """Ошибка авторизации или нет доступа к аккаунту: повтор не поможет"""
+
+
+class YandexDirectCircuitOpenError(YandexDirectAuthError):
+    """Аккаунт пропущен без запроса: последние запросы к нему завершились ошибкой авторизации"""
+
+    @classmethod
+    def from_error(cls, error: YandexDirectError) -> "YandexDirectCircuitOpenError":
+        """Ошибка пропуска аккаунта с текстом и кодом последней ошибки авторизации"""
+        return cls(f"Аккаунт временно пропускается. {error}", status=error.status, error_code=error.error_code)
+
+
+class YandexDirectUnitsError(YandexDirectError):
+    """Баллов API недостаточно: API отклонило запрос или фоновый запрос отложен до восстановления баллов"""
+
+
+class YandexDirectRequestError(YandexDirectError):
+    """Ошибка в параметрах запроса или прочая постоянная ошибка API"""
+
+
+class YandexDirectResponseError(YandexDirectError):
+    """Ответ API не удалось разобрать"""
+
+
+def error_from_response(message: str, status: Optional[int] = None, error_code: Optional[int] = None,
+                        retry_after: Optional[float] = None) -> YandexDirectError:
+    """
+    Возвращает исключение нужного типа по HTTP-статусу и коду ошибки API.
+
+    :param message: Текст ошибки
+    :param status: HTTP-статус ответа (для API v4 ошибки приходят со статусом 200 - передается None)
+    :param error_code: Код ошибки API из тела ответа
+    :param retry_after: Рекомендуемая пауза перед повтором, секунд
+    """
+    if status == 429 or error_code in RATE_LIMIT_ERROR_CODES:
+        error_class = YandexDirectRateLimitError
+    elif status in TRANSIENT_HTTP_STATUSES or error_code in TRANSIENT_ERROR_CODES:
+        error_class = YandexDirectTransientError
+    elif status in (401, 403) or error_code in AUTH_ERROR_CODES:
+        error_class = YandexDirectAuthError
+    elif error_code in UNITS_ERROR_CODES:
+        error_class = YandexDirectUnitsError
+    else:
+        error_class = YandexDirectRequestError
+    return error_class(message, status=status, error_code=error_code, retry_after=retry_after)
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, Iterator, Mapping, Optional
+
+from enums.priorities import RequestPriority
+from services.metrics import RATE_LIMITER_WAIT_SECONDS
+from services.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Приоритет запросов текущей задачи. Задачи, созданные внутри, наследуют значение
+_priority: ContextVar[RequestPriority] = ContextVar("api_request_priority", default=RequestPriority.INTERACTIVE)
+
+DEFAULT_WEIGHTS: Dict[RequestPriority, int] = {
+    RequestPriority.INTERACTIVE: 16,
+    RequestPriority.SCHEDULED: 4,
+    RequestPriority.BULK: 1,
+}
+
+
+@contextmanager
+def request_priority(priority: RequestPriority) -> Iterator[None]:
+    """Задает приоритет запросов к API внутри блока"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> RequestPriority:
+    return _priority.get()
+
+
+class RateLimiter:
+    """
+    Ограничивает частоту и параллельность запросов к API и распределяет их по приоритетам.
+
+    Один экземпляр разделяется всеми построителями отчетов и фоновыми задачами процесса,
+    поэтому бот и бэкфилл, запущенные в одном процессе, не превышают общий лимит.
+
+    Ожидающие запросы стоят в очередях по приоритетам (RequestPriority). Освободившееся место отдается очереди
+    с наименьшим пройденным путем (stride scheduling): каждый запрос продвигает очередь на 1 / вес, поэтому
+    при весах 16:4:1 интерактивные запросы получают основную часть мест, а фоновые не простаивают совсем.
+    Запрос, пришедший в пустую очередь, не получает накопленного за время простоя преимущества.
+    Новый интерактивный запрос обгоняет уже ожидающие фоновые; выполняющиеся запросы не прерываются.
+    Неинтерактивные запросы занимают не больше max_concurrent - reserved_interactive мест одновременно:
+    долгие фоновые отчеты (ожидание офлайн-отчета) не занимают все места.
+    """
+
+    def __init__(self, max_concurrent: int, max_requests: int, window_seconds: float,
+                 weights: Optional[Mapping[RequestPriority, int]] = None, reserved_interactive: int = 0):
+        """
+        :param max_concurrent: Максимальное число одновременных запросов
+        :param max_requests: Максимальное число запросов в скользящем окне
+        :param window_seconds: Длина скользящего окна в секундах
+        :param weights: Веса приоритетов (по умолчанию - DEFAULT_WEIGHTS)
+        :param reserved_interactive: Число одновременных запросов, которые доступны только интерактивным запросам
+        """
+        self.max_concurrent = max_concurrent
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.weights = dict(weights or DEFAULT_WEIGHTS)
+        self.reserved_interactive = reserved_interactive
+        self._loop = None
+        self._timestamps: deque = deque()
+        self._queues: Dict[RequestPriority, Deque[asyncio.Future]] = {priority: deque() for priority in RequestPriority}
+        # Пройденный путь очередей и текущее виртуальное время планировщика
+        self._passes: Dict[RequestPriority, float] = {priority: 0.0 for priority in RequestPriority}
+        self._virtual_time = 0.0
+        self._running = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _bind_loop(self) -> asyncio.AbstractEventLoop:
+        """Сбрасывает состояние при смене event loop (например, при повторном asyncio.run)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._timestamps.clear()
+            for queue in self._queues.values():
+                queue.clear()
+            self._passes = {priority: 0.0 for priority in RequestPriority}
+            self._virtual_time = 0.0
+            self._running = 0
+            self._timer = None
+        return loop
+
+    def queued(self, priority: Optional[RequestPriority] = None) -> int:
+        """Число запросов, ожидающих места, - всего или с указанным приоритетом"""
+        queues = self._queues.values() if priority is None else [self._queues[priority]]
+        return sum(1 for queue in queues for future in queue if not future.done())
+
+    def _concurrency_limit(self, priority: RequestPriority) -> int:
+        if priority is RequestPriority.INTERACTIVE:
+            return self.max_concurrent
+        return max(1, self.max_concurrent - self.reserved_interactive)
+
+    def _pick_queue(self) -> Optional[RequestPriority]:
+        """Очередь, которой отдается следующее место: с наименьшим пройденным путем, при равенстве - приоритетнее"""
+        best = None
+        for priority in RequestPriority:
+            queue = self._queues[priority]
+            while queue and queue[0].done():
+                queue.popleft()
+            if not queue or self._running >= self._concurrency_limit(priority):
+                continue
+            if best is None or self._passes[priority] < self._passes[best]:
+                best = priority
+        return best
+
+    def _dispatch(self) -> None:
+        """Раздает свободные места ожидающим запросам"""
+        loop = self._loop
+        while True:
+            priority = self._pick_queue()
+            if priority is None:
+                return
+            now = loop.time()
+            # Удаляем timestamp'ы старше окна
+            while self._timestamps and now - self._timestamps[0] >= self.window_seconds:
+                self._timestamps.popleft()
+            if len(self._timestamps) >= self.max_requests:
+                wait_time = self.window_seconds - (now - self._timestamps[0])
+                if self._timer is None:
+                    logger.info(f"Достигнут лимит запросов, ожидание {wait_time:.2f} секунд...")
+                    self._timer = loop.call_later(wait_time, self._on_timer)
+                return
+            future = self._queues[priority].popleft()
+            self._virtual_time = self._passes[priority]
+            self._passes[priority] += 1 / self.weights.get(priority, 1)
+            self._timestamps.append(now)
+            self._running += 1
+            future.set_result(now)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
+
+    def _release(self) -> None:
+        self._running -= 1
+        self._dispatch()
+
+    async def _acquire(self, loop: asyncio.AbstractEventLoop, priority: RequestPriority) -> None:
+        """Ожидает место в окне лимита и среди одновременных запросов"""
+        queue = self._queues[priority]
+        if not any(not future.done() for future in queue):
+            # Очередь простаивала: она продолжает с текущего виртуального времени, а не с накопленного
+            self._passes[priority] = max(self._passes[priority], self._virtual_time)
+        future = loop.create_future()
+        queue.append(future)
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Место выдано, но запрос отменен до отправки (например, пользователь отменил отчет):
+                # место в окне и среди одновременных запросов освобождается
+                try:
+                    self._timestamps.remove(future.result())
+                except ValueError:
+                    pass
+                self._release()
+            raise
+
+    async def run(self, api_func, *args, **kwargs):
+        """Выполняет запрос с учетом лимитов и приоритета текущей задачи (см. request_priority)"""
+        loop = self._bind_loop()
+        priority = current_priority()
+        started = loop.time()
+        with span("rate_limiter.wait", priority=priority.value):
+            await self._acquire(loop, priority)
+        try:
+            RATE_LIMITER_WAIT_SECONDS.observe(loop.time() - started, priority=priority.value)
+            return await api_func(*args, **kwargs)
+        finally:
+            self._release()
@@ -0,0 +1,61 @@
+import asyncio
+import logging
+import random
+from dataclasses import dataclass
+from typing import Awaitable, Callable, TypeVar
+
+from connectors.exceptions import YandexDirectError, YandexDirectRateLimitError
+from services.deadline import time_left
+from services.metrics import API_RETRIES
+from settings.yandex_direct import API_RETRY_ATTEMPTS, API_RETRY_BASE_DELAY_SECONDS, API_RETRY_MAX_DELAY_SECONDS
+
+logger = logging.getLogger(__name__)
+
+R = TypeVar("R")
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Повтор запросов при временных ошибках API с экспоненциальной паузой и случайным разбросом.
+
+    Пауза перед повтором n (с нуля) выбирается случайно от 0 до min(max_delay, base_delay * 2 ** n)
+    ("full jitter"): запросы многих аккаунтов, получивших ошибку одновременно, не повторяются одной волной.
+    Если API сообщило рекомендуемую паузу (Retry-After), пауза не меньше нее. Если до срока готовности отчета
+    остается меньше паузы, повтор не выполняется: в отчет попадает сама ошибка, а не "не успели".
+    """
+    attempts: int = API_RETRY_ATTEMPTS
+    base_delay: float = API_RETRY_BASE_DELAY_SECONDS
+    max_delay: float = API_RETRY_MAX_DELAY_SECONDS
+
+    def delay(self, retry: int, error: YandexDirectError) -> float:
+        """Пауза перед повтором номер retry (с нуля), секунд"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+        if error.retry_after is not None:
+            delay = max(delay, min(error.retry_after, self.max_delay))
+        return delay
+
+    async def run(self, func: Callable[[], Awaitable[R]], endpoint: str) -> R:
+        """
+        Выполняет запрос, повторяя его при ошибках с retryable = True.
+
+        :param func: Запрос без аргументов
+        :param endpoint: Название эндпоинта для журнала и метрик
+        :raises YandexDirectError: Постоянная ошибка или временная после исчерпания попыток
+        """
+        retry = 0
+        while True:
+            try:
+                return await func()
+            except YandexDirectError as e:
+                if not e.retryable or retry + 1 >= self.attempts:
+                    raise
+                delay = self.delay(retry, e)
+                remaining = time_left()
+                if remaining is not None and delay >= remaining:
+                    raise
+                reason = "rate_limit" if isinstance(e, YandexDirectRateLimitError) else "transient"
+                API_RETRIES.inc(endpoint=endpoint, reason=reason)
+                logger.warning(f"Повтор запроса {endpoint} через {delay:.2f} с (попытка {retry + 2}/{self.attempts}): {e}")
+                await asyncio.sleep(delay)
+                retry += 1
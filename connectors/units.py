@@ -0,0 +1,80 @@
+import time
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional
+
+from services.metrics import API_UNITS_REMAINING, API_UNITS_SPENT
+
+
+@dataclass
+class UnitsBalance:
+    """Баллы API аккаунта по заголовку Units: израсходовано запросом / осталось / суточный лимит"""
+    spent: int
+    remaining: int
+    limit: int
+    # Момент получения (time.monotonic)
+    updated_at: float
+
+    @property
+    def fraction_left(self) -> float:
+        return self.remaining / self.limit if self.limit else 1.0
+
+
+def parse_units(header: Optional[str]) -> Optional[UnitsBalance]:
+    """Разбирает заголовок Units ("10/20828/64000"). Возвращает None, если заголовка нет или формат неизвестен"""
+    if not header:
+        return None
+    try:
+        spent, remaining, limit = (int(value) for value in header.split("/"))
+    except ValueError:
+        return None
+    return UnitsBalance(spent=spent, remaining=remaining, limit=limit, updated_at=time.monotonic())
+
+
+class UnitsTracker:
+    """
+    Учет баллов API Яндекс.Директ по ответам v5.
+
+    Каждый ответ сообщает в заголовке Units остаток баллов, в Units-Used-Login - логин, с которого они списаны
+    (у клиентов агентства - логин агентства). Остаток хранится по этому логину, поэтому нехватка баллов
+    агентства видна по всем его клиентам. Остаток старше balance_ttl секунд считается неизвестным: баллы
+    восстанавливаются со временем, и следующий запрос обновит данные.
+    """
+
+    def __init__(self, reserve_fraction: float, balance_ttl: float):
+        """
+        :param reserve_fraction: Доля суточного лимита, которая оставляется интерактивным отчетам
+        :param balance_ttl: Время, в течение которого остаток считается актуальным, секунд
+        """
+        self.reserve_fraction = reserve_fraction
+        self.balance_ttl = balance_ttl
+        self._balances: Dict[str, UnitsBalance] = {}
+        # Логин аккаунта -> логин, с которого списываются баллы
+        self._payers: Dict[str, str] = {}
+
+    def record(self, login: str, headers: Mapping[str, str]) -> Optional[UnitsBalance]:
+        """Запоминает остаток баллов по заголовкам ответа API"""
+        balance = parse_units(headers.get("Units"))
+        if balance is None:
+            return None
+        payer = headers.get("Units-Used-Login") or login
+        self._payers[login] = payer
+        self._balances[payer] = balance
+        API_UNITS_REMAINING.set(balance.remaining, login=payer)
+        API_UNITS_SPENT.inc(balance.spent, login=payer)
+        return balance
+
+    def balance(self, login: str) -> Optional[UnitsBalance]:
+        """Актуальный остаток баллов, с которых оплачиваются запросы аккаунта, или None"""
+        balance = self._balances.get(self._payers.get(login, login))
+        if balance is None or time.monotonic() - balance.updated_at > self.balance_ttl:
+            return None
+        return balance
+
+    def is_low(self, login: str) -> bool:
+        """Остаток баллов аккаунта ниже резерва интерактивных отчетов"""
+        balance = self.balance(login)
+        return balance is not None and balance.fraction_left < self.reserve_fraction
+
+    def reset(self) -> None:
+        self._balances.clear()
+        self._payers.clear()
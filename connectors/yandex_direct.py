@@ -1,18 +1,154 @@
 import uuid
+import time
 import asyncio
+import logging
+import math
+from functools import partial
+from typing import Optional, Tuple
+
 import aiohttp
-from models.yandex_direct import YandexDirectBudget, YandexDirectStatistics
+from multidict import CIMultiDictProxy
+
+from connectors.exceptions import (
+    YandexDirectError, YandexDirectNetworkError, YandexDirectResponseError, error_from_response,
+)
+from connectors.circuit_breaker import CircuitBreaker
+from connectors.rate_limiter import RateLimiter
+from enums.priorities import RequestPriority
+from connectors.retry import RetryPolicy
+from connectors.units import UnitsTracker
+from services.deadline import time_left
+from services.serializers import json_dumps, json_loads
+from services.metrics import API_REQUEST_SECONDS, API_OFFLINE_WAIT_SECONDS, API_ROWS_PARSED
+from services.tracing import traced, current_span
+from models.yandex_direct import StatisticsRow, YandexDirectBudget, parse_statistics_tsv
+from settings.yandex_direct import (
+    MAX_CONCURRENT_REQUESTS, MAX_REQUESTS_PER_WINDOW, REQUESTS_WINDOW_SECONDS,
+    REQUEST_PRIORITY_WEIGHTS, INTERACTIVE_RESERVED_REQUESTS,
+    YANDEX_DIRECT_BUDGETS_URL, YANDEX_DIRECT_REPORTS_URL,
+    API_CONNECT_TIMEOUT_SECONDS, API_READ_TIMEOUT_SECONDS, OFFLINE_REPORT_MAX_WAIT_SECONDS,
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD, CIRCUIT_BREAKER_COOLDOWN_SECONDS,
+    UNITS_BACKGROUND_RESERVE_FRACTION, UNITS_BALANCE_TTL_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Общий для всего процесса лимит запросов к API Яндекс.Директ
+RATE_LIMITER = RateLimiter(
+    max_concurrent=MAX_CONCURRENT_REQUESTS,
+    max_requests=MAX_REQUESTS_PER_WINDOW,
+    window_seconds=REQUESTS_WINDOW_SECONDS,
+    weights={RequestPriority(name): weight for name, weight in REQUEST_PRIORITY_WEIGHTS.items()},
+    reserved_interactive=INTERACTIVE_RESERVED_REQUESTS,
+)
+
+# Общий для процесса учет аккаунтов с ошибками авторизации (ключ - логин)
+CIRCUIT_BREAKER = CircuitBreaker(
+    failure_threshold=CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    cooldown_seconds=CIRCUIT_BREAKER_COOLDOWN_SECONDS,
+)
+
+# Общий для процесса учет остатка баллов API по заголовкам ответов
+UNITS_TRACKER = UnitsTracker(
+    reserve_fraction=UNITS_BACKGROUND_RESERVE_FRACTION,
+    balance_ttl=UNITS_BALANCE_TTL_SECONDS,
+)
 
 
 class YandexDirectAPI:
     SLEEP_TIME = 2
+    # Адреса API задаются в настройках; бенчмарки подменяют их адресом локального сервера
+    BUDGETS_URL = YANDEX_DIRECT_BUDGETS_URL
+    REPORTS_URL = YANDEX_DIRECT_REPORTS_URL
+    # Максимальное число строк отчета в одном ответе (Page.Limit)
+    PAGE_LIMIT = 50000
+    # Таймауты одного запроса: без них зависшее соединение задерживает весь отчет
+    TIMEOUT = aiohttp.ClientTimeout(sock_connect=API_CONNECT_TIMEOUT_SECONDS, sock_read=API_READ_TIMEOUT_SECONDS)
+    # Максимальное время ожидания офлайн-отчета
+    OFFLINE_MAX_WAIT = OFFLINE_REPORT_MAX_WAIT_SECONDS
+    # Повтор отдельных запросов при временных ошибках: одна ошибка сети не должна проваливать весь аккаунт
+    RETRY = RetryPolicy()
 
-    def __init__(self, login: str, token: str):
+    def __init__(self, login: str, token: str, timeout: aiohttp.ClientTimeout = None,
+                 retry_policy: RetryPolicy = None, rate_limiter: RateLimiter = None):
+        """
+        :param login: Логин аккаунта
+        :param token: OAuth-токен
+        :param timeout: Таймауты запросов (по умолчанию - TIMEOUT)
+        :param retry_policy: Повтор запросов при временных ошибках (по умолчанию - RETRY)
+        :param rate_limiter: Лимит запросов, в котором выполняется каждый HTTP-запрос (по умолчанию - RATE_LIMITER)
+        """
         self._login = login
         self._token = token
+        self._timeout = timeout or self.TIMEOUT
+        self._retry = retry_policy or self.RETRY
+        self._rate_limiter = rate_limiter or RATE_LIMITER
+
+    @property
+    def login(self) -> str:
+        return self._login
+
+    @staticmethod
+    async def _send(session: aiohttp.ClientSession, url: str, description: str, payload: dict,
+                    headers: dict) -> Tuple[int, CIMultiDictProxy, str]:
+        """
+        Выполняет один POST-запрос к API.
+
+        :param description: Начало текста ошибки ("Ошибка при получении ...")
+        :return: Статус (200, 201 или 202), заголовки и текст ответа
+        :raises YandexDirectError: Ошибка соединения или ответ с другим статусом (тип - по статусу и коду ошибки)
+        """
+        try:
+            async with session.post(url, json=payload, headers=headers) as response:
+                text = await response.text()
+                if response.status in (200, 201, 202):
+                    return response.status, response.headers, text
+                status = response.status
+                retry_after = response.headers.get("Retry-After")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise YandexDirectNetworkError(f"{description}. Ошибка соединения: {e!r}") from e
+        raise error_from_response(
+            f"{description}. Статус: {status}. Ответ сервера: {text}",
+            status=status,
+            error_code=_reports_error_code(text),
+            retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None,
+        )
 
+    async def _limited_send(self, session: aiohttp.ClientSession, url: str, description: str, payload: dict,
+                            headers: dict) -> Tuple[int, CIMultiDictProxy, str]:
+        """
+        Выполняет _send в общем лимите запросов. Место в лимите занимает каждая попытка, в том числе повтор
+        после 429 и опрос офлайн-отчета, и освобождается до паузы: ожидающий запрос не держит место
+        среди одновременных.
+        """
+        return await self._rate_limiter.run(self._send, session, url, description, payload, headers)
+
+    async def _call_v4(self, session: aiohttp.ClientSession, url: str, payload: dict, headers: dict) -> dict:
+        """
+        Запрос к API v4 Live с повтором при временных ошибках. API v4 сообщает об ошибках в теле ответа
+        со статусом 200: ответ с повторяемым кодом ошибки повторяется, с остальными - возвращается вызывающему.
+        """
+        description = "Ошибка при получении бюджетов"
+
+        async def request() -> dict:
+            status, response_headers, text = await self._limited_send(session, url, description, payload, headers)
+            UNITS_TRACKER.record(self._login, response_headers)
+            try:
+                data = json_loads(text)
+            except ValueError:
+                raise YandexDirectResponseError(f"{description}. Ответ сервера не в JSON: {text[:500]}", status=status)
+            if "error_code" in data:
+                error = _v4_error(description, data)
+                if error.retryable:
+                    raise error
+            return data
+
+        return await self._retry.run(request, "budgets")
+
+    @traced("api.get_budgets")
     async def get_budgets(self, include_vat: bool) -> YandexDirectBudget:
-        url = "https://api.direct.yandex.ru/live/v4/json/"
+        current_span().set(login=self._login)
+        url = self.BUDGETS_URL
         payload = {
             "method": "AccountManagement",
             "token": self._token,
@@ -21,26 +157,15 @@ class YandexDirectAPI:
         }
         headers = {"Content-Type": "application/json"}
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=payload, headers=headers) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    
-                    
-                    raise Exception(
-                        f"Ошибка при получении бюджетов. Статус: {response.status}. Ответ сервера: {error_text}"
-                    )
-                data = await response.json()
+        with API_REQUEST_SECONDS.time(endpoint="budgets"):
+            async with aiohttp.ClientSession(timeout=self._timeout, json_serialize=json_dumps) as session:
+                data = await self._call_v4(session, url, payload, headers)
                 # Если API требует указания SelectionCriteria – добавляем его и повторяем запрос
                 if data.get("error_detail") == "Поле SelectionCriteria должно быть указано" or (data.get("data", {}).get("Accounts", [{}])[0].get("Login") != self._login):
                     payload["param"]["SelectionCriteria"] = {"Logins": [self._login]}
-                    async with session.post(url, json=payload, headers=headers) as response:
-                        if response.status != 200:
-                            error_text = await response.text()
-                            raise Exception(
-                                f"Ошибка при получении бюджетов. Статус: {response.status}. Ответ сервера: {error_text}"
-                            )
-                        data = await response.json()
+                    data = await self._call_v4(session, url, payload, headers)
+        if "error_code" in data:
+            raise _v4_error("Ошибка при получении бюджетов", data)
 
         try:
             budget_value = float(data["data"]["Accounts"][0]["Amount"])
@@ -52,6 +177,7 @@ class YandexDirectAPI:
             budget_value = round(budget_value * 1.2, 2)
         return YandexDirectBudget(budget=budget_value)
 
+    @traced("api.get_statistics")
     async def get_statistics(
         self,
         date_from: str,
@@ -61,8 +187,9 @@ class YandexDirectAPI:
         field_names: list[str],
         report_type: str,
         include_vat: bool,
-    ) -> list[YandexDirectStatistics]:
-        url = "https://api.direct.yandex.com/json/v5/reports"
+    ) -> list[StatisticsRow]:
+        current_span().set(login=self._login, field=field_names[0])
+        url = self.REPORTS_URL
         headers = {
             "Accept-Language": "ru",
             "processingMode": "auto",
@@ -75,10 +202,13 @@ class YandexDirectAPI:
         }
         offset = 0
         all_data = []
-        chunk_size = 50000
+        chunk_size = self.PAGE_LIMIT
         report_name = str(uuid.uuid4())
+        # Время начала ожидания офлайн-отчета (ответы 201/202)
+        offline_started = None
+        offline_waits = 0
 
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(timeout=self._timeout, json_serialize=json_dumps) as session:
             while True:
                 payload = {
                     "params": {
@@ -94,34 +224,70 @@ class YandexDirectAPI:
                         "IncludeVAT": "YES" if include_vat else "NO",
                     }
                 }
-                async with session.post(url, json=payload, headers=headers) as response:
-                    if response.status == 200:
-                        text = await response.text()
-                        data_chunk = self._parse_tsv(text)
-                        processed_chunk = [YandexDirectStatistics(**row) for row in data_chunk]
-                        all_data.extend(processed_chunk)
-                        if len(data_chunk) < chunk_size:
-                            break
-                        offset += chunk_size
-                        report_name = str(uuid.uuid4())
-                    elif response.status in [201, 202]:
-                        print(f"Данные еще не готовы. Жду {self.SLEEP_TIME} секунд.")
-                        await asyncio.sleep(self.SLEEP_TIME)
-                    else:
-                        error_text = await response.text()
-                        raise Exception(
-                            f"Ошибка при получении статистики. Статус: {response.status}. Ответ сервера: {error_text}"
+                request_started = time.perf_counter()
+                # Повторяется только текущий запрос: уже полученные страницы и ожидание офлайн-отчета сохраняются
+                status, response_headers, text = await self._retry.run(
+                    partial(self._limited_send, session, url, "Ошибка при получении статистики", payload, headers), "reports"
+                )
+                API_REQUEST_SECONDS.observe(time.perf_counter() - request_started, endpoint="reports")
+                UNITS_TRACKER.record(self._login, response_headers)
+                if status == 200:
+                    if offline_started is not None:
+                        API_OFFLINE_WAIT_SECONDS.observe(time.perf_counter() - offline_started)
+                        offline_started = None
+                    processed_chunk = parse_statistics_tsv(text)
+                    API_ROWS_PARSED.inc(len(processed_chunk))
+                    all_data.extend(processed_chunk)
+                    if len(processed_chunk) < chunk_size:
+                        break
+                    offset += chunk_size
+                    report_name = str(uuid.uuid4())
+                else:
+                    if offline_started is None:
+                        offline_started = request_started
+                    elif time.perf_counter() - offline_started > self.OFFLINE_MAX_WAIT:
+                        raise asyncio.TimeoutError(
+                            f"Отчет не сформирован за {self.OFFLINE_MAX_WAIT:g} секунд"
                         )
+                    offline_waits += 1
+                    # API сообщает рекомендуемую паузу перед повторным запросом в заголовке retryIn
+                    retry_in = _retry_in(response_headers, self.SLEEP_TIME)
+                    logger.info(f"Данные еще не готовы. Жду {retry_in:g} секунд.")
+                    await asyncio.sleep(retry_in)
+        current_span().set(rows=len(all_data), offline_waits=offline_waits)
         return all_data
 
-    @staticmethod
-    def _parse_tsv(tsv_data: str) -> list[dict]:
-        lines = tsv_data.strip().split("\n")
-        if not lines:
-            return []
-        headers = lines[0].split("\t")
-        result = []
-        for line in lines[1:]:
-            values = line.split("\t")
-            result.append(dict(zip(headers, values)))
-        return result
+
+def _v4_error(description: str, data: dict) -> YandexDirectError:
+    """Исключение по ответу API v4 с кодом ошибки"""
+    code = data.get("error_code")
+    return error_from_response(
+        f"{description}. Код ошибки: {code}. {data.get('error_str', '')}: {data.get('error_detail', '')}",
+        error_code=int(code) if str(code).isdigit() else None,
+    )
+
+
+def _retry_in(headers, default: float) -> float:
+    """
+    Пауза перед повторным запросом офлайн-отчета из заголовка retryIn. Пустое или некорректное значение
+    заменяется default, пауза не выходит за срок готовности отчета
+    """
+    try:
+        retry_in = float(headers.get("retryIn", default))
+    except (TypeError, ValueError):
+        retry_in = default
+    if not math.isfinite(retry_in) or retry_in < 0:
+        retry_in = default
+    remaining = time_left()
+    if remaining is not None:
+        retry_in = min(retry_in, remaining)
+    return retry_in
+
+
+def _reports_error_code(text: str) -> Optional[int]:
+    """Код ошибки из ответа API v5 ({"error": {"error_code": "..."}}) или None"""
+    try:
+        code = json_loads(text)["error"]["error_code"]
+        return int(code)
+    except (ValueError, KeyError, TypeError):
+        return None
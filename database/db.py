@@ -1,7 +1,7 @@
 import asyncio
-import json
 import aiosqlite
 from enums.sources import Source
+from services.serializers import json_dumps, json_loads
 
 DB_PATH = "accounts.db"
 
@@ -47,7 +47,7 @@ async def add_account(
             f"Неподдерживаемый источник: {source}. Доступные источники: {[s.value for s in Source]}"
         )
 
-    auth_json = json.dumps(auth)
+    auth_json = json_dumps(auth)
     async with aiosqlite.connect(db_path) as db:
         await db.execute(
             "INSERT INTO accounts (source, auth, account_name) VALUES (?, ?, ?)",
@@ -67,7 +67,7 @@ async def get_all_accounts(db_path: str = DB_PATH) -> list[dict]:
             accounts = []
             for row in rows:
                 account = dict(row)
-                account["auth"] = json.loads(account["auth"])
+                account["auth"] = json_loads(account["auth"])
                 accounts.append(account)
             return accounts
 
@@ -94,7 +94,7 @@ async def update_account(
         values.append(source)
     if auth is not None:
         fields.append("auth = ?")
-        values.append(json.dumps(auth))
+        values.append(json_dumps(auth))
     if account_name is not None:
         fields.append("account_name = ?")
         values.append(account_name)
@@ -139,5 +139,5 @@ async def get_account_by_id(account_id: int, db_path: str = DB_PATH) -> dict | N
             if row is None:
                 return None
             account = dict(row)
-            account["auth"] = json.loads(account["auth"])
+            account["auth"] = json_loads(account["auth"])
             return account
@@ -0,0 +1,94 @@
+import aiosqlite
+from database.db import DB_PATH
+
+
+async def init_history_tables(db_path: str = DB_PATH) -> None:
+    """
+    Создаёт таблицы для хранения исторической статистики, если они ещё не существуют.
+    Таблицы:
+      - statistics_daily: статистика аккаунта за день
+      - backfill_checkpoints: последняя загруженная дата для каждого аккаунта
+    """
+    async with aiosqlite.connect(db_path) as db:
+        await db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS statistics_daily (
+                account_id INTEGER NOT NULL,
+                date TEXT NOT NULL,
+                impressions INTEGER NOT NULL DEFAULT 0,
+                clicks INTEGER NOT NULL DEFAULT 0,
+                cost REAL NOT NULL DEFAULT 0,
+                conversions INTEGER NOT NULL DEFAULT 0,
+                sessions INTEGER NOT NULL DEFAULT 0,
+                bounces INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (account_id, date)
+            );
+        """
+        )
+        await db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS backfill_checkpoints (
+                account_id INTEGER PRIMARY KEY,
+                last_date TEXT NOT NULL
+            );
+        """
+        )
+        await db.commit()
+
+
+async def save_daily_statistics(account_id: int, rows: list[dict], db_path: str = DB_PATH) -> None:
+    """
+    Сохраняет дневную статистику аккаунта. Существующие записи за те же даты перезаписываются.
+
+    :param account_id: Идентификатор аккаунта
+    :param rows: Список словарей с полями Date, Impressions, Clicks, Cost, Conversions, Sessions, Bounces
+    """
+    if not rows:
+        return
+    values = [
+        (
+            account_id,
+            row["Date"],
+            row.get("Impressions", 0),
+            row.get("Clicks", 0),
+            row.get("Cost", 0.0),
+            row.get("Conversions", 0),
+            row.get("Sessions", 0),
+            row.get("Bounces", 0),
+        )
+        for row in rows
+    ]
+    async with aiosqlite.connect(db_path) as db:
+        await db.executemany(
+            """
+            INSERT OR REPLACE INTO statistics_daily
+                (account_id, date, impressions, clicks, cost, conversions, sessions, bounces)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            values,
+        )
+        await db.commit()
+
+
+async def get_backfill_checkpoint(account_id: int, db_path: str = DB_PATH) -> str | None:
+    """
+    Возвращает последнюю полностью загруженную дату аккаунта в формате YYYY-MM-DD или None.
+    """
+    async with aiosqlite.connect(db_path) as db:
+        async with db.execute(
+            "SELECT last_date FROM backfill_checkpoints WHERE account_id = ?", (account_id,)
+        ) as cursor:
+            row = await cursor.fetchone()
+            return row[0] if row else None
+
+
+async def set_backfill_checkpoint(account_id: int, last_date: str, db_path: str = DB_PATH) -> None:
+    """
+    Сохраняет последнюю полностью загруженную дату аккаунта.
+    """
+    async with aiosqlite.connect(db_path) as db:
+        await db.execute(
+            "INSERT OR REPLACE INTO backfill_checkpoints (account_id, last_date) VALUES (?, ?)",
+            (account_id, last_date),
+        )
+        await db.commit()
@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class RequestPriority(Enum):
+    INTERACTIVE = "interactive"  # Отчеты по кнопкам пользователей
+    SCHEDULED = "scheduled"      # Задачи по расписанию
+    BULK = "bulk"                # Массовая фоновая загрузка (бэкфилл)
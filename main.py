@@ -1,11 +1,23 @@
 import asyncio
 import logging
+import time
 from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
 from aiogram.fsm.storage.memory import MemoryStorage
 from dotenv import load_dotenv
 import os
-from bot.handlers import router, set_commands
+from functools import partial
+from bot.handlers import router, set_commands, notify_account_circuit_open
+from bot.sender import message_sender
+from connectors.yandex_direct import CIRCUIT_BREAKER
 from database.db import init_db
+from modules.report_builder_factory import ReportBuilderFactory
+from services.cpu_executor import CPU_EXECUTOR
+from services.loop_monitor import loop_lag_monitor
+from services.metrics_server import start_metrics_server
+from services.runtime_profile import apply_runtime_profile
+from services.serializers import json_dumps, json_loads
+from settings.runtime import METRICS_ENABLED, METRICS_HOST, METRICS_PORT, PRELOAD_REPORT_MODULES
 
 load_dotenv('.env.local')
 BOT_TOKEN = os.getenv('BOT_TOKEN')
@@ -13,12 +25,26 @@ BOT_TOKEN = os.getenv('BOT_TOKEN')
 logging.basicConfig(level=logging.INFO)
 
 # Создаем объекты бота и диспетчера
-bot = Bot(token=BOT_TOKEN)
+# Запросы и ответы Telegram кодируются реализацией JSON профиля выполнения (см. apply_runtime_profile)
+bot = Bot(token=BOT_TOKEN, session=AiohttpSession(json_loads=json_loads, json_dumps=json_dumps))
 dp = Dispatcher(storage=MemoryStorage())
 
 # Регистрируем роутер с хендлерами
 dp.include_router(router)
 
+# Администраторы получают уведомление, когда аккаунт начинает пропускаться из-за ошибок авторизации
+CIRCUIT_BREAKER.add_listener(partial(notify_account_circuit_open, bot))
+
+
+async def preload_report_modules():
+    """Загружает модули построителей отчетов (pandas, numpy) в фоновом потоке, пока бот уже отвечает на команды"""
+    started = time.perf_counter()
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, ReportBuilderFactory.preload)
+    except Exception:
+        logging.exception("Не удалось заранее загрузить модули отчетов")
+        return
+    logging.info(f"Модули отчетов загружены за {time.perf_counter() - started:.2f} с")
 
 
 async def main():
@@ -35,8 +61,27 @@ async def main():
 
     # Запускаем бота
     logging.info("Бот запущен")
-    await dp.start_polling(bot)
+    loop_lag_monitor.start()
+    preload_task = asyncio.create_task(preload_report_modules()) if PRELOAD_REPORT_MODULES else None
+    metrics_runner = None
+    try:
+        if METRICS_ENABLED:
+            try:
+                metrics_runner = await start_metrics_server(METRICS_HOST, METRICS_PORT)
+            except OSError as e:
+                # Порт занят или недоступен: бот работает без эндпоинта метрик
+                logging.error(f"Не удалось запустить эндпоинт метрик на {METRICS_HOST}:{METRICS_PORT}: {e}")
+        await dp.start_polling(bot)
+    finally:
+        if preload_task is not None:
+            await preload_task
+        await message_sender.stop()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        await loop_lag_monitor.stop()
+        CPU_EXECUTOR.shutdown()
 
 
 if __name__ == "__main__":
+    apply_runtime_profile()
     asyncio.run(main())
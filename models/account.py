@@ -1,4 +1,4 @@
-from typing import List, Union
+from typing import List, Optional, Union
 from pydantic import BaseModel, Field
 
 class YandexDirectAuth(BaseModel):
@@ -10,6 +10,7 @@ class VkAuth(BaseModel):
     access_token: str
 
 class Account(BaseModel):
+    id: Optional[int] = None
     account_name: str
     source: str
     auth: Union[YandexDirectAuth, VkAuth, dict]
@@ -0,0 +1,54 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class ReportPage(str):
+    """
+    Текст страницы детального отчета с данными для навигации.
+    Является строкой, поэтому страницу можно отправлять и обрабатывать как обычный текст отчета.
+    Сводный отчет также возвращается как ReportPage: report_id позволяет выгрузить его файлом,
+    export_format - формат файла, который нужно отправить сразу вместе с текстом.
+    """
+    report_id: Optional[str]
+    dimension: Optional[str]
+    sort_by: Optional[str]
+    page: int
+    pages: int
+    export_format: Optional[str]
+
+    def __new__(
+        cls,
+        text: str,
+        report_id: Optional[str] = None,
+        dimension: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        page: int = 0,
+        pages: int = 1,
+        export_format: Optional[str] = None,
+    ):
+        obj = super().__new__(cls, text)
+        obj.report_id = report_id
+        obj.dimension = dimension
+        obj.sort_by = sort_by
+        obj.page = page
+        obj.pages = pages
+        obj.export_format = export_format
+        return obj
+
+
+class ReportFile(BaseModel):
+    """Отчет, выгруженный в файл в памяти"""
+    filename: str
+    content: bytes
+
+
+class ReportChart(BaseModel):
+    """
+    График отчета. Если график уже загружен в Telegram, заполнен file_id и повторная отрисовка не нужна,
+    иначе content содержит PNG-изображение.
+    """
+    key: str
+    caption: str
+    file_id: Optional[str] = None
+    content: Optional[bytes] = None
@@ -1,3 +1,6 @@
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
 from pydantic import BaseModel, Field, model_validator
 
 
@@ -10,7 +13,20 @@ class YandexDirectAccount(BaseModel):
 class YandexDirectBudget(BaseModel):
     budget: float = Field(..., description="Бюджет аккаунта в рублях", example=10000.50)
 
-from pydantic import BaseModel, Field, model_validator
+
+# Поля строки статистики в порядке модели: параметры группировки и метрики
+DIMENSION_FIELDS = ("CampaignName", "Age", "Gender", "Device", "Date")
+STATISTICS_FIELDS = (*DIMENSION_FIELDS, "Impressions", "Clicks", "Cost", "Conversions", "Sessions", "Bounces")
+_INT_FIELDS = ("Impressions", "Clicks", "Sessions", "Bounces")
+
+
+def _number(value, kind: type):
+    """
+    Приводит значение метрики к числу. Пустые значения и "--" (нет данных) считаются нулем.
+    Общее правило для YandexDirectStatistics и parse_statistics_tsv
+    """
+    return kind(value) if value and value != "--" else kind(0)
+
 
 class YandexDirectStatistics(BaseModel):
     CampaignName: str | None = None
@@ -30,15 +46,13 @@ class YandexDirectStatistics(BaseModel):
         values = values.copy()
 
         # Преобразуем числовые поля, если они заданы корректно
-        values["Impressions"] = int(values["Impressions"]) if values.get("Impressions") and values["Impressions"] != "--" else 0
-        values["Clicks"] = int(values["Clicks"]) if values.get("Clicks") and values["Clicks"] != "--" else 0
-        values["Cost"] = float(values["Cost"]) if values.get("Cost") and values["Cost"] != "--" else 0.0
-        values["Sessions"] = int(values["Sessions"]) if values.get("Sessions") and values["Sessions"] != "--" else 0
-        values["Bounces"] = int(values["Bounces"]) if values.get("Bounces") and values["Bounces"] != "--" else 0
+        for name in _INT_FIELDS:
+            values[name] = _number(values.get(name), int)
+        values["Cost"] = _number(values.get("Cost"), float)
 
         # Суммируем значения конверсий из полей с префиксом 'Conversions_'
         total_conversions = sum(
-            int(v) if v != "--" else 0
+            _number(v, int)
             for k, v in values.items() if k.startswith("Conversions_")
         )
         # Удаляем отдельные поля конверсий
@@ -46,3 +60,80 @@ class YandexDirectStatistics(BaseModel):
         values["Conversions"] = total_conversions
 
         return values
+
+    def as_dict(self, include: Optional[Iterable[str]] = None) -> dict:
+        return self.model_dump(include=set(include) if include is not None else None)
+
+
+
+@dataclass(slots=True)
+class StatisticsRow:
+    """
+    Строка статистики отчета, которую коннектор передает построителю отчетов.
+
+    Те же поля и значения, что у YandexDirectStatistics, но без словаря атрибутов и служебных данных pydantic:
+    в отчете Date x CampaignName сотни тысяч строк, и на каждой экономятся сотни байт.
+    Строки создаются из TSV функцией parse_statistics_tsv.
+    """
+    CampaignName: Optional[str] = None
+    Age: Optional[str] = None
+    Gender: Optional[str] = None
+    Device: Optional[str] = None
+    Date: Optional[str] = None
+    Impressions: int = 0
+    Clicks: int = 0
+    Cost: float = 0.0
+    Conversions: int = 0
+    Sessions: int = 0
+    Bounces: int = 0
+
+    def as_dict(self, include: Optional[Iterable[str]] = None) -> dict:
+        """Значения полей словарем (как model_dump): все поля или только include"""
+        if include is None:
+            return {name: getattr(self, name) for name in STATISTICS_FIELDS}
+        include = set(include)
+        return {name: getattr(self, name) for name in STATISTICS_FIELDS if name in include}
+
+
+def parse_statistics_tsv(tsv_data: str) -> List[StatisticsRow]:
+    """
+    Разбирает отчет в TSV (первая строка - заголовок) сразу в StatisticsRow, без словаря на каждую строку.
+    Значения приводятся тем же _number, что и в YandexDirectStatistics: колонки Conversions_<цель>_<модель> суммируются
+    в Conversions, неизвестные колонки пропускаются.
+    """
+    lines = tsv_data.strip().split("\n")
+    headers = lines[0].split("\t")
+    # Позиции колонок определяются один раз на страницу отчета
+    text_columns = [(i, name) for i, name in enumerate(headers) if name in DIMENSION_FIELDS]
+    int_columns = [(i, name) for i, name in enumerate(headers) if name in _INT_FIELDS]
+    cost_columns = [i for i, name in enumerate(headers) if name == "Cost"]
+    conversion_columns = [i for i, name in enumerate(headers) if name.startswith("Conversions_")]
+
+    rows = []
+    for line in lines[1:]:
+        values = line.split("\t")
+        if len(values) < len(headers):
+            values.extend([None] * (len(headers) - len(values)))
+        row = StatisticsRow()
+        for i, name in text_columns:
+            setattr(row, name, values[i])
+        for i, name in int_columns:
+            setattr(row, name, _number(values[i], int))
+        for i in cost_columns:
+            row.Cost = _number(values[i], float)
+        row.Conversions = sum(_number(values[i], int) for i in conversion_columns)
+        rows.append(row)
+    return rows
+
+
+def statistics_columns(stats: Iterable) -> dict:
+    """
+    Строки статистики (StatisticsRow или YandexDirectStatistics) в виде столбцов {поле: [значения]}
+    для pandas.DataFrame - без промежуточного словаря на каждую строку.
+    """
+    columns = {name: [] for name in STATISTICS_FIELDS}
+    appends = [(name, columns[name].append) for name in STATISTICS_FIELDS]
+    for stat in stats:
+        for name, append in appends:
+            append(getattr(stat, name))
+    return columns
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 
 
@@ -10,8 +10,12 @@ class BaseReportBuilder(ABC):
         pass
 
     @abstractmethod
-    async def fetch_summary_statistics(self, accounts: List[Dict[str, Any]], date_from: str, date_to: str) -> str:
-        """Получает агрегированную статистику по всем аккаунтам за указанный период."""
+    async def fetch_summary_statistics(self, accounts: List[Dict[str, Any]], date_from: str, date_to: str,
+                                       progress: Optional[Any] = None) -> str:
+        """
+        Получает агрегированную статистику по всем аккаунтам за указанный период.
+        progress (ProgressReporter) получает промежуточный отчет по мере готовности аккаунтов.
+        """
         pass
 
     @abstractmethod
@@ -19,3 +23,20 @@ class BaseReportBuilder(ABC):
         """Получает детальную статистику по каждому аккаунту за указанный период."""
         pass
 
+    @abstractmethod
+    async def fetch_daily_statistics(self, account: Any, date_from: str, date_to: str) -> List[Any]:
+        """Получает статистику аккаунта с разбивкой по дням за указанный период (для бэкфилла)."""
+        pass
+
+    def render_detailed_page(self, report_id: str, dimension: str, sort_by: Optional[str] = None,
+                             page: int = 0) -> Optional[str]:
+        """Отрисовывает страницу ранее рассчитанного детального отчета. None - если отчет устарел."""
+        return None
+
+    def export_report(self, report_id: str, export_format: str) -> Optional[Any]:
+        """Выгружает ранее рассчитанный отчет в файл (ReportFile). None - если отчет устарел."""
+        return None
+
+    async def render_charts(self, report_id: str) -> Optional[List[Any]]:
+        """Строит графики (ReportChart) ранее рассчитанного детального отчета. None - если отчет устарел."""
+        return None
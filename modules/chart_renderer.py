@@ -0,0 +1,78 @@
+import asyncio
+import importlib.util
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import List, Sequence, Tuple
+
+from settings.yandex_direct import CHART_WORKERS
+
+# Графики строятся, только если установлен matplotlib. Сам пакет импортируется при первой отрисовке,
+# чтобы не замедлять запуск бота
+CHARTS_AVAILABLE = importlib.util.find_spec("matplotlib") is not None
+
+# Отдельный пул потоков, чтобы отрисовка не блокировала цикл событий
+CHART_EXECUTOR = ThreadPoolExecutor(max_workers=CHART_WORKERS, thread_name_prefix="charts")
+
+PRIMARY_COLOR = "#1f77b4"
+SECONDARY_COLOR = "#d62728"
+
+
+def render_chart(kind: str, title: str, labels: Sequence[str], primary: Tuple[str, Sequence[float]],
+                 secondary: Tuple[str, Sequence[float]]) -> bytes:
+    """
+    Отрисовывает график с двумя рядами на разных осях и возвращает PNG.
+
+    :param kind: Тип графика: line - линии (динамика по дням), bar - столбцы основного ряда и точки второго
+    :param title: Заголовок графика
+    :param labels: Подписи по оси X
+    :param primary: Название и значения основного ряда (левая ось)
+    :param secondary: Название и значения второго ряда (правая ось)
+    :return: Изображение в формате PNG
+    """
+    if not CHARTS_AVAILABLE:
+        raise RuntimeError("Для построения графиков установите пакет matplotlib")
+    # Используется объектный API matplotlib без pyplot: фигуры не разделяют глобальное состояние
+    # и могут отрисовываться в нескольких потоках
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=(8, 4.5), dpi=100)
+    ax = figure.add_subplot()
+    ax_secondary = ax.twinx()
+    positions = range(len(labels))
+
+    primary_name, primary_values = primary
+    secondary_name, secondary_values = secondary
+    if kind == "line":
+        ax.plot(positions, primary_values, color=PRIMARY_COLOR, marker="o", label=primary_name)
+    else:
+        ax.bar(positions, primary_values, color=PRIMARY_COLOR, label=primary_name)
+    ax_secondary.plot(
+        positions, secondary_values, color=SECONDARY_COLOR, marker="o",
+        linestyle="-" if kind == "line" else "none", label=secondary_name,
+    )
+
+    ax.set_title(title)
+    ax.set_ylabel(primary_name, color=PRIMARY_COLOR)
+    ax_secondary.set_ylabel(secondary_name, color=SECONDARY_COLOR)
+    ax.set_xticks(list(positions), labels, rotation=45 if len(labels) > 7 else 0, ha="right" if len(labels) > 7 else "center")
+    ax.grid(axis="y", alpha=0.3)
+    figure.tight_layout()
+
+    buffer = BytesIO()
+    figure.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+
+async def render_charts(charts: List[dict]) -> List[bytes]:
+    """
+    Отрисовывает графики параллельно в пуле потоков CHART_EXECUTOR.
+
+    :param charts: Аргументы render_chart для каждого графика
+    :return: PNG-изображения в том же порядке
+    """
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(*(
+        loop.run_in_executor(CHART_EXECUTOR, partial(render_chart, **chart))
+        for chart in charts
+    ))
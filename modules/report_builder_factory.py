@@ -1,16 +1,35 @@
+import importlib
+from typing import Dict, Type
+
 from modules.base_report_builder import BaseReportBuilder
-from modules.yandex_direct.yandex_direct_report_builder import YandexDirectReportBuilder
 from enums.sources import Source
 
 
 class ReportBuilderFactory:
+    # Построители задаются путем "модуль:класс" и импортируются при первом запросе отчета:
+    # модули построителей загружают pandas и numpy, которые не нужны для запуска бота и меню
     _builders = {
-        Source.YANDEX_DIRECT: YandexDirectReportBuilder,
+        Source.YANDEX_DIRECT: "modules.yandex_direct.yandex_direct_report_builder:YandexDirectReportBuilder",
     }
+    _loaded: Dict[Source, Type[BaseReportBuilder]] = {}
+
+    @classmethod
+    def get_builder_class(cls, source: Source) -> Type[BaseReportBuilder]:
+        builder_class = cls._loaded.get(source)
+        if builder_class is None:
+            path = cls._builders.get(source)
+            if not path:
+                raise ValueError(f"Неподдерживаемый источник данных: {source}")
+            module_name, class_name = path.split(":")
+            builder_class = cls._loaded[source] = getattr(importlib.import_module(module_name), class_name)
+        return builder_class
 
     @classmethod
     def get_builder(cls, source: Source) -> BaseReportBuilder:
-        builder_class = cls._builders.get(source)
-        if not builder_class:
-            raise ValueError(f"Неподдерживаемый источник данных: {source}")
-        return builder_class()
+        return cls.get_builder_class(source)()
+
+    @classmethod
+    def preload(cls) -> None:
+        """Импортирует все построители заранее, например в фоне после запуска бота"""
+        for source in cls._builders:
+            cls.get_builder_class(source)
@@ -0,0 +1,94 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from enums.sources import Source
+from settings.yandex_direct import DETAIL_REPORT_CACHE_TTL_SECONDS, DETAIL_REPORT_CACHE_MAX_SIZE, CHART_CACHE_MAX_SIZE
+
+
+@dataclass
+class CachedReport:
+    """Рассчитанные данные отчета, по которым страницы отрисовываются по запросу"""
+    source: Source
+    title: str
+    frames: Dict[str, Any] = field(default_factory=dict)
+    account_id: Optional[int] = None
+    date_from: Optional[str] = None
+    date_to: Optional[str] = None
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class ReportCache:
+    """
+    Хранит рассчитанные отчеты в памяти с ограничением по времени жизни и количеству.
+    При переполнении вытесняются давно не использованные отчеты.
+    Страницы и выгрузки читают кеш из потоков пула обработки, поэтому доступ защищен блокировкой.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._reports: "OrderedDict[str, CachedReport]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, report: CachedReport) -> str:
+        """Сохраняет отчет и возвращает его короткий идентификатор (помещается в callback_data)"""
+        report_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._reports[report_id] = report
+            while len(self._reports) > self.max_size:
+                self._reports.popitem(last=False)
+        return report_id
+
+    def get(self, report_id: str) -> Optional[CachedReport]:
+        """Возвращает отчет или None, если он не найден или устарел"""
+        with self._lock:
+            report = self._reports.get(report_id)
+            if report is None:
+                return None
+            if time.monotonic() - report.created_at > self.ttl_seconds:
+                del self._reports[report_id]
+                return None
+            self._reports.move_to_end(report_id)
+            return report
+
+
+class ChartCache:
+    """
+    Хранит file_id графиков, уже загруженных в Telegram, по ключу (аккаунт, период, параметр, хеш данных).
+    Повторный запрос с теми же данными отправляет график по file_id без отрисовки и загрузки.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._file_ids: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        """Возвращает file_id графика или None"""
+        with self._lock:
+            file_id = self._file_ids.get(key)
+            if file_id is not None:
+                self._file_ids.move_to_end(key)
+            return file_id
+
+    def put(self, key: str, file_id: str) -> None:
+        """Сохраняет file_id загруженного графика"""
+        with self._lock:
+            self._file_ids[key] = file_id
+            self._file_ids.move_to_end(key)
+            while len(self._file_ids) > self.max_size:
+                self._file_ids.popitem(last=False)
+
+
+# Общий кеш детальных отчетов процесса
+detailed_report_cache = ReportCache(
+    max_size=DETAIL_REPORT_CACHE_MAX_SIZE,
+    ttl_seconds=DETAIL_REPORT_CACHE_TTL_SECONDS,
+)
+
+# Общий кеш загруженных графиков процесса
+chart_cache = ChartCache(max_size=CHART_CACHE_MAX_SIZE)
@@ -0,0 +1,94 @@
+import html
+import logging
+import re
+from io import BytesIO
+from typing import Dict
+
+import pandas as pd
+
+from models.report import ReportFile
+from settings.report_settings import EXPORT_FORMATS
+
+try:
+    import openpyxl  # noqa: F401 - движок pandas для записи XLSX
+except ImportError:
+    openpyxl = None
+
+logger = logging.getLogger(__name__)
+
+# Ограничение Excel на длину названия листа
+XLSX_SHEET_NAME_LIMIT = 31
+
+
+def _safe_filename(title: str) -> str:
+    """Заменяет символы, недопустимые в имени файла"""
+    return re.sub(r'[\\/:*?"<>|\s]+', "_", title).strip("_") or "report"
+
+
+def _write_csv(sheets: Dict[str, pd.DataFrame], buffer: BytesIO) -> None:
+    """
+    Записывает листы в один CSV. Если листов несколько, они объединяются в одну таблицу:
+    название листа записывается в колонку "Раздел", значение параметра группировки - в колонку "Значение".
+    """
+    if len(sheets) == 1:
+        frame = next(iter(sheets.values()))
+    else:
+        frame = pd.concat(
+            [
+                df.rename(columns={df.columns[0]: "Значение"}).assign(Раздел=name)
+                for name, df in sheets.items()
+            ],
+            ignore_index=True,
+        )
+        frame = frame[["Раздел", *frame.columns.drop("Раздел")]]
+    # utf-8-sig и ";" - чтобы файл сразу открывался в русском Excel
+    frame.to_csv(buffer, index=False, sep=";", encoding="utf-8-sig")
+
+
+def _write_xlsx(sheets: Dict[str, pd.DataFrame], buffer: BytesIO) -> None:
+    """Записывает каждый лист на отдельный лист книги Excel"""
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        for name, df in sheets.items():
+            df.to_excel(writer, sheet_name=name[:XLSX_SHEET_NAME_LIMIT], index=False)
+
+
+def _write_html(sheets: Dict[str, pd.DataFrame], buffer: BytesIO, title: str) -> None:
+    """Записывает листы в HTML-страницу с таблицей на каждый лист"""
+    parts = [
+        "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">",
+        f"<title>{html.escape(title)}</title>",
+        "<style>body{font-family:sans-serif}table{border-collapse:collapse;margin-bottom:24px}"
+        "th,td{border:1px solid #ccc;padding:4px 8px;text-align:right}th{background:#f0f0f0}</style>",
+        f"</head><body><h1>{html.escape(title)}</h1>",
+    ]
+    for name, df in sheets.items():
+        parts.append(f"<h2>{html.escape(name)}</h2>")
+        parts.append(df.to_html(index=False, border=0, na_rep=""))
+    parts.append("</body></html>")
+    buffer.write("\n".join(parts).encode("utf-8"))
+
+
+def export_frames(sheets: Dict[str, pd.DataFrame], title: str, export_format: str) -> ReportFile:
+    """
+    Выгружает рассчитанные таблицы отчета в файл в памяти, без временных файлов на диске.
+
+    :param sheets: Таблицы отчета: название листа -> DataFrame
+    :param title: Название отчета, из него формируется имя файла
+    :param export_format: Формат файла из EXPORT_FORMATS (csv, xlsx, html)
+    :return: Имя и содержимое файла
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Неподдерживаемый формат выгрузки: {export_format}")
+    if export_format == "xlsx" and openpyxl is None:
+        logger.warning("Пакет openpyxl не установлен, отчет будет выгружен в CSV")
+        export_format = "csv"
+
+    buffer = BytesIO()
+    if export_format == "csv":
+        _write_csv(sheets, buffer)
+    elif export_format == "xlsx":
+        _write_xlsx(sheets, buffer)
+    else:
+        _write_html(sheets, buffer, title)
+
+    return ReportFile(filename=f"{_safe_filename(title)}.{export_format}", content=buffer.getvalue())
@@ -1,5 +1,6 @@
 from typing import List, Union
 from models.account import Account
+from services.deadline import DeadlineExceeded, LATE_TEXT
 from settings.yandex_direct import LOW_BUDGET_THRESHOLD
 
 class BudgetFormatter:
@@ -9,13 +10,15 @@ class BudgetFormatter:
         Форматирует отчет о бюджетах для Telegram.
         
         :param accounts: Список аккаунтов
-        :param budgets: Список бюджетов или ошибок
+        :param budgets: Список бюджетов или ошибок (DeadlineExceeded - бюджет не получен до срока готовности отчета)
         :return: Отформатированная строка для Telegram
         """
         result = []
         
         for account, budget in zip(accounts, budgets):
-            if isinstance(budget, Exception):
+            if isinstance(budget, DeadlineExceeded):
+                result.append(f"*{account.account_name}* - {LATE_TEXT}\n")
+            elif isinstance(budget, Exception):
                 error_text = str(budget).replace("_", "\\_").replace("*", "\\*").replace("`", "\\`").replace("[", "\\[").replace("]", "\\]")
                 result.append(f"*{account.account_name}* - ❌ `{error_text}`\n")
             else:
@@ -0,0 +1,168 @@
+"""
+Облегченный расчет статистики на чистом Python для небольших наборов данных.
+
+Повторяет результат pandas_stat_proccessor (те же поля, порядок строк, округление и отметки ⚠️/🔴),
+но без построения DataFrame: для отчета из нескольких строк накладные расходы pandas (создание таблицы,
+приведение типов, переименование полей) в сотни раз превышают сами вычисления.
+"""
+from modules.yandex_direct.stat_constants import COST_WARNING_THRESHOLD, RUSSIAN_NAMES
+from settings.yandex_direct import HIGH_BOUNCE_RATE_THRESHOLD
+
+INT_METRICS = ('Impressions', 'Clicks', 'Conversions', 'Sessions', 'Bounces')
+METRIC_COLUMNS = ['Impressions', 'Clicks', 'Cost', 'Conversions', 'Sessions', 'Bounces']
+DERIVED_COLUMNS = ['CTR', 'CPC', 'CR', 'CPA', 'BounceRate']
+
+
+def round2(value: float) -> float:
+    """
+    Округляет до двух знаков так же, как pandas/numpy round(2): умножение на 100, округление
+    к ближайшему четному и деление на 100. Встроенный round(value, 2) в пограничных случаях дает другой результат.
+    """
+    return round(value * 100) / 100
+
+
+class StatRecord:
+    """Суммы метрик одной строки отчета (строки исходных данных, группы или аккаунта)"""
+    __slots__ = ('fields', 'Impressions', 'Clicks', 'Cost', 'Conversions', 'Sessions', 'Bounces')
+
+    def __init__(self, fields: dict = None):
+        # Поля строки, не являющиеся метриками (параметр группировки и т.п.), в порядке вывода
+        self.fields = fields or {}
+        self.Impressions = 0
+        self.Clicks = 0
+        self.Cost = 0.0
+        self.Conversions = 0
+        self.Sessions = 0
+        self.Bounces = 0
+
+    def add(self, row: dict) -> None:
+        """Прибавляет метрики строки исходных данных. Пустые значения считаются нулем"""
+        self.Impressions += int(row.get('Impressions') or 0)
+        self.Clicks += int(row.get('Clicks') or 0)
+        self.Cost += float(row.get('Cost') or 0)
+        self.Conversions += int(row.get('Conversions') or 0)
+        self.Sessions += int(row.get('Sessions') or 0)
+        self.Bounces += int(row.get('Bounces') or 0)
+
+    def add_stat(self, stat) -> None:
+        """Прибавляет метрики строки статистики (StatisticsRow или YandexDirectStatistics) без преобразования в словарь"""
+        self.Impressions += stat.Impressions
+        self.Clicks += stat.Clicks
+        self.Cost += stat.Cost
+        self.Conversions += stat.Conversions
+        self.Sessions += stat.Sessions
+        self.Bounces += stat.Bounces
+
+    def add_record(self, other: "StatRecord") -> None:
+        self.Impressions += other.Impressions
+        self.Clicks += other.Clicks
+        self.Cost += other.Cost
+        self.Conversions += other.Conversions
+        self.Sessions += other.Sessions
+        self.Bounces += other.Bounces
+
+    def render(self, columns: list) -> dict:
+        """
+        Рассчитывает CTR, CPC, CR, CPA и процент отказов и форматирует строку так же, как render_statistics:
+        значения - строки, ⚠️ у расхода без конверсий, 🔴 у высокого процента отказов, поля на русском языке.
+
+        :param columns: Порядок полей: поля строки и метрики
+        """
+        cost = round2(self.Cost)
+        clicks = self.Clicks
+        bounce_rate = round2(self.Bounces / self.Sessions * 100) if self.Sessions > 0 else 0.0
+        values = {
+            'Impressions': str(self.Impressions),
+            'Clicks': str(clicks),
+            'Cost': str(cost),
+            'Conversions': str(self.Conversions),
+            'Sessions': str(self.Sessions),
+            'Bounces': str(self.Bounces),
+            'CTR': str(round2(clicks / self.Impressions * 100) if self.Impressions > 0 else 0.0),
+            'CPC': str(round2(cost / clicks) if clicks > 0 else 0.0),
+            'CR': str(round2(self.Conversions / clicks * 100) if clicks > 0 else 0.0),
+            'CPA': str(round2(cost / self.Conversions) if self.Conversions > 0 else 0.0),
+            'BounceRate': str(bounce_rate),
+        }
+        if cost > COST_WARNING_THRESHOLD and self.Conversions == 0:
+            values['Cost'] += ' ⚠️'
+        if bounce_rate > HIGH_BOUNCE_RATE_THRESHOLD:
+            values['BounceRate'] += ' 🔴'
+
+        result = {}
+        for column in columns:
+            value = values[column] if column in values else self.fields.get(column, 'nan')
+            result[RUSSIAN_NAMES.get(column, column)] = value
+        return result
+
+
+def _is_missing(value) -> bool:
+    return value is None or value != value
+
+
+def _columns(data: list[dict]) -> list:
+    """Поля в порядке первого появления, затем отсутствующие метрики и рассчитываемые показатели"""
+    columns = {}
+    for row in data:
+        for key in row:
+            columns[key] = None
+    for column in METRIC_COLUMNS:
+        columns[column] = None
+    return [*columns, *DERIVED_COLUMNS]
+
+
+def proccess_data(data: list[dict], group_by: str = None) -> list[dict]:
+    """
+    Рассчитывает и форматирует статистику без pandas. Результат совпадает с pandas_stat_proccessor.proccess_data.
+
+    Args:
+        data: Список словарей с данными
+        group_by: Поле для группировки. Если None или поля нет в данных - группировка не выполняется
+    """
+    if group_by and any(group_by in row for row in data):
+        groups: dict = {}
+        for row in data:
+            key = row.get(group_by)
+            # Как и groupby в pandas, строки без значения параметра не учитываются
+            if _is_missing(key):
+                continue
+            record = groups.get(key)
+            if record is None:
+                record = groups[key] = StatRecord({group_by: str(key)})
+            record.add(row)
+        columns = [group_by, *METRIC_COLUMNS, *DERIVED_COLUMNS]
+        return [groups[key].render(columns) for key in sorted(groups)]
+
+    columns = _columns(data)
+    result = []
+    for row in data:
+        record = StatRecord({key: 'None' if value is None else str(value) for key, value in row.items()})
+        record.add(row)
+        result.append(record.render(columns))
+    return result
+
+
+def proccess_accounts_data(data: list[dict], account_ids: list) -> tuple[list[dict], dict]:
+    """
+    Рассчитывает и форматирует статистику нескольких аккаунтов без pandas.
+    Результат совпадает с pandas_stat_proccessor.proccess_accounts_data.
+
+    Args:
+        data: Строки статистики всех аккаунтов с полем account_id
+        account_ids: Идентификаторы аккаунтов в порядке вывода. Аккаунты без строк получают нулевые показатели
+
+    Returns:
+        Кортеж из итогов по аккаунтам (в порядке account_ids) и общего итога по всем аккаунтам
+    """
+    accounts = {account_id: StatRecord() for account_id in account_ids}
+    for row in data:
+        record = accounts.get(row.get('account_id'))
+        if record is not None:
+            record.add(row)
+
+    total = StatRecord()
+    for record in accounts.values():
+        total.add_record(record)
+
+    columns = [*METRIC_COLUMNS, *DERIVED_COLUMNS]
+    return [accounts[account_id].render(columns) for account_id in account_ids], total.render(columns)
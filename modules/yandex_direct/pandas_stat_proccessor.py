@@ -1,8 +1,34 @@
+import hashlib
 import pandas as pd
 import numpy as np
-from settings.yandex_direct import HIGH_BOUNCE_RATE_THRESHOLD
+from modules.yandex_direct import lean_stat_processor
+from modules.yandex_direct.stat_constants import COST_WARNING_THRESHOLD, RUSSIAN_NAMES
+from settings.yandex_direct import HIGH_BOUNCE_RATE_THRESHOLD, LEAN_STATISTICS_MAX_ROWS
 
-COST_WARNING_THRESHOLD = 2500
+# Способы расчета proccess_data: pandas и облегченный расчет на чистом Python для небольших наборов данных
+BACKENDS = ('pandas', 'lean')
+
+# Типы суммируемых метрик
+METRIC_DTYPES = {
+    'Impressions': 'int64',
+    'Clicks': 'int64',
+    'Cost': 'float64',
+    'Conversions': 'int64',
+    'Sessions': 'int64',
+    'Bounces': 'int64'
+}
+METRIC_COLUMNS = list(METRIC_DTYPES)
+
+# Флаги проблемных показателей
+FLAG_COLUMNS = ['CostWarning', 'HighBounceRate']
+
+def _ensure_metric_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Добавляет отсутствующие метрики нулями и приводит метрики к числовым типам"""
+    for column in METRIC_COLUMNS:
+        if column not in df.columns:
+            df[column] = 0
+    df[METRIC_COLUMNS] = df[METRIC_COLUMNS].fillna(0)
+    return df.astype(METRIC_DTYPES)
 
 def _group_data(df: pd.DataFrame, group_by: str) -> pd.DataFrame:
     agg_dict = {
@@ -16,6 +42,9 @@ def _group_data(df: pd.DataFrame, group_by: str) -> pd.DataFrame:
     return df.groupby(group_by).agg(agg_dict).reset_index()
 
 def _calculate_metrics(df: pd.DataFrame) -> pd.DataFrame:
+    # Суммы расхода округляются до копеек, чтобы погрешность сложения float не попадала в отчет
+    # и результат не зависел от порядка суммирования (совпадал с lean_stat_processor)
+    df['Cost'] = df['Cost'].round(2)
     df['CTR'] = np.where(df['Impressions'] > 0, (df['Clicks'] / df['Impressions'] * 100).round(2), 0)
     df['CPC'] = np.where(df['Clicks'] > 0, (df['Cost'] / df['Clicks']).round(2), 0)
     df['CR']  = np.where(df['Clicks'] > 0, (df['Conversions'] / df['Clicks'] * 100).round(2), 0)
@@ -24,53 +53,161 @@ def _calculate_metrics(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 def _rename_columns_to_russian(df: pd.DataFrame) -> pd.DataFrame:
-    russian_names = {
-        'Impressions': 'Показы',
-        'Clicks': 'Клики',
-        'Cost': 'Расход',
-        'Conversions': 'Конверсии',
-        'Sessions': 'Сессии',
-        'Bounces': 'Отказы',
-        'BounceRate': 'Процент отказов',
-        'CampaignName': 'Название кампании',
-        'Age': 'Возраст',
-        'Gender': 'Пол',
-        'Device': 'Устройство',
-        'Date': 'Дата'
-    }
-    return df.rename(columns=russian_names)
-
-def _add_conditional_formatting(df: pd.DataFrame) -> pd.DataFrame:
-    """Добавляет условное форматирование для строк с высоким расходом без конверсий и высоким процентом отказов"""
-    # Форматирование для высокого расхода без конверсий
-    mask = (df['Cost'] > COST_WARNING_THRESHOLD) & (df['Conversions'] == 0)
-    df['Cost'] = df['Cost'].astype(str)
-    df.loc[mask, 'Cost'] = df.loc[mask, 'Cost'].apply(lambda x: f'{x} ⚠️')
-    
-    # Форматирование для высокого процента отказов
-    bounce_mask = df['BounceRate'] > HIGH_BOUNCE_RATE_THRESHOLD
-    df['BounceRate'] = df['BounceRate'].astype(str)
-    df.loc[bounce_mask, 'BounceRate'] = df.loc[bounce_mask, 'BounceRate'].apply(lambda x: f'{x} 🔴')
-    
+    return df.rename(columns=RUSSIAN_NAMES)
+
+def _add_flags(df: pd.DataFrame) -> pd.DataFrame:
+    """Добавляет флаги проблемных показателей: высокий расход без конверсий и высокий процент отказов"""
+    df['CostWarning'] = (df['Cost'] > COST_WARNING_THRESHOLD) & (df['Conversions'] == 0)
+    df['HighBounceRate'] = df['BounceRate'] > HIGH_BOUNCE_RATE_THRESHOLD
     return df
 
-def proccess_data(data: list[dict], group_by: str = None) -> list[dict]:
+def calculate_statistics(data: list[dict] | dict[str, list], group_by: str = None) -> pd.DataFrame:
     """
-    Добавляет в DataFrame новые столбцы с вычислением производных метрик.
-    Рассчитывает CTR, CPC, CR и CPA для каждой строки.
-    Переименовывает поля на русский язык.
-    Добавляет условное форматирование для проблемных показателей.
+    Рассчитывает статистику без форматирования.
+    Суммирует метрики (при необходимости с группировкой), рассчитывает CTR, CPC, CR, CPA и процент отказов,
+    добавляет булевы флаги CostWarning и HighBounceRate. Все метрики остаются числовыми,
+    поэтому результат можно сортировать, повторно агрегировать и кешировать.
     
     Args:
-        data: Список словарей с данными
+        data: Список словарей с данными или столбцы {поле: [значения]} (statistics_columns)
         group_by: Поле для группировки. Если None - группировка не выполняется
     """
-    df = pd.DataFrame(data)
+    df = _ensure_metric_columns(pd.DataFrame(data))
     
     if group_by and group_by in df.columns:
         df = _group_data(df, group_by)
         
     df = _calculate_metrics(df)
-    df = _add_conditional_formatting(df)
-    df = _rename_columns_to_russian(df)
-    return df.to_dict('records')
\ No newline at end of file
+    return _add_flags(df)
+
+def calculate_accounts_statistics(data: list[dict], account_ids: list) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Рассчитывает статистику нескольких аккаунтов одним DataFrame без форматирования.
+    Суммирует строки одним groupby по account_id и добавляет общий итог по всем аккаунтам.
+    
+    Args:
+        data: Строки статистики всех аккаунтов с полем account_id
+        account_ids: Идентификаторы аккаунтов в порядке вывода. Аккаунты без строк получают нулевые показатели
+        
+    Returns:
+        Кортеж из DataFrame с итогами по аккаунтам (индекс - account_ids) и DataFrame с общим итогом
+    """
+    df = _ensure_metric_columns(pd.DataFrame(data, columns=['account_id', *METRIC_COLUMNS]))
+    df = df.groupby('account_id')[METRIC_COLUMNS].sum().reindex(account_ids, fill_value=0)
+    
+    # Общий итог добавляется последней строкой, чтобы рассчитать метрики за один проход
+    total = df.sum().to_frame().T
+    df = _ensure_metric_columns(pd.concat([df, total]))
+    
+    df = _add_flags(_calculate_metrics(df))
+    return df.iloc[:-1], df.iloc[-1:]
+
+def sort_statistics(df: pd.DataFrame, column: str, ascending: bool = False) -> pd.DataFrame:
+    """
+    Сортирует рассчитанную статистику по указанному полю.
+    При сортировке по CPA строки без конверсий (CPA = 0) идут в конце.
+    
+    Args:
+        df: Результат calculate_statistics
+        column: Поле для сортировки
+        ascending: Сортировать по возрастанию
+    """
+    if column == 'CPA':
+        no_conversions = df['Conversions'] == 0
+        order = pd.DataFrame({'no_conversions': no_conversions, 'value': df['CPA']}).sort_values(
+            ['no_conversions', 'value'], ascending=[True, ascending], kind='stable'
+        ).index
+        return df.loc[order].reset_index(drop=True)
+    return df.sort_values(column, ascending=ascending, kind='stable').reset_index(drop=True)
+
+def paginate_statistics(df: pd.DataFrame, dimension: str, page: int, page_size: int,
+                        others_label: str) -> tuple[pd.DataFrame, int]:
+    """
+    Возвращает страницу рассчитанной статистики.
+    Строки после страницы сворачиваются в одну строку others_label с пересчитанными метриками.
+    
+    Args:
+        df: Отсортированный результат calculate_statistics
+        dimension: Поле группировки, в которое записывается others_label
+        page: Номер страницы (с нуля). Выходящий за границы номер приводится к ближайшей странице
+        page_size: Число строк на странице
+        others_label: Шаблон подписи свернутой строки, {count} - число свернутых строк
+        
+    Returns:
+        Кортеж из DataFrame страницы и общего числа страниц
+    """
+    pages = max(1, -(-len(df) // page_size))
+    page = min(max(page, 0), pages - 1)
+    start, end = page * page_size, (page + 1) * page_size
+    page_df = df.iloc[start:end]
+    rest = df.iloc[end:]
+    
+    if not rest.empty:
+        others = rest[METRIC_COLUMNS].sum().to_frame().T
+        others[dimension] = others_label.format(count=len(rest))
+        others = _add_flags(_calculate_metrics(_ensure_metric_columns(others)))
+        page_df = pd.concat([page_df, others], ignore_index=True)
+    
+    return page_df, pages
+
+def render_statistics(df: pd.DataFrame) -> list[dict]:
+    """
+    Форматирует рассчитанную статистику для вывода.
+    Преобразует значения в строки, добавляет ⚠️ к расходу и 🔴 к проценту отказов по флагам,
+    переименовывает поля на русский язык. Исходный DataFrame не изменяется.
+    """
+    rendered = df.drop(columns=FLAG_COLUMNS).astype(str)
+    rendered['Cost'] = rendered['Cost'].where(~df['CostWarning'], rendered['Cost'] + ' ⚠️')
+    rendered['BounceRate'] = rendered['BounceRate'].where(~df['HighBounceRate'], rendered['BounceRate'] + ' 🔴')
+    return _rename_columns_to_russian(rendered).to_dict('records')
+
+def export_statistics(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Подготавливает рассчитанную статистику к выгрузке в файл.
+    Значения остаются числовыми, флаги - булевыми, поля переименовываются на русский язык.
+    Исходный DataFrame не изменяется.
+    """
+    return _rename_columns_to_russian(df.reset_index(drop=True))
+
+def statistics_digest(df: pd.DataFrame) -> str:
+    """Возвращает хеш содержимого DataFrame: одинаковые данные дают одинаковый хеш"""
+    return hashlib.md5(pd.util.hash_pandas_object(df, index=False).values.tobytes()).hexdigest()
+
+def _select_backend(rows: int, backend: str = None) -> str:
+    """Выбирает способ расчета: небольшие наборы данных считаются без pandas"""
+    if backend is None:
+        return 'lean' if rows <= LEAN_STATISTICS_MAX_ROWS else 'pandas'
+    if backend not in BACKENDS:
+        raise ValueError(f"Неизвестный способ расчета статистики: {backend}. Доступные: {BACKENDS}")
+    return backend
+
+def proccess_data(data: list[dict], group_by: str = None, backend: str = None) -> list[dict]:
+    """
+    Рассчитывает статистику и форматирует ее для вывода.
+    
+    Args:
+        data: Список словарей с данными
+        group_by: Поле для группировки. Если None - группировка не выполняется
+        backend: Способ расчета из BACKENDS. Если None - до LEAN_STATISTICS_MAX_ROWS строк без pandas, иначе pandas
+    """
+    if _select_backend(len(data), backend) == 'lean':
+        return lean_stat_processor.proccess_data(data, group_by)
+    return render_statistics(calculate_statistics(data, group_by))
+
+
+def proccess_accounts_data(data: list[dict], account_ids: list, backend: str = None) -> tuple[list[dict], dict]:
+    """
+    Рассчитывает и форматирует статистику нескольких аккаунтов.
+    
+    Args:
+        data: Строки статистики всех аккаунтов с полем account_id
+        account_ids: Идентификаторы аккаунтов в порядке вывода. Аккаунты без строк получают нулевые показатели
+        backend: Способ расчета из BACKENDS. Если None - выбирается по числу строк, как в proccess_data
+        
+    Returns:
+        Кортеж из итогов по аккаунтам (в порядке account_ids) и общего итога по всем аккаунтам
+    """
+    if _select_backend(len(data), backend) == 'lean':
+        return lean_stat_processor.proccess_accounts_data(data, account_ids)
+    accounts_df, total_df = calculate_accounts_statistics(data, account_ids)
+    return render_statistics(accounts_df), render_statistics(total_df)[0]
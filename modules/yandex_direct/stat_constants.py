@@ -0,0 +1,29 @@
+"""
+Общие константы расчета статистики для pandas_stat_proccessor и lean_stat_processor.
+Оба способа расчета должны давать одинаковый результат, поэтому пороги и названия полей задаются в одном месте.
+Модуль не импортирует pandas.
+"""
+
+# Расход без конверсий, начиная с которого строка отмечается ⚠️
+COST_WARNING_THRESHOLD = 2500
+
+# Русские названия полей в отчетах
+RUSSIAN_NAMES = {
+    'Impressions': 'Показы',
+    'Clicks': 'Клики',
+    'Cost': 'Расход',
+    'Conversions': 'Конверсии',
+    'Sessions': 'Сессии',
+    'Bounces': 'Отказы',
+    'BounceRate': 'Процент отказов',
+    'CampaignName': 'Название кампании',
+    'Age': 'Возраст',
+    'Gender': 'Пол',
+    'Device': 'Устройство',
+    'Date': 'Дата',
+    'Account': 'Аккаунт',
+    'Budget': 'Баланс',
+    'Error': 'Ошибка',
+    'CostWarning': 'Расход без конверсий',
+    'HighBounceRate': 'Высокий процент отказов'
+}
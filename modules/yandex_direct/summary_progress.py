@@ -0,0 +1,72 @@
+"""
+Промежуточный сводный отчет: готовые аккаунты в порядке завершения и общий итог по ним.
+
+Итоги накапливаются в записях lean_stat_processor по мере поступления аккаунтов, поэтому отрисовка
+промежуточного отчета не пересчитывает уже полученные данные и не использует pandas.
+"""
+from typing import List, Union
+
+from models.account import Account
+from models.yandex_direct import YandexDirectBudget, StatisticsRow
+from modules.yandex_direct.lean_stat_processor import StatRecord, METRIC_COLUMNS, DERIVED_COLUMNS
+from modules.yandex_direct.summary_statistics_formatter import SummaryStatisticsFormatter
+from settings.bot import TELEGRAM_MESSAGE_LIMIT
+
+COLUMNS = [*METRIC_COLUMNS, *DERIVED_COLUMNS]
+
+
+class SummaryProgress:
+    """Состояние сводного отчета во время получения данных"""
+
+    def __init__(self, total: int, show_accounts: bool = True, limit: int = TELEGRAM_MESSAGE_LIMIT):
+        """
+        :param total: Число аккаунтов в отчете
+        :param show_accounts: Выводить блоки готовых аккаунтов (для больших отчетов - только итог)
+        :param limit: Максимальная длина текста
+        """
+        self.total = total
+        self.show_accounts = show_accounts
+        self.limit = limit
+        self.done = 0
+        self._total = StatRecord()
+        self._blocks: List[str] = []
+
+    def add(self, account: Account, stats: Union[List[StatisticsRow], Exception],
+            budget: Union[YandexDirectBudget, Exception, None]) -> None:
+        """Учитывает готовый аккаунт: статистику или ошибку и бюджет"""
+        self.done += 1
+        record = StatRecord()
+        if not isinstance(stats, Exception):
+            for stat in stats:
+                record.add_stat(stat)
+            self._total.add_record(record)
+        if self.show_accounts:
+            self._blocks.append("".join(
+                SummaryStatisticsFormatter.format_account(account, stats, budget, record.render(COLUMNS))
+            ))
+
+    def render(self) -> str:
+        """
+        Текст промежуточного отчета: число готовых аккаунтов, общий итог по ним и блоки аккаунтов,
+        которые помещаются в одно сообщение.
+        """
+        header = f"⏳ *Готовлю сводный отчет...*\n`{self.done}/{self.total}` аккаунтов готово\n\n"
+        footer = ""
+        if self.done:
+            footer = "".join([
+                f"•*Итого по готовым аккаунтам ({self.done})*\n",
+                *SummaryStatisticsFormatter.format_metrics(self._total.render(COLUMNS)),
+            ])
+
+        size = len(header) + len(footer)
+        blocks = []
+        for block in self._blocks:
+            # Блок и разделитель; запас - на строку о не поместившихся аккаунтах
+            if size + len(block) + 2 + 40 > self.limit:
+                break
+            blocks.append(block)
+            size += len(block) + 2
+        hidden = len(self._blocks) - len(blocks)
+        if hidden:
+            blocks.append(f"…и еще готовых аккаунтов: `{hidden}`\n")
+        return header + "".join(block + "\n" for block in blocks) + footer
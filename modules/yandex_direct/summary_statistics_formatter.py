@@ -1,74 +1,182 @@
-from typing import List, Union
+from typing import List, Optional, Tuple, Union
 import pandas as pd
 from models.account import Account
-from models.yandex_direct import YandexDirectStatistics
-from modules.yandex_direct.pandas_stat_proccessor import proccess_data
+from models.yandex_direct import YandexDirectBudget, StatisticsRow
+from modules.yandex_direct.pandas_stat_proccessor import calculate_accounts_statistics, proccess_accounts_data, render_statistics, METRIC_COLUMNS
+from services.deadline import DeadlineExceeded, LATE_TEXT
 from settings.yandex_direct import LOW_BUDGET_THRESHOLD
 
 class SummaryStatisticsFormatter:
     @staticmethod
-    def format_statistics_for_telegram(accounts: List[Account], statistics: List[Union[List[YandexDirectStatistics], Exception]], 
-                                      budgets: List[Union[float, Exception]] = None) -> str:
+    def format_metrics(totals: dict) -> List[str]:
+        """Форматирует строки с метриками из результата render_statistics"""
+        return [
+            f"Показы: `{totals.get('Показы', 0)}`\n",
+            f"Клики: `{totals.get('Клики', 0)}`\n",
+            f"Расход: `{totals.get('Расход', 0)}` ₽\n",
+            f"Конверсии: `{totals.get('Конверсии', 0)}`\n",
+            f"Сессии: `{totals.get('Сессии', 0)}`\n",
+            f"Отказы: `{totals.get('Отказы', 0)}`\n",
+            f"Процент отказов: `{totals.get('Процент отказов', 0)}`%\n",
+            f"CTR: `{totals.get('CTR', 0)}`%\n",
+            f"CPC: `{totals.get('CPC', 0)}` ₽\n",
+            f"CR: `{totals.get('CR', 0)}`%\n",
+            f"CPA: `{totals.get('CPA', 0)}` ₽\n"
+        ]
+
+    @staticmethod
+    def format_account(account: Account, stats: Union[List[StatisticsRow], Exception],
+                       budget: Union[YandexDirectBudget, Exception, None], totals: dict) -> List[str]:
         """
-        Форматирует отчет о статистике для Telegram используя pandas для расчетов.
-        
+        Форматирует блок одного аккаунта: название, баланс и метрики или ошибку.
+
+        :param account: Аккаунт
+        :param stats: Статистика аккаунта или ошибка
+        :param budget: Бюджет аккаунта или ошибка. None - баланс не выводится
+        :param totals: Итоги аккаунта из render_statistics
+        """
+        result = [f"•*{account.account_name}*\n"]
+
+        # Показываем бюджет, если он доступен
+        if budget is not None:
+            if isinstance(budget, DeadlineExceeded):
+                result.append(f"Баланс: {LATE_TEXT}\n")
+            elif isinstance(budget, Exception):
+                error_text = str(budget).replace("_", "\\_").replace("*", "\\*").replace("`", "\\`").replace("[", "\\[").replace("]", "\\]")
+                result.append(f"Баланс: ❌ `{error_text}`\n")
+            else:
+                emoji = "🔴" if budget.budget < LOW_BUDGET_THRESHOLD else ""
+                result.append(f"Баланс: `{budget.budget}` ₽ {emoji}\n")
+
+        if isinstance(stats, DeadlineExceeded):
+            result.append(f"{LATE_TEXT}\n")
+        elif isinstance(stats, Exception):
+            error_text = str(stats).replace("_", "\\_").replace("*", "\\*").replace("`", "\\`").replace("[", "\\[").replace("]", "\\]")
+            result.append(f"❌ `{error_text}`\n")
+        else:
+            result.extend(SummaryStatisticsFormatter.format_metrics(totals))
+        return result
+
+    @staticmethod
+    def _collect_rows(statistics: List[Union[List[StatisticsRow], Exception]]) -> List[dict]:
+        """Собирает строки всех аккаунтов в один набор данных с номером аккаунта в отчете"""
+        data = []
+        for account_id, stats in enumerate(statistics):
+            if isinstance(stats, Exception):
+                continue
+            for stat in stats:
+                row = stat.as_dict(METRIC_COLUMNS)
+                row['account_id'] = account_id
+                data.append(row)
+        return data
+
+    @staticmethod
+    def calculate_statistics(statistics: List[Union[List[StatisticsRow], Exception]]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Рассчитывает итоги всех аккаунтов одним DataFrame без форматирования.
+
+        :param statistics: Список статистики или ошибок для каждого аккаунта
+        :return: Кортеж из итогов по аккаунтам (индекс - номер аккаунта в отчете) и общего итога
+        """
+        data = SummaryStatisticsFormatter._collect_rows(statistics)
+        return calculate_accounts_statistics(data, list(range(len(statistics))))
+
+    @staticmethod
+    def build_export_frame(accounts: List[Account], statistics: List[Union[List[StatisticsRow], Exception]],
+                           budgets: List[Union[float, Exception]] = None,
+                           totals: Optional[Tuple[pd.DataFrame, pd.DataFrame]] = None) -> pd.DataFrame:
+        """
+        Собирает сводный отчет в числовую таблицу для выгрузки файлом: строка на аккаунт и строка общего итога.
+
         :param accounts: Список аккаунтов
         :param statistics: Список статистики или ошибок для каждого аккаунта
         :param budgets: Список бюджетов или ошибок для каждого аккаунта
+        :param totals: Результат calculate_statistics, если он уже рассчитан
+        :return: DataFrame с полями Account, Budget, Error, метриками и флагами
+        """
+        account_totals, grand_total = totals or SummaryStatisticsFormatter.calculate_statistics(statistics)
+
+        balances = [
+            budgets[i].budget if budgets and i < len(budgets) and not isinstance(budgets[i], Exception) else None
+            for i in range(len(accounts))
+        ]
+        errors = [str(stats) if isinstance(stats, Exception) else "" for stats in statistics]
+
+        frame = pd.concat([account_totals, grand_total], ignore_index=True)
+        frame.insert(0, 'Account', [account.account_name for account in accounts] + ["Итого по всем аккаунтам"])
+        frame.insert(1, 'Budget', pd.Series(balances + [sum(b for b in balances if b is not None)], dtype='float64'))
+        frame.insert(2, 'Error', errors + [""])
+        return frame
+
+    @staticmethod
+    def format_statistics_for_telegram(accounts: List[Account], statistics: List[Union[List[StatisticsRow], Exception]],
+                                      budgets: List[Union[float, Exception]] = None,
+                                      totals: Optional[Tuple[pd.DataFrame, pd.DataFrame]] = None,
+                                      totals_only: bool = False) -> str:
+        """
+        Форматирует отчет о статистике для Telegram используя pandas для расчетов.
+        Статистика всех аккаунтов рассчитывается за один проход, в конце отчета выводится общий итог.
+
+        :param accounts: Список аккаунтов
+        :param statistics: Список статистики или ошибок для каждого аккаунта. Аккаунты с DeadlineExceeded
+            (не успели до срока готовности отчета) отмечаются "⏳ не успели" и не входят в общий итог
+        :param budgets: Список бюджетов или ошибок для каждого аккаунта
+        :param totals: Результат calculate_statistics, если он уже рассчитан. Без него итоги
+            рассчитываются proccess_accounts_data (небольшие отчеты - без pandas)
+        :param totals_only: Вывести только общий итог (отчет по аккаунтам отправляется файлом)
         :return: Отформатированная строка для Telegram
         """
+        if totals is not None:
+            account_totals = render_statistics(totals[0])
+            grand_total = render_statistics(totals[1])[0]
+        else:
+            account_totals, grand_total = proccess_accounts_data(
+                SummaryStatisticsFormatter._collect_rows(statistics), list(range(len(statistics)))
+            )
+
+        if totals_only:
+            late = sum(isinstance(stats, DeadlineExceeded) for stats in statistics)
+            failed = sum(isinstance(stats, Exception) for stats in statistics) - late
+            result = [f"•*Итого по всем аккаунтам ({len(accounts)})*\n"]
+            result.extend(SummaryStatisticsFormatter.format_metrics(grand_total))
+            if failed:
+                result.append(f"❌ Не удалось получить статистику аккаунтов: `{failed}`\n")
+            if late:
+                result.append(f"{LATE_TEXT} получить статистику аккаунтов: `{late}`\n")
+            result.append("\nОтчет по каждому аккаунту - в файле\n")
+            return "".join(result)
+
         result = []
-        
+
         for i, (account, stats) in enumerate(zip(accounts, statistics)):
-            result.append(f"•*{account.account_name}*\n")
-            
-            # Показываем бюджет, если он доступен
-            if budgets and i < len(budgets):
-                budget = budgets[i]
-                if isinstance(budget, Exception):
-                    error_text = str(budget).replace("_", "\\_").replace("*", "\\*").replace("`", "\\`").replace("[", "\\[").replace("]", "\\]")
-                    result.append(f"Баланс: ❌ `{error_text}`\n")
-                else:
-                    emoji = "🔴" if budget.budget < LOW_BUDGET_THRESHOLD else ""
-                    result.append(f"Баланс: `{budget.budget}` ₽ {emoji}\n")
-            
-            if isinstance(stats, Exception):
-                error_text = str(stats).replace("_", "\\_").replace("*", "\\*").replace("`", "\\`").replace("[", "\\[").replace("]", "\\]")
-                result.append(f"❌ `{error_text}`\n")
-            else:
-                # Преобразуем статистику в список словарей
-                data = [stat.model_dump() for stat in stats]
-                
-                # Если данных нет, создаем пустые данные
-                if not data:
-                    data = [{
-                        'Impressions': 0,
-                        'Clicks': 0,
-                        'Cost': 0.0,
-                        'Conversions': 0,
-                        'Sessions': 0,
-                        'Bounces': 0
-                    }]
-                
-                # Используем proccess_data для обработки
-                processed = proccess_data(data)
-                totals = processed[0] if processed else {}
-                
-                # Форматируем вывод
-                result.extend([
-                    f"Показы: `{totals.get('Показы', 0)}`\n",
-                    f"Клики: `{totals.get('Клики', 0)}`\n",
-                    f"Расход: `{totals.get('Расход', 0)}` ₽\n",
-                    f"Конверсии: `{totals.get('Конверсии', 0)}`\n",
-                    f"Сессии: `{totals.get('Сессии', 0)}`\n",
-                    f"Отказы: `{totals.get('Отказы', 0)}`\n",
-                    f"Процент отказов: `{totals.get('Процент отказов', 0)}`%\n",
-                    f"CTR: `{float(totals.get('CTR', 0))}`%\n",
-                    f"CPC: `{float(totals.get('CPC', 0))}` ₽\n",
-                    f"CR: `{float(totals.get('CR', 0))}`%\n",
-                    f"CPA: `{float(totals.get('CPA', 0))}` ₽\n"
-                ])
-            
+            budget = budgets[i] if budgets and i < len(budgets) else None
+            result.extend(SummaryStatisticsFormatter.format_account(account, stats, budget, account_totals[i]))
             result.append("\n")  # Разделитель между аккаунтами
-            
-        return "".join(result) 
\ No newline at end of file
+
+        # Общий итог имеет смысл только для нескольких аккаунтов
+        if len(accounts) > 1:
+            result.append("•*Итого по всем аккаунтам*\n")
+            result.extend(SummaryStatisticsFormatter.format_metrics(grand_total))
+            result.append("\n")
+
+        return "".join(result)
+
+    @staticmethod
+    def build_report(accounts: List[Account], statistics: List[Union[List[StatisticsRow], Exception]],
+                     budgets: List[Union[float, Exception]] = None,
+                     totals_only: bool = False) -> Tuple[str, pd.DataFrame]:
+        """
+        Рассчитывает итоги один раз и собирает по ним текст отчета для Telegram и таблицу для выгрузки файлом.
+        Не обращается к состоянию процесса, поэтому может выполняться в пуле потоков или процессов.
+
+        :param accounts: Список аккаунтов
+        :param statistics: Список статистики или ошибок для каждого аккаунта
+        :param budgets: Список бюджетов или ошибок для каждого аккаунта
+        :param totals_only: Вывести в тексте только общий итог
+        :return: Кортеж из текста отчета и DataFrame для выгрузки
+        """
+        totals = SummaryStatisticsFormatter.calculate_statistics(statistics)
+        text = SummaryStatisticsFormatter.format_statistics_for_telegram(
+            accounts, statistics, budgets, totals, totals_only=totals_only
+        )
+        return text, SummaryStatisticsFormatter.build_export_frame(accounts, statistics, budgets, totals)
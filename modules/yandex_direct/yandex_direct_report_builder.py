@@ -1,105 +1,161 @@
 import asyncio
-from typing import List
+from typing import List, Optional
 import logging
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 from modules.base_report_builder import BaseReportBuilder
-from connectors.yandex_direct import YandexDirectAPI
-from settings.yandex_direct import INCLUDE_VAT, ATTRIBUTION_MODEL, REPORT_TYPE, REPORT_METRICS, DETAIL_REPORT_DIMENSIONS, LOW_BUDGET_THRESHOLD
+from connectors.exceptions import YandexDirectUnitsError
+from connectors.rate_limiter import current_priority
+from connectors.yandex_direct import YandexDirectAPI, CIRCUIT_BREAKER, UNITS_TRACKER
+from settings.yandex_direct import (
+    INCLUDE_VAT, ATTRIBUTION_MODEL, REPORT_TYPE, REPORT_METRICS, DETAIL_REPORT_DIMENSIONS, LOW_BUDGET_THRESHOLD,
+    DETAIL_REPORT_PAGE_SIZE, DETAIL_REPORT_SORT_OPTIONS, DETAIL_REPORT_DEFAULT_SORT, DETAIL_REPORT_DEFAULT_SORT_BY_DIMENSION,
+    DETAIL_REPORT_CHART_DIMENSIONS, ACCOUNT_FAN_OUT_WORKERS,
+)
+from enums.priorities import RequestPriority
+from enums.sources import Source
+from models.yandex_direct import StatisticsRow, statistics_columns
 from models.account import Account  # предполагается, что модель Account содержит нужные атрибуты
+from models.report import ReportPage, ReportFile, ReportChart
+from modules.report_cache import CachedReport, detailed_report_cache, chart_cache
+from modules.chart_renderer import render_charts
+from modules.report_exporter import export_frames
 from modules.yandex_direct.budget_formatter import BudgetFormatter
 from modules.yandex_direct.summary_statistics_formatter import SummaryStatisticsFormatter
-from modules.yandex_direct.pandas_stat_proccessor import proccess_data
+from modules.yandex_direct.summary_progress import SummaryProgress
+from modules.yandex_direct.pandas_stat_proccessor import calculate_statistics, proccess_data, render_statistics, sort_statistics, paginate_statistics, export_statistics, statistics_digest
+from settings.report_settings import EXPORT_DEFAULT_FORMAT, SUMMARY_EXPORT_ACCOUNTS_THRESHOLD
+from services.cpu_executor import run_cpu_bound
+from services.deadline import DeadlineExceeded, within_deadline, LATE_TEXT
+from services.fan_out import fan_out_list
+from services.metrics import API_REQUESTS_DEFERRED
+from services.progress import ProgressReporter
+from services.tracing import traced, span
+
+# Словарь для перевода названий полей
+DIMENSION_TO_RUSSIAN = {
+    'CampaignName': 'Название кампании',
+    'Age': 'Возраст',
+    'Gender': 'Пол',
+    'Device': 'Устройство',
+    'Date': 'Дата',
+    'Account': 'Аккаунт'
+}
+
+# Подписи вариантов сортировки детального отчета
+SORT_LABELS = {
+    'cost': 'по расходу',
+    'conv': 'по конверсиям',
+    'cpa': 'по CPA',
+    'name': 'по значению параметра',
+}
+
+def _calculate_dimension_statistics(stats: List[StatisticsRow], dimension: str):
+    """Рассчитывает статистику по параметру. Выполняется в пуле обработки, поэтому объявлена на уровне модуля"""
+    return calculate_statistics(statistics_columns(stats), group_by=dimension)
 
 class YandexDirectReportBuilder(BaseReportBuilder):
     def __init__(self):
         super().__init__()
-        # Семафор для ограничения одновременных запросов
-        self.semaphore = asyncio.Semaphore(5)
-        # Для контроля частоты запросов (20 запросов в течение 10 секунд)
-        self.request_timestamps = []
-        self.max_requests = 20
-        self.window_seconds = 10
+        # Общий лимит запросов (RATE_LIMITER) применяется в YandexDirectAPI к каждому HTTP-запросу
+        # Аккаунты с недействительным токеном пропускаются до запроса и не занимают место в лимите
+        self.circuit_breaker = CIRCUIT_BREAKER
+        self.units = UNITS_TRACKER
 
     async def _make_api_request(self, api_func, *args, **kwargs):
-        # Контроль частоты запросов
-        now = asyncio.get_event_loop().time()
-        
-        # Удаляем timestamp'ы старше окна в 10 секунд
-        self.request_timestamps = [ts for ts in self.request_timestamps if now - ts < self.window_seconds]
-        
-        # Если достигли лимита запросов в окне, нужно подождать
-        if len(self.request_timestamps) >= self.max_requests:
-            # Вычисляем, сколько нужно подождать
-            oldest_timestamp = min(self.request_timestamps)
-            wait_time = self.window_seconds - (now - oldest_timestamp)
-            if wait_time > 0:
-                print(f"Достигнут лимит запросов, ожидание {wait_time:.2f} секунд...")
-                await asyncio.sleep(wait_time)
-        
-        # Добавляем текущий запрос в историю
-        self.request_timestamps.append(asyncio.get_event_loop().time())
-        
-        # Выполняем запрос через семафор как обычно
-        async with self.semaphore:
-            return await api_func(*args, **kwargs)
+        """
+        :param api_func: Метод экземпляра YandexDirectAPI
+        :raises YandexDirectUnitsError: Неинтерактивный запрос отложен: баллов аккаунта осталось меньше резерва
+            интерактивных отчетов
+        """
+        login = api_func.__self__.login
+        if current_priority() is not RequestPriority.INTERACTIVE and self.units.is_low(login):
+            balance = self.units.balance(login)
+            API_REQUESTS_DEFERRED.inc()
+            raise YandexDirectUnitsError(
+                f"Фоновый запрос отложен: осталось {balance.remaining} из {balance.limit} баллов API"
+            )
+        return await self.circuit_breaker.call(login, api_func, *args, **kwargs)
 
+    @traced("builder.fetch_budgets")
     async def fetch_budgets(self, accounts: List[Account]) -> str:
-        tasks = []
-        for account in accounts:
+        async def fetch_budget(account: Account):
             api = YandexDirectAPI(account.auth.login, account.auth.token)
-            tasks.append(self._make_api_request(api.get_budgets, INCLUDE_VAT))
-            
-        budgets = await asyncio.gather(*tasks, return_exceptions=True)
-        print(budgets)
+            return await within_deadline(self._make_api_request(api.get_budgets, INCLUDE_VAT))
+
+        # Аккаунты обрабатываются фиксированным числом воркеров: число корутин и клиентов API
+        # не зависит от размера портфеля
+        budgets = await fan_out_list(accounts, fetch_budget, ACCOUNT_FAN_OUT_WORKERS)
+        logger.debug(f"Получены бюджеты: {budgets}")
         return BudgetFormatter.format_budget_for_telegram(accounts, budgets)
     
-    async def fetch_summary_statistics(self, accounts: List[Account], date_from: str, date_to: str) -> str:
-        statistics_tasks = []
-        budget_tasks = []
-        
-        for account in accounts:
+    @traced("builder.fetch_summary_statistics")
+    async def fetch_summary_statistics(self, accounts: List[Account], date_from: str, date_to: str,
+                                       progress: Optional[ProgressReporter] = None) -> ReportPage:
+        """
+        :param progress: Получатель промежуточного отчета: аккаунты передаются в порядке готовности
+        """
+        export_mode = len(accounts) > SUMMARY_EXPORT_ACCOUNTS_THRESHOLD
+        summary_progress = SummaryProgress(len(accounts), show_accounts=not export_mode) if progress else None
+        params = {
+            "date_from": date_from,
+            "date_to": date_to,
+            "attribution_models": [ATTRIBUTION_MODEL],
+            "field_names": REPORT_METRICS,
+            "report_type": REPORT_TYPE,
+            "include_vat": INCLUDE_VAT,
+        }
+
+        async def fetch_account(account: Account):
             auth = account.auth
             api = YandexDirectAPI(auth.login, auth.token)
-            
-            # Задачи для статистики
-            params = {
-                "date_from": date_from,
-                "date_to": date_to,
-                "goals": auth.goals,
-                "attribution_models": [ATTRIBUTION_MODEL],
-                "field_names": REPORT_METRICS,
-                "report_type": REPORT_TYPE,
-                "include_vat": INCLUDE_VAT,
-            }
-            statistics_tasks.append(self._make_api_request(api.get_statistics, **params))
-            
-            # Задачи для бюджетов
-            budget_tasks.append(self._make_api_request(api.get_budgets, INCLUDE_VAT))
+            # Статистика и бюджет аккаунта запрашиваются параллельно, ошибка одного запроса не отменяет другой.
+            # Запросы, не завершившиеся до срока готовности отчета, отменяются и возвращают DeadlineExceeded
+            stats, budget = await asyncio.gather(
+                within_deadline(self._make_api_request(api.get_statistics, goals=auth.goals, **params)),
+                within_deadline(self._make_api_request(api.get_budgets, INCLUDE_VAT)),
+                return_exceptions=True,
+            )
+            if summary_progress is not None:
+                summary_progress.add(account, stats, budget)
+                progress.update(summary_progress.render)
+            return stats, budget
 
-        # Выполняем все задачи параллельно
-        statistics_results = await asyncio.gather(*statistics_tasks, return_exceptions=True)
-        budget_results = await asyncio.gather(*budget_tasks, return_exceptions=True)
+        # Аккаунты обрабатываются фиксированным числом воркеров в порядке списка
+        results = await fan_out_list(accounts, fetch_account, ACCOUNT_FAN_OUT_WORKERS)
+        statistics_results = []
+        budget_results = []
+        for result in results:
+            if isinstance(result, Exception):
+                statistics_results.append(result)
+                budget_results.append(result)
+                continue
+            stats, budget = result
+            statistics_results.append(stats)
+            budget_results.append(budget)
         
-        return SummaryStatisticsFormatter.format_statistics_for_telegram(accounts, statistics_results, budget_results)
+        # Итоги рассчитываются один раз (и для текста, и для выгрузки файлом) вне цикла событий.
+        # Для большого числа аккаунтов в чат выводится только общий итог, отчет по аккаунтам отправляется файлом
+        rows = sum(len(stats) for stats in statistics_results if not isinstance(stats, Exception))
+        text, export_frame = await run_cpu_bound(
+            SummaryStatisticsFormatter.build_report, accounts, statistics_results, budget_results, export_mode, rows=rows
+        )
+        
+        period = date_from if date_from == date_to else f"{date_from} - {date_to}"
+        cached_report = CachedReport(source=Source.YANDEX_DIRECT, title=f"Сводный отчет {period}")
+        cached_report.frames['Account'] = export_frame
+        report_id = detailed_report_cache.put(cached_report)
+        return ReportPage(text, report_id=report_id, export_format=EXPORT_DEFAULT_FORMAT if export_mode else None)
 
 
+    @traced("builder.fetch_detailed_statistics")
     async def fetch_detailed_statistics(self, account: Account, date_from: str, date_to: str) -> List[str]:
         reports = []
         auth = account.auth
         api = YandexDirectAPI(auth.login, auth.token)
 
-        # Словарь для перевода названий полей
-        dimension_to_russian = {
-            'CampaignName': 'Название кампании',
-            'Age': 'Возраст',
-            'Gender': 'Пол',
-            'Device': 'Устройство',
-            'Date': 'Дата'
-        }
-
         try:
             # Подготавливаем все задачи для параллельного выполнения
             tasks = []
@@ -117,11 +173,12 @@ class YandexDirectReportBuilder(BaseReportBuilder):
             }
 
             logger.info("Запуск запросов к API для бюджета и общей статистики")
-            budget_data, summary_stats = await asyncio.gather(
-                self._make_api_request(api.get_budgets, **budget_params),
-                self._make_api_request(api.get_statistics, **summary_params),
-                return_exceptions=True
-            )
+            with span("builder.fetch_account_summary"):
+                budget_data, summary_stats = await asyncio.gather(
+                    within_deadline(self._make_api_request(api.get_budgets, **budget_params)),
+                    within_deadline(self._make_api_request(api.get_statistics, **summary_params)),
+                    return_exceptions=True
+                )
             
             # Обрабатываем результат получения бюджета
             balance = "Не доступно"
@@ -137,7 +194,10 @@ class YandexDirectReportBuilder(BaseReportBuilder):
             summary_report.append("*Общая сводка*\n\n")
             
             # Обрабатываем результат получения общей статистики
-            if isinstance(summary_stats, Exception):
+            if isinstance(summary_stats, DeadlineExceeded):
+                summary_report.append(f"{LATE_TEXT} получить общую статистику\n\n")
+                return ["".join(summary_report)]
+            elif isinstance(summary_stats, Exception):
                 logger.error(f"Ошибка при получении общей статистики: {summary_stats}")
                 error_text = str(summary_stats).replace("_", "\\_").replace("*", "\\*").replace("`", "\\`").replace("[", "\\[").replace("]", "\\]")
                 summary_report.append(f"❌ Ошибка при получении общей статистики: `{error_text}`\n\n")
@@ -145,36 +205,23 @@ class YandexDirectReportBuilder(BaseReportBuilder):
                 return ["".join(summary_report)]
             elif summary_stats:
                 # Преобразуем общую статистику в список словарей
-                summary_data = [stat.model_dump() for stat in summary_stats]
+                summary_data = [stat.as_dict() for stat in summary_stats]
                 
-                # Обрабатываем данные без группировки
+                # Обрабатываем данные без группировки (одна строка - без pandas)
                 summary_processed = proccess_data(summary_data)
                 
                 if summary_processed:
                     row = summary_processed[0]  # Берем первую (и единственную) строку с общей статистикой
-                    
-                    summary_report.extend([
-                        f"Показы: `{row.get('Показы', 0)}`\n",
-                        f"Клики: `{row.get('Клики', 0)}`\n",
-                        f"Расход: `{row.get('Расход', 0)}` ₽\n",
-                        f"Конверсии: `{row.get('Конверсии', 0)}`\n",
-                        f"Сессии: `{row.get('Сессии', 0)}`\n",
-                        f"Отказы: `{row.get('Отказы', 0)}`\n",
-                        f"Процент отказов: `{row.get('Процент отказов', 0)}`%\n",
-                        f"CTR: `{float(row.get('CTR', 0))}`%\n",
-                        f"CPC: `{float(row.get('CPC', 0))}` ₽\n",
-                        f"CR: `{float(row.get('CR', 0))}`%\n",
-                        f"CPA: `{float(row.get('CPA', 0))}` ₽\n\n"
-                    ])
+                    summary_report.extend(SummaryStatisticsFormatter.format_metrics(row))
+                    summary_report.append("\n")
             else:
                 summary_report.append("❌ Нет данных за указанный период\n\n")
             
             # Добавляем общую сводку в начало списка отчетов
             reports.append("".join(summary_report))
             
-            # Задачи для получения детальной статистики по каждому измерению
-            dimension_tasks = []
-            for dimension in DETAIL_REPORT_DIMENSIONS:
+            # Статистика по измерениям запрашивается параллельно воркерами, результаты - в порядке измерений
+            async def fetch_dimension(dimension: str):
                 params = {
                     "date_from": date_from,
                     "date_to": date_to,
@@ -184,57 +231,43 @@ class YandexDirectReportBuilder(BaseReportBuilder):
                     "report_type": REPORT_TYPE,
                     "include_vat": INCLUDE_VAT,
                 }
-                dimension_tasks.append((dimension, self._make_api_request(api.get_statistics, **params)))
-            
-            # Выполняем все задачи для измерений параллельно
+                with span("builder.fetch_dimension", dimension=dimension):
+                    return await within_deadline(self._make_api_request(api.get_statistics, **params))
+
             dimension_results = []
-            for dimension, task in dimension_tasks:
-                try:
-                    stats = await task
-                    dimension_results.append((dimension, stats))
-                except Exception as e:
-                    logger.error(f"Ошибка при получении статистики для {dimension}: {e}")
-                    error_text = str(e).replace("_", "\\_").replace("*", "\\*").replace("`", "\\`").replace("[", "\\[").replace("]", "\\]")
-                    reports.append(f"❌ Ошибка при получении статистики для {dimension_to_russian[dimension]}: `{error_text}`\n")
+            stats_by_dimension = await fan_out_list(DETAIL_REPORT_DIMENSIONS, fetch_dimension, ACCOUNT_FAN_OUT_WORKERS)
+            for dimension, stats in zip(DETAIL_REPORT_DIMENSIONS, stats_by_dimension):
+                if isinstance(stats, DeadlineExceeded):
+                    reports.append(f"{LATE_TEXT} получить статистику для {DIMENSION_TO_RUSSIAN[dimension]}\n")
+                    continue
+                if isinstance(stats, Exception):
+                    logger.error(f"Ошибка при получении статистики для {dimension}: {stats}")
+                    error_text = str(stats).replace("_", "\\_").replace("*", "\\*").replace("`", "\\`").replace("[", "\\[").replace("]", "\\]")
+                    reports.append(f"❌ Ошибка при получении статистики для {DIMENSION_TO_RUSSIAN[dimension]}: `{error_text}`\n")
+                    continue
+                dimension_results.append((dimension, stats))
+            
+            # Обрабатываем результаты по измерениям: рассчитанные данные сохраняем в кеш,
+            # чтобы перелистывать страницы и менять сортировку без повторных запросов к API
+            cached_report = CachedReport(
+                source=Source.YANDEX_DIRECT, title=f"{account.account_name} {date_from} - {date_to}",
+                account_id=account.id, date_from=date_from, date_to=date_to,
+            )
+            report_id = detailed_report_cache.put(cached_report)
             
-            # Обрабатываем результаты по измерениям
+            # Группировка по всем параметрам выполняется параллельно вне цикла событий
+            frames = await asyncio.gather(*(
+                run_cpu_bound(_calculate_dimension_statistics, stats, dimension, rows=len(stats))
+                for dimension, stats in dimension_results if stats
+            ))
+            frames = iter(frames)
             for dimension, stats in dimension_results:
                 if not stats:
-                    reports.append(f"❌ Нет данных за указанный период для {dimension_to_russian[dimension]}\n")
+                    reports.append(f"❌ Нет данных за указанный период для {DIMENSION_TO_RUSSIAN[dimension]}\n")
                     continue
                 
-                # Преобразуем статистику в список словарей
-                data = [stat.model_dump() for stat in stats]
-                
-                # Обрабатываем данные с группировкой
-                processed = proccess_data(data, group_by=dimension)
-                
-                # Формируем отчет для текущей группировки
-                report = []
-                
-                # Добавляем заголовок группировки
-                report.append(f"Отчет по параметру: _{dimension_to_russian[dimension]}_\n\n")
-                
-                for row in processed:
-                    # Получаем значение группировки по русскому названию поля
-                    dimension_value = row.get(dimension_to_russian[dimension], 'Не указано')
-                    
-                    report.append(f"*{dimension_value}*\n")
-                    report.extend([
-                        f"Показы: `{row.get('Показы', 0)}`\n",
-                        f"Клики: `{row.get('Клики', 0)}`\n",
-                        f"Расход: `{row.get('Расход', 0)}` ₽\n",
-                        f"Конверсии: `{row.get('Конверсии', 0)}`\n",
-                        f"Сессии: `{row.get('Сессии', 0)}`\n",
-                        f"Отказы: `{row.get('Отказы', 0)}`\n",
-                        f"Процент отказов: `{row.get('Процент отказов', 0)}`%\n",
-                        f"CTR: `{float(row.get('CTR', 0))}`%\n",
-                        f"CPC: `{float(row.get('CPC', 0))}` ₽\n",
-                        f"CR: `{float(row.get('CR', 0))}`%\n",
-                        f"CPA: `{float(row.get('CPA', 0))}` ₽\n\n"
-                    ])
-                
-                reports.append("".join(report))
+                cached_report.frames[dimension] = next(frames)
+                reports.append(await run_cpu_bound(self.render_detailed_page, report_id, dimension))
                 
         except Exception as e:
             # В случае ошибки возвращаем один отчет с информацией об ошибке
@@ -244,3 +277,121 @@ class YandexDirectReportBuilder(BaseReportBuilder):
         
         return reports
 
+    @traced("builder.fetch_daily_statistics")
+    async def fetch_daily_statistics(self, account: Account, date_from: str, date_to: str) -> List[StatisticsRow]:
+        auth = account.auth
+        api = YandexDirectAPI(auth.login, auth.token)
+        params = {
+            "date_from": date_from,
+            "date_to": date_to,
+            "goals": auth.goals,
+            "attribution_models": [ATTRIBUTION_MODEL],
+            "field_names": ["Date", *REPORT_METRICS],
+            "report_type": REPORT_TYPE,
+            "include_vat": INCLUDE_VAT,
+        }
+        return await self._make_api_request(api.get_statistics, **params)
+
+    def render_detailed_page(self, report_id: str, dimension: str, sort_by: Optional[str] = None,
+                             page: int = 0) -> Optional[ReportPage]:
+        """
+        Отрисовывает страницу детального отчета по параметру из кеша рассчитанных отчетов.
+        
+        :param report_id: Идентификатор отчета в кеше
+        :param dimension: Параметр группировки
+        :param sort_by: Ключ сортировки из DETAIL_REPORT_SORT_OPTIONS. По умолчанию - сортировка для параметра
+        :param page: Номер страницы (с нуля)
+        :return: Страница отчета или None, если отчет устарел
+        """
+        cached_report = detailed_report_cache.get(report_id)
+        if cached_report is None or dimension not in cached_report.frames:
+            return None
+        
+        if sort_by not in DETAIL_REPORT_SORT_OPTIONS:
+            sort_by = DETAIL_REPORT_DEFAULT_SORT_BY_DIMENSION.get(dimension, DETAIL_REPORT_DEFAULT_SORT)
+        column, ascending = DETAIL_REPORT_SORT_OPTIONS[sort_by]
+        
+        df = sort_statistics(cached_report.frames[dimension], column or dimension, ascending)
+        page_df, pages = paginate_statistics(
+            df, dimension, page, DETAIL_REPORT_PAGE_SIZE, others_label="Остальные ({count})"
+        )
+        page = min(max(page, 0), pages - 1)
+        
+        # Формируем отчет для текущей группировки
+        report = [f"Отчет по параметру: _{DIMENSION_TO_RUSSIAN[dimension]}_\n"]
+        if pages > 1:
+            report.append(f"Страница {page + 1} из {pages}, сортировка: {SORT_LABELS[sort_by]}\n")
+        report.append("\n")
+        
+        for row in render_statistics(page_df):
+            # Получаем значение группировки по русскому названию поля
+            dimension_value = row.get(DIMENSION_TO_RUSSIAN[dimension], 'Не указано')
+            
+            report.append(f"*{dimension_value}*\n")
+            report.extend(SummaryStatisticsFormatter.format_metrics(row))
+            report.append("\n")
+        
+        return ReportPage(
+            "".join(report), report_id=report_id, dimension=dimension, sort_by=sort_by, page=page, pages=pages
+        )
+
+    def export_report(self, report_id: str, export_format: str) -> Optional[ReportFile]:
+        """
+        Выгружает рассчитанный отчет из кеша в файл: каждая таблица отчета - отдельный лист (раздел).
+        
+        :param report_id: Идентификатор отчета в кеше
+        :param export_format: Формат файла (csv, xlsx, html)
+        :return: Файл отчета или None, если отчет устарел
+        """
+        cached_report = detailed_report_cache.get(report_id)
+        if cached_report is None or not cached_report.frames:
+            return None
+        
+        sheets = {
+            DIMENSION_TO_RUSSIAN.get(dimension, dimension): export_statistics(frame)
+            for dimension, frame in cached_report.frames.items()
+        }
+        return export_frames(sheets, cached_report.title, export_format)
+
+    @traced("builder.render_charts")
+    async def render_charts(self, report_id: str) -> Optional[List[ReportChart]]:
+        """
+        Строит графики расхода и конверсий детального отчета: по дням - линии, по устройствам,
+        возрасту и полу - столбцы. Графики, уже загруженные в Telegram с теми же данными, берутся
+        из chart_cache, остальные отрисовываются параллельно вне цикла событий.
+        
+        :param report_id: Идентификатор отчета в кеше
+        :return: Список графиков или None, если отчет устарел
+        """
+        cached_report = detailed_report_cache.get(report_id)
+        if cached_report is None:
+            return None
+        
+        charts = []
+        pending = []
+        for dimension in DETAIL_REPORT_CHART_DIMENSIONS:
+            frame = cached_report.frames.get(dimension)
+            if frame is None or frame.empty:
+                continue
+            
+            data = frame[[dimension, 'Cost', 'Conversions']].sort_values(dimension, kind='stable')
+            key = ":".join(map(str, (
+                cached_report.account_id, cached_report.date_from, cached_report.date_to, dimension, statistics_digest(data)
+            )))
+            chart = ReportChart(key=key, caption=f"{cached_report.title}: {DIMENSION_TO_RUSSIAN[dimension]}",
+                                file_id=chart_cache.get(key))
+            charts.append(chart)
+            
+            if chart.file_id is None:
+                pending.append((chart, {
+                    "kind": "line" if dimension == "Date" else "bar",
+                    "title": f"Расход и конверсии: {DIMENSION_TO_RUSSIAN[dimension]}",
+                    "labels": data[dimension].astype(str).tolist(),
+                    "primary": ("Расход, ₽", data['Cost'].tolist()),
+                    "secondary": ("Конверсии", data['Conversions'].tolist()),
+                }))
+        
+        images = await render_charts([params for _, params in pending])
+        for (chart, _), image in zip(pending, images):
+            chart.content = image
+        return charts
@@ -0,0 +1,186 @@
+import asyncio
+import logging
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from connectors.exceptions import YandexDirectUnitsError
+from connectors.rate_limiter import request_priority
+from database.db import get_all_accounts
+from database.statistics_history import (
+    init_history_tables,
+    save_daily_statistics,
+    get_backfill_checkpoint,
+    set_backfill_checkpoint,
+)
+from enums.priorities import RequestPriority
+from enums.sources import Source
+from models.account import Account
+from modules.base_report_builder import BaseReportBuilder
+from modules.report_builder_factory import ReportBuilderFactory
+from settings.report_settings import get_yesterday_date
+from settings.yandex_direct import (
+    BACKFILL_MONTHS, BACKFILL_CHUNK_MONTHS, BACKFILL_WORKERS, BACKFILL_UNITS_DEFER_SECONDS, BACKFILL_MAX_UNITS_DEFERRALS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _shift_months(value: date, months: int) -> date:
+    """Сдвигает дату на указанное число месяцев, прижимая день к концу месяца"""
+    month_index = value.month - 1 + months
+    year = value.year + month_index // 12
+    month = month_index % 12 + 1
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    last_day = (next_month - timedelta(days=1)).day
+    return date(year, month, min(value.day, last_day))
+
+
+def split_period(date_from: date, date_to: date, chunk_months: int) -> Iterator[Tuple[date, date]]:
+    """
+    Разбивает период на отрезки по chunk_months месяцев.
+
+    :param date_from: Начало периода (включительно)
+    :param date_to: Конец периода (включительно)
+    :param chunk_months: Длина отрезка в месяцах
+    :return: Итератор пар (начало, конец) отрезков
+    """
+    chunk_from = date_from
+    while chunk_from <= date_to:
+        chunk_to = min(_shift_months(chunk_from, chunk_months) - timedelta(days=1), date_to)
+        yield chunk_from, chunk_to
+        chunk_from = chunk_to + timedelta(days=1)
+
+
+class BackfillService:
+    def __init__(
+        self,
+        source: Source,
+        db_path: str = "accounts.db",
+        months: int = BACKFILL_MONTHS,
+        chunk_months: int = BACKFILL_CHUNK_MONTHS,
+        workers: int = BACKFILL_WORKERS,
+        ignore_checkpoints: bool = False,
+        units_defer_seconds: float = BACKFILL_UNITS_DEFER_SECONDS,
+        max_units_deferrals: int = BACKFILL_MAX_UNITS_DEFERRALS,
+    ):
+        """
+        :param source: Источник данных из enum Source
+        :param db_path: Путь к базе данных с аккаунтами
+        :param months: Глубина загрузки в месяцах
+        :param chunk_months: Длина периода одного отчета в месяцах
+        :param workers: Число аккаунтов, загружаемых одновременно
+        :param ignore_checkpoints: Загрузить весь период заново, не учитывая сохраненный прогресс
+        :param units_defer_seconds: Пауза перед повтором аккаунта, отложенного из-за нехватки баллов API
+        :param max_units_deferrals: Сколько раз аккаунт можно отложить, прежде чем его загрузка прекращается
+        """
+        self.source = source
+        self.db_path = db_path
+        self.months = months
+        self.chunk_months = chunk_months
+        self.workers = workers
+        self.ignore_checkpoints = ignore_checkpoints
+        self.units_defer_seconds = units_defer_seconds
+        self.max_units_deferrals = max_units_deferrals
+        self.builder: BaseReportBuilder = ReportBuilderFactory.get_builder(source)
+
+    def _get_period(self) -> Tuple[date, date]:
+        """Период загрузки: последние months месяцев, заканчивая вчерашним днем"""
+        date_to = date.fromisoformat(get_yesterday_date())
+        date_from = _shift_months(date_to, -self.months) + timedelta(days=1)
+        return date_from, date_to
+
+    async def _get_accounts(self, account_ids: Optional[List[int]]) -> List[Account]:
+        raw_accounts = await get_all_accounts(self.db_path)
+        accounts = [Account(**acc) for acc in raw_accounts]
+        return [
+            acc for acc in accounts
+            if Source(acc.source.upper()) == self.source and (account_ids is None or acc.id in account_ids)
+        ]
+
+    async def _backfill_account(self, account: Account, date_from: date, date_to: date) -> int:
+        """Загружает статистику аккаунта отрезками, сохраняя прогресс после каждого отрезка"""
+        start = date_from
+        if not self.ignore_checkpoints:
+            checkpoint = await get_backfill_checkpoint(account.id, self.db_path)
+            if checkpoint:
+                start = max(start, date.fromisoformat(checkpoint) + timedelta(days=1))
+
+        if start > date_to:
+            logger.info(f"[{account.account_name}] Статистика уже загружена по {date_to}")
+            return 0
+
+        loaded_days = 0
+        for chunk_from, chunk_to in split_period(start, date_to, self.chunk_months):
+            stats = await self.builder.fetch_daily_statistics(
+                account, chunk_from.isoformat(), chunk_to.isoformat()
+            )
+            rows = [stat.as_dict() for stat in stats if stat.Date]
+            await save_daily_statistics(account.id, rows, self.db_path)
+            await set_backfill_checkpoint(account.id, chunk_to.isoformat(), self.db_path)
+            loaded_days += len(rows)
+            logger.info(
+                f"[{account.account_name}] Загружено {len(rows)} дней за период {chunk_from} - {chunk_to}"
+            )
+        return loaded_days
+
+    async def _worker(self, queue: asyncio.Queue, date_from: date, date_to: date, result: dict,
+                      deferrals: Dict[int, int]) -> None:
+        while True:
+            try:
+                account = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                result["days"] += await self._backfill_account(account, date_from, date_to)
+                result["completed"] += 1
+            except YandexDirectUnitsError as e:
+                if deferrals.get(account.id, 0) >= self.max_units_deferrals:
+                    # Баллы не восстанавливаются: загрузка аккаунта прекращается, прогресс сохранен по последний
+                    # загруженный отрезок, и следующий запуск продолжит с него
+                    result["failed"] += 1
+                    logger.error(
+                        f"[{account.account_name}] {e}. Аккаунт отложен {self.max_units_deferrals} раз, загрузка прекращена"
+                    )
+                    continue
+                # Баллов мало: аккаунт возвращается в конец очереди (аккаунты с другим остатком баллов
+                # загружаются раньше) и продолжится с сохраненного отрезка после паузы
+                deferrals[account.id] = deferrals.get(account.id, 0) + 1
+                result["deferred"] += 1
+                logger.info(f"[{account.account_name}] {e}. Повтор через {self.units_defer_seconds:g} с")
+                queue.put_nowait(account)
+                await asyncio.sleep(self.units_defer_seconds)
+            except Exception as e:
+                result["failed"] += 1
+                logger.error(f"[{account.account_name}] Ошибка при загрузке статистики: {e}")
+
+    async def run(self, account_ids: Optional[List[int]] = None) -> dict:
+        """
+        Загружает историческую статистику по всем аккаунтам источника.
+        Прерванную загрузку можно продолжить повторным запуском. Запросы бэкфилла выполняются с приоритетом
+        BULK: они уступают место интерактивным отчетам, а при нехватке баллов API откладываются, пока остаток
+        не восстановится выше резерва интерактивных отчетов.
+
+        :param account_ids: Ограничить загрузку указанными ID аккаунтов
+        :return: Словарь с числом обработанных аккаунтов, ошибок и загруженных дней
+        """
+        await init_history_tables(self.db_path)
+        accounts = await self._get_accounts(account_ids)
+        date_from, date_to = self._get_period()
+        logger.info(f"Бэкфилл {len(accounts)} аккаунтов за период {date_from} - {date_to}")
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for account in accounts:
+            queue.put_nowait(account)
+
+        result = {"accounts": len(accounts), "completed": 0, "failed": 0, "deferred": 0, "days": 0}
+        # Число откладываний из-за нехватки баллов по ID аккаунтов
+        deferrals: Dict[int, int] = {}
+        with request_priority(RequestPriority.BULK):
+            await asyncio.gather(
+                *(self._worker(queue, date_from, date_to, result, deferrals) for _ in range(max(1, self.workers)))
+            )
+        logger.info(
+            f"Бэкфилл завершен: успешно {result['completed']}, с ошибками {result['failed']}, "
+            f"загружено дней {result['days']}"
+        )
+        return result
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+
+from services.metrics import REPORT_PROCESSING_SECONDS
+from services.tracing import span
+from settings.runtime import CPU_THREAD_WORKERS, CPU_PROCESS_WORKERS, CPU_PROCESS_MIN_ROWS, CPU_MAX_CONCURRENT
+
+logger = logging.getLogger(__name__)
+
+
+class CpuExecutor:
+    """
+    Выполняет CPU-емкую обработку отчетов (pandas, форматирование, выгрузка) вне цикла событий,
+    чтобы обработка большого отчета не задерживала ответы другим пользователям.
+
+    По умолчанию задачи выполняются в пуле потоков. Задачи с числом строк от process_min_rows
+    выполняются в пуле процессов: функция и аргументы таких задач должны сериализоваться pickle
+    и не должны обращаться к состоянию процесса (кешам отчетов). Число одновременно выполняемых
+    задач ограничено max_concurrent.
+    """
+
+    def __init__(self, thread_workers: int, process_workers: int, process_min_rows: int, max_concurrent: int):
+        """
+        :param thread_workers: Число потоков
+        :param process_workers: Число процессов (0 - обработка всегда в потоках)
+        :param process_min_rows: Число строк, начиная с которого задача выполняется в процессе
+        :param max_concurrent: Максимальное число одновременно выполняемых задач
+        """
+        self.thread_workers = thread_workers
+        self.process_workers = process_workers
+        self.process_min_rows = process_min_rows
+        self.max_concurrent = max_concurrent
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._loop = None
+        self._semaphore = None
+
+    def _bind_loop(self) -> asyncio.AbstractEventLoop:
+        """Создает семафор для текущего event loop (например, при повторном asyncio.run)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        return loop
+
+    def _get_executor(self, rows: int) -> Executor:
+        """Пулы создаются при первом использовании"""
+        if self.process_workers > 0 and rows >= self.process_min_rows:
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(max_workers=self.process_workers)
+            return self._processes
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(max_workers=self.thread_workers, thread_name_prefix="cpu")
+        return self._threads
+
+    async def run(self, func: Callable[..., Any], *args, rows: int = 0, **kwargs) -> Any:
+        """
+        Выполняет функцию в пуле и возвращает ее результат.
+
+        :param func: Синхронная функция обработки
+        :param rows: Число обрабатываемых строк. Если не указано, задача выполняется в потоке
+        """
+        loop = self._bind_loop()
+        task = getattr(func, "__name__", "unknown")
+        with span(f"cpu.{task}", rows=rows):
+            async with self._semaphore:
+                with REPORT_PROCESSING_SECONDS.time(task=task):
+                    return await loop.run_in_executor(self._get_executor(rows), partial(func, *args, **kwargs))
+
+    def shutdown(self) -> None:
+        """Останавливает пулы. Новые пулы будут созданы при следующем вызове run"""
+        for executor in (self._threads, self._processes):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._threads = None
+        self._processes = None
+
+
+# Общий исполнитель обработки отчетов процесса
+CPU_EXECUTOR = CpuExecutor(
+    thread_workers=CPU_THREAD_WORKERS,
+    process_workers=CPU_PROCESS_WORKERS,
+    process_min_rows=CPU_PROCESS_MIN_ROWS,
+    max_concurrent=CPU_MAX_CONCURRENT,
+)
+
+
+async def run_cpu_bound(func: Callable[..., Any], *args, rows: int = 0, **kwargs) -> Any:
+    """Выполняет CPU-емкую функцию в общем исполнителе CPU_EXECUTOR"""
+    return await CPU_EXECUTOR.run(func, *args, rows=rows, **kwargs)
@@ -0,0 +1,71 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Iterator, Optional, TypeVar
+
+R = TypeVar("R")
+
+# Момент (time.monotonic), к которому должен быть готов текущий отчет. Задачи, созданные внутри отчета,
+# наследуют значение, поэтому срок действует и в воркерах fan_out
+_deadline: ContextVar[Optional[float]] = ContextVar("report_deadline", default=None)
+
+LATE_TEXT = "⏳ не успели"
+
+
+class DeadlineExceeded(Exception):
+    """Результат не получен до срока готовности отчета"""
+
+    def __init__(self, message: str = LATE_TEXT):
+        super().__init__(message)
+
+
+@contextmanager
+def report_deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Задает срок готовности отчета. Вложенный срок не может быть позже внешнего.
+
+    :param seconds: Время на подготовку отчета, секунд. None - без ограничения
+    """
+    deadline = None if seconds is None else time.monotonic() + seconds
+    outer = _deadline.get()
+    if outer is not None and (deadline is None or outer < deadline):
+        deadline = outer
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def time_left() -> Optional[float]:
+    """Оставшееся до срока время в секундах (не меньше нуля) или None, если срок не задан"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0.0)
+
+
+async def within_deadline(awaitable: Awaitable[R]) -> R:
+    """
+    Ожидает результат не дольше срока готовности отчета.
+
+    Если срок уже прошел, корутина не запускается: аккаунты, до которых воркеры не дошли вовремя,
+    сразу получают DeadlineExceeded.
+
+    :raises DeadlineExceeded: Результат не получен до срока
+    """
+    remaining = time_left()
+    if remaining is None:
+        return await awaitable
+    if remaining <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded()
+    try:
+        return await asyncio.wait_for(awaitable, remaining)
+    except asyncio.TimeoutError:
+        # Ошибка ожидания внутри запроса (например, таймаут aiohttp) до срока - обычная ошибка аккаунта
+        if time_left() > 0:
+            raise
+        raise DeadlineExceeded() from None
@@ -0,0 +1,100 @@
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Iterable, List, Optional, TypeVar, Union
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Признак окончания входных данных
+_END = object()
+
+
+async def fan_out(items: Iterable[T], func: Callable[[T], Awaitable[R]], workers: int,
+                  window: Optional[int] = None) -> AsyncIterator[Union[R, Exception]]:
+    """
+    Обрабатывает элементы фиксированным числом воркеров и возвращает результаты в порядке элементов.
+
+    Воркеры по одному забирают элементы из общего итератора, поэтому одновременно существует не больше workers
+    корутин func, а элементы не материализуются заранее (items может быть генератором). Перед тем как взять
+    элемент, воркер занимает место в окне из window результатов, которое освобождается, только когда результат
+    отдан потребителю. Если потребитель медленный или ждет результата раннего элемента, воркеры останавливаются:
+    память ограничена window результатами при любом числе элементов.
+
+    Исключения func не прерывают обработку и возвращаются вместо результата, как gather(return_exceptions=True).
+    Если потребитель прекращает итерацию, незавершенные воркеры отменяются при закрытии итератора
+    (для немедленной отмены - contextlib.aclosing).
+
+    :param items: Элементы для обработки
+    :param func: Асинхронная функция обработки одного элемента
+    :param workers: Число воркеров
+    :param window: Число результатов в работе и в ожидании потребителя (по умолчанию - 2 * workers)
+    :return: Асинхронный итератор результатов или исключений в порядке items
+    """
+    if workers < 1:
+        raise ValueError("Число воркеров должно быть положительным")
+    window = max(window or 2 * workers, workers)
+    loop = asyncio.get_running_loop()
+    iterator = enumerate(items)
+    slots = asyncio.Semaphore(window)
+    futures = {}
+    # Число выданных воркерам элементов: после исчерпания итератора это индекс признака окончания
+    pulled = 0
+
+    def future(index: int) -> asyncio.Future:
+        if index not in futures:
+            futures[index] = loop.create_future()
+        return futures[index]
+
+    def finish(error: Optional[BaseException] = None) -> None:
+        end = future(pulled)
+        if end.done():
+            return
+        if error is None:
+            end.set_result(_END)
+        else:
+            end.set_exception(error)
+
+    async def worker() -> None:
+        nonlocal pulled
+        while True:
+            await slots.acquire()
+            try:
+                index, item = next(iterator)
+            except StopIteration:
+                slots.release()
+                finish()
+                return
+            except Exception as e:
+                # Ошибка самого итератора элементов завершает обработку
+                slots.release()
+                finish(e)
+                return
+            pulled = index + 1
+            try:
+                result = await func(item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                result = e
+            future(index).set_result(result)
+
+    tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+    try:
+        index = 0
+        while True:
+            result = await future(index)
+            del futures[index]
+            if result is _END:
+                break
+            slots.release()
+            index += 1
+            yield result
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def fan_out_list(items: Iterable[T], func: Callable[[T], Awaitable[R]], workers: int,
+                       window: Optional[int] = None) -> List[Union[R, Exception]]:
+    """Собирает результаты fan_out в список в порядке items"""
+    return [result async for result in fan_out(items, func, workers, window)]
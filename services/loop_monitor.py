@@ -0,0 +1,61 @@
+import asyncio
+import logging
+from typing import Optional
+
+from services.metrics import EVENT_LOOP_LAG_SECONDS
+from settings.runtime import LOOP_LAG_CHECK_INTERVAL, LOOP_LAG_WARNING_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    """
+    Измеряет задержку цикла событий: насколько позже запланированного просыпается задача,
+    которая засыпает на interval секунд. Большая задержка означает, что цикл событий заблокирован
+    синхронной работой и обработчики бота не отвечают.
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_CHECK_INTERVAL, warning_threshold: float = LOOP_LAG_WARNING_SECONDS):
+        """
+        :param interval: Интервал проверки в секундах
+        :param warning_threshold: Задержка в секундах, после которой в лог пишется предупреждение
+        """
+        self.interval = interval
+        self.warning_threshold = warning_threshold
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.slow_checks = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started_at = loop.time()
+            await asyncio.sleep(self.interval)
+            self.last_lag = max(0.0, loop.time() - started_at - self.interval)
+            self.max_lag = max(self.max_lag, self.last_lag)
+            EVENT_LOOP_LAG_SECONDS.set(self.last_lag)
+            if self.last_lag >= self.warning_threshold:
+                self.slow_checks += 1
+                logger.warning(f"Цикл событий был заблокирован на {self.last_lag:.3f} сек.")
+
+    def start(self) -> None:
+        """Запускает мониторинг в текущем цикле событий"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Останавливает мониторинг и пишет в лог максимальную задержку"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info(f"Максимальная задержка цикла событий: {self.max_lag:.3f} сек., "
+                        f"проверок с задержкой: {self.slow_checks}")
+
+
+# Общий монитор задержки цикла событий процесса
+loop_lag_monitor = LoopLagMonitor()
@@ -0,0 +1,230 @@
+import math
+from abc import ABC, abstractmethod
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+# Границы корзин гистограмм по умолчанию, секунд
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric(ABC):
+    """Базовый класс метрики с набором меток"""
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Метрика {self.name} ожидает метки {self.labelnames}, получены {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Строки значений метрики в текстовом формате Prometheus"""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Счетчик, который только увеличивается"""
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+
+class Gauge(_Metric):
+    """Текущее значение, которое может как расти, так и уменьшаться"""
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        self._values[self._key(labels)] = value
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+
+class Histogram(_Metric):
+    """Распределение значений по корзинам с суммой и количеством наблюдений"""
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Для каждого набора меток: счетчики корзин, сумма и количество наблюдений
+        self._values: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                state[0][i] += 1
+                break
+        state[1] += value
+        state[2] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Измеряет длительность блока кода в секундах"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def sum(self, **labels) -> float:
+        state = self._values.get(self._key(labels))
+        return state[1] if state else 0.0
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, (bucket_counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Набор метрик процесса в текстовом формате Prometheus.
+    Метрики обновляются из цикла событий, поэтому синхронизация не требуется.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Возвращает все метрики в текстовом формате Prometheus"""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+# Общий набор метрик процесса
+REGISTRY = MetricsRegistry()
+
+# API Яндекс.Директ
+API_REQUEST_SECONDS = REGISTRY.histogram(
+    "yandex_api_request_seconds", "Длительность HTTP-запроса к API Яндекс.Директ", ["endpoint"]
+)
+API_OFFLINE_WAIT_SECONDS = REGISTRY.histogram(
+    "yandex_api_offline_wait_seconds", "Ожидание готовности отчета в офлайн-режиме (ответы 201/202)"
+)
+API_ROWS_PARSED = REGISTRY.counter("yandex_api_rows_parsed_total", "Число разобранных строк отчетов API")
+API_RETRIES = REGISTRY.counter(
+    "yandex_api_retries_total", "Повторы запросов к API после временных ошибок", ["endpoint", "reason"]
+)
+API_UNITS_REMAINING = REGISTRY.gauge(
+    "yandex_api_units_remaining", "Остаток баллов API по логину, с которого они списываются", ["login"]
+)
+API_UNITS_SPENT = REGISTRY.counter("yandex_api_units_spent_total", "Израсходованные баллы API", ["login"])
+API_REQUESTS_DEFERRED = REGISTRY.counter(
+    "yandex_api_requests_deferred_total", "Фоновые запросы, отложенные из-за нехватки баллов API"
+)
+CIRCUIT_BREAKER_OPENED = REGISTRY.counter(
+    "circuit_breaker_opened_total", "Аккаунты, исключенные из запросов после повторных ошибок авторизации"
+)
+CIRCUIT_BREAKER_SKIPPED = REGISTRY.counter(
+    "circuit_breaker_skipped_total", "Запросы к API, пропущенные для аккаунтов с ошибкой авторизации"
+)
+RATE_LIMITER_WAIT_SECONDS = REGISTRY.histogram(
+    "rate_limiter_wait_seconds", "Ожидание разрешения общего лимита запросов к API", ["priority"]
+)
+
+# Обработка отчетов
+REPORT_PROCESSING_SECONDS = REGISTRY.histogram(
+    "report_processing_seconds", "Длительность обработки отчета в пуле (pandas, форматирование, выгрузка)", ["task"]
+)
+REPORT_DURATION_SECONDS = REGISTRY.histogram(
+    "report_duration_seconds", "Полное время подготовки отчета от запроса до готового текста", ["report"]
+)
+REPORTS_CANCELLED = REGISTRY.counter(
+    "reports_cancelled_total", "Отчеты, отмененные до завершения (кнопка \"Отмена\", меню, новый запрос)", ["reason"]
+)
+
+# Telegram
+TELEGRAM_QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "telegram_queue_wait_seconds", "Время сообщения в очереди отправки до первой попытки"
+)
+TELEGRAM_SEND_SECONDS = REGISTRY.histogram(
+    "telegram_send_seconds", "Длительность вызова метода Telegram Bot API", ["method"]
+)
+
+# Цикл событий
+EVENT_LOOP_LAG_SECONDS = REGISTRY.gauge("event_loop_lag_seconds", "Последняя измеренная задержка цикла событий")
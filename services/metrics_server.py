@@ -0,0 +1,39 @@
+import logging
+
+from aiohttp import web
+
+from services.metrics import REGISTRY, MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+
+def create_metrics_app(registry: MetricsRegistry = REGISTRY) -> web.Application:
+    """Создает приложение aiohttp с эндпоинтом /metrics в текстовом формате Prometheus"""
+
+    async def metrics(request: web.Request) -> web.Response:
+        return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8",
+                            headers={"X-Content-Type-Options": "nosniff"})
+
+    app = web.Application()
+    app.router.add_get("/metrics", metrics)
+    return app
+
+
+async def start_metrics_server(host: str, port: int, registry: MetricsRegistry = REGISTRY) -> web.AppRunner:
+    """
+    Запускает HTTP-сервер метрик в текущем цикле событий.
+
+    :param host: Адрес, на котором принимаются запросы (по умолчанию только локальный)
+    :param port: Порт сервера. 0 - любой свободный порт
+    :return: AppRunner, у которого нужно вызвать cleanup() при остановке
+    :raises OSError: Порт занят или адрес недоступен
+    """
+    runner = web.AppRunner(create_metrics_app(registry), access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+    except OSError:
+        await runner.cleanup()
+        raise
+    logger.info(f"Метрики доступны на http://{host}:{port}/metrics")
+    return runner
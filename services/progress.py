@@ -0,0 +1,82 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+from settings.bot import PROGRESS_EDIT_INTERVAL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressReporter:
+    """
+    Промежуточный результат отчета с ограничением частоты публикации.
+
+    Построитель сообщает о каждом готовом аккаунте через update(render), передавая функцию отрисовки
+    текущего состояния. Текст отрисовывается и публикуется (например, редактированием сообщения о подготовке)
+    не чаще одного раза в interval секунд и только в фоне: запросы к API не ждут Telegram, а из нескольких
+    обновлений за интервал публикуется последнее.
+    """
+
+    def __init__(self, publish: Callable[[str], Awaitable], interval: float = PROGRESS_EDIT_INTERVAL_SECONDS):
+        """
+        :param publish: Асинхронная публикация текста
+        :param interval: Минимальный интервал между публикациями, секунд
+        """
+        self.publish = publish
+        self.interval = interval
+        self.published = 0
+        self._render: Optional[Callable[[], str]] = None
+        self._last_text: Optional[str] = None
+        self._last_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._publishing = False
+        self._closed = False
+
+    def update(self, render: Callable[[], str]) -> None:
+        """Запоминает новое состояние и планирует публикацию, если она еще не запланирована"""
+        if self._closed:
+            return
+        self._render = render
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush())
+
+    async def _flush(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._last_at is not None:
+            delay = self._last_at + self.interval - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        render, self._render = self._render, None
+        if render is None:
+            return
+        text = render()
+        if text == self._last_text:
+            return
+        self._last_at = loop.time()
+        self._last_text = text
+        self._publishing = True
+        try:
+            await self.publish(text)
+            self.published += 1
+        except Exception as e:
+            # Промежуточный результат не обязателен: ошибка публикации не прерывает отчет
+            logger.warning(f"Не удалось обновить ход подготовки отчета: {e}")
+        finally:
+            self._publishing = False
+        # Обновления, пришедшие во время публикации, публикуются следующим интервалом
+        if self._render is not None and not self._closed:
+            self._task = asyncio.create_task(self._flush())
+
+    async def close(self) -> None:
+        """Отменяет запланированную публикацию и дожидается текущей: после close() сообщение можно удалять"""
+        self._closed = True
+        self._render = None
+        task, self._task = self._task, None
+        if task is None or task.done():
+            return
+        if not self._publishing:
+            task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
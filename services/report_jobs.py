@@ -0,0 +1,74 @@
+import asyncio
+import logging
+from typing import Awaitable, Dict, Hashable, TypeVar
+
+from services.metrics import REPORTS_CANCELLED
+
+logger = logging.getLogger(__name__)
+
+R = TypeVar("R")
+
+
+class ReportCancelled(Exception):
+    """Подготовка отчета отменена: пользователь нажал "Отмена", вернулся в меню или запросил новый отчет"""
+
+
+class ReportJobs:
+    """
+    Отчеты в работе, по одному на чат.
+
+    Отчет выполняется отдельной задачей. Новый отчет в том же чате или cancel() отменяют задачу предыдущего:
+    отмена доходит до всех ожидающих корутин - воркеров fan_out, ожидания общего лимита запросов, опроса
+    офлайн-отчетов в YandexDirectAPI и очереди пула обработки, поэтому брошенный отчет больше не расходует
+    баллы API и процессорное время.
+    """
+
+    def __init__(self):
+        self._jobs: Dict[Hashable, asyncio.Task] = {}
+
+    def active(self, chat_id: Hashable) -> bool:
+        task = self._jobs.get(chat_id)
+        return task is not None and not task.done()
+
+    def cancel(self, chat_id: Hashable, reason: str = "cancel") -> bool:
+        """
+        Отменяет отчет чата.
+
+        :param chat_id: Идентификатор чата
+        :param reason: Причина отмены для метрики (cancel, menu, replaced)
+        :return: True, если отчет был в работе
+        """
+        task = self._jobs.pop(chat_id, None)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        REPORTS_CANCELLED.inc(reason=reason)
+        logger.info(f"Отчет чата {chat_id} отменен ({reason})")
+        return True
+
+    async def run(self, chat_id: Hashable, report: Awaitable[R]) -> R:
+        """
+        Выполняет отчет как задачу чата, предварительно отменив предыдущий отчет этого чата.
+
+        :param chat_id: Идентификатор чата
+        :param report: Корутина подготовки отчета
+        :return: Результат отчета
+        :raises ReportCancelled: Отчет отменен до завершения
+        """
+        self.cancel(chat_id, reason="replaced")
+        task = asyncio.ensure_future(report)
+        self._jobs[chat_id] = task
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # Задача снята с учета - ее отменил cancel(). Иначе отменен сам обработчик: отменяем отчет вместе с ним
+            if self._jobs.get(chat_id) is not task:
+                raise ReportCancelled() from None
+            task.cancel()
+            raise
+        finally:
+            if self._jobs.get(chat_id) is task:
+                del self._jobs[chat_id]
+
+
+report_jobs = ReportJobs()
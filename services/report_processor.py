@@ -5,16 +5,25 @@ from database.db import get_all_accounts, get_account_by_id
 from modules.report_builder_factory import ReportBuilderFactory
 from modules.base_report_builder import BaseReportBuilder
 from models.account import Account
-from settings.report_settings import get_date_from, get_date_to, get_yesterday_date
+from models.report import ReportFile, ReportChart
+from services.metrics import REPORT_DURATION_SECONDS
+from services.deadline import report_deadline
+from services.progress import ProgressReporter
+from services.tracing import span
+from settings.report_settings import get_date_from, get_date_to, get_yesterday_date, REPORT_DEADLINE_SECONDS
 
 class ReportProcessor:
-    def __init__(self, source: Source, db_path: str = "accounts.db"):
+    def __init__(self, source: Source, db_path: str = "accounts.db",
+                 deadline_seconds: Optional[float] = REPORT_DEADLINE_SECONDS):
         """
         :param source: Источник данных из enum Source
         :param db_path: Путь к базе данных с аккаунтами
+        :param deadline_seconds: Срок готовности отчета. Отчет выводится по данным, полученным до срока,
+            остальные аккаунты отмечаются "⏳ не успели". None - ждать все аккаунты
         """
         self.source = source
         self.db_path = db_path
+        self.deadline_seconds = deadline_seconds
         self.builder: BaseReportBuilder = ReportBuilderFactory.get_builder(source)
         self._update_dates()
 
@@ -25,37 +34,50 @@ class ReportProcessor:
         self.yesterday_date = get_yesterday_date()
 
     async def _get_filtered_accounts(self) -> List[Account]:
-        raw_accounts = await get_all_accounts(self.db_path)
+        with span("processor.load_accounts"):
+            raw_accounts = await get_all_accounts(self.db_path)
         accounts = [Account(**acc) for acc in raw_accounts]
         filtered_accounts = [
             acc for acc in accounts if Source(acc.source.upper()) == self.source
         ]
         return filtered_accounts
 
-    async def _process_report(self, report_func, *args) -> Any:
+    async def _process_report(self, report_func, *args, **kwargs) -> Any:
         accounts = await self._get_filtered_accounts()
         if not accounts:
             return "❌ *Нет аккаунтов для выбранного источника*"
-        return await report_func(accounts, *args)
+        with report_deadline(self.deadline_seconds):
+            return await report_func(accounts, *args, **kwargs)
 
     async def get_budgets_report(self) -> str:
-        return await self._process_report(self.builder.fetch_budgets)
+        with REPORT_DURATION_SECONDS.time(report="budgets"):
+            return await self._process_report(self.builder.fetch_budgets)
 
-    async def get_today_summary_report(self) -> str:
+    async def get_today_summary_report(self, progress: Optional[ProgressReporter] = None) -> str:
+        """
+        :param progress: Получатель промежуточного отчета (число готовых аккаунтов, итог и блоки аккаунтов)
+        """
         self._update_dates()
-        return await self._process_report(
-            self.builder.fetch_summary_statistics, 
-            self.date_to, 
-            self.date_to
-        )
+        with REPORT_DURATION_SECONDS.time(report="summary"):
+            return await self._process_report(
+                self.builder.fetch_summary_statistics, 
+                self.date_to, 
+                self.date_to,
+                progress=progress,
+            )
     
-    async def get_yesterday_summary_report(self) -> str:
+    async def get_yesterday_summary_report(self, progress: Optional[ProgressReporter] = None) -> str:
+        """
+        :param progress: Получатель промежуточного отчета (число готовых аккаунтов, итог и блоки аккаунтов)
+        """
         self._update_dates()
-        return await self._process_report(
-            self.builder.fetch_summary_statistics, 
-            self.yesterday_date, 
-            self.yesterday_date
-        )
+        with REPORT_DURATION_SECONDS.time(report="summary"):
+            return await self._process_report(
+                self.builder.fetch_summary_statistics, 
+                self.yesterday_date, 
+                self.yesterday_date,
+                progress=progress,
+            )
 
     async def get_summary_report(self) -> str:
         """
@@ -71,11 +93,46 @@ class ReportProcessor:
         :return: Список строк с отчетом
         """
         self._update_dates()
-        account_dict = await get_account_by_id(account_id, db_path=self.db_path)
+        with span("processor.load_account", account_id=account_id):
+            account_dict = await get_account_by_id(account_id, db_path=self.db_path)
         if not account_dict:
             return ["❌ *Аккаунт не найден*"]
         
         # Преобразуем словарь в объект Account
         account = Account(**account_dict)
         
-        return await self.builder.fetch_detailed_statistics(account, self.date_from, self.date_to)
+        with REPORT_DURATION_SECONDS.time(report="detailed"), report_deadline(self.deadline_seconds):
+            return await self.builder.fetch_detailed_statistics(account, self.date_from, self.date_to)
+
+    def get_detailed_report_page(self, report_id: str, dimension: str, sort_by: Optional[str] = None,
+                                 page: int = 0) -> Optional[str]:
+        """
+        Отрисовывает страницу ранее полученного детального отчета без повторных запросов к API.
+        
+        :param report_id: Идентификатор отчета из ReportPage
+        :param dimension: Параметр группировки
+        :param sort_by: Ключ сортировки
+        :param page: Номер страницы (с нуля)
+        :return: Текст страницы или None, если отчет устарел
+        """
+        return self.builder.render_detailed_page(report_id, dimension, sort_by, page)
+
+    def export_report(self, report_id: str, export_format: str) -> Optional[ReportFile]:
+        """
+        Выгружает ранее рассчитанный отчет (сводный или детальный) в файл без повторных запросов к API.
+        
+        :param report_id: Идентификатор отчета из ReportPage
+        :param export_format: Формат файла (csv, xlsx, html)
+        :return: Файл отчета или None, если отчет устарел
+        """
+        return self.builder.export_report(report_id, export_format)
+
+    async def get_report_charts(self, report_id: str) -> Optional[List[ReportChart]]:
+        """
+        Строит графики ранее полученного детального отчета. Уже загруженные в Telegram графики
+        с теми же данными возвращаются с file_id без повторной отрисовки.
+        
+        :param report_id: Идентификатор отчета из ReportPage
+        :return: Список графиков или None, если отчет устарел
+        """
+        return await self.builder.render_charts(report_id)
@@ -0,0 +1,37 @@
+import asyncio
+import importlib.util
+import logging
+from typing import Dict
+
+from services.serializers import use_json_backend
+from settings.runtime import RUNTIME_PROFILE
+
+logger = logging.getLogger(__name__)
+
+UVLOOP_AVAILABLE = importlib.util.find_spec("uvloop") is not None
+
+PROFILES = ("standard", "fast")
+
+
+def apply_runtime_profile(profile: str = RUNTIME_PROFILE) -> Dict[str, str]:
+    """
+    Настраивает цикл событий и JSON процесса. Вызывается до asyncio.run.
+
+    standard - стандартный цикл событий asyncio и json. fast - uvloop и orjson, если они установлены
+    (отсутствующий пакет заменяется стандартной реализацией).
+
+    :return: Выбранные реализации: {"loop": ..., "json": ...}
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Неизвестный профиль выполнения: {profile}. Доступные: {list(PROFILES)}")
+    loop = "asyncio"
+    if profile == "fast" and UVLOOP_AVAILABLE:
+        import uvloop
+
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        loop = "uvloop"
+    else:
+        asyncio.set_event_loop_policy(None)
+    json_name = use_json_backend("orjson" if profile == "fast" else "json")
+    logger.info(f"Профиль выполнения {profile}: цикл событий {loop}, JSON {json_name}")
+    return {"loop": loop, "json": json_name}
@@ -0,0 +1,70 @@
+"""
+Сериализация JSON с подключаемой реализацией.
+
+Код, которому важна скорость JSON (аккаунты в базе, запросы и ответы API, сессия Telegram), вызывает
+json_dumps/json_loads этого модуля. Реализация выбирается при запуске (use_json_backend): orjson, если он
+установлен и выбран профиль выполнения, иначе стандартный json. Обе реализации дают совместимый JSON.
+"""
+import importlib.util
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Union
+
+logger = logging.getLogger(__name__)
+
+ORJSON_AVAILABLE = importlib.util.find_spec("orjson") is not None
+
+
+@dataclass(frozen=True)
+class JsonBackend:
+    name: str
+    dumps: Callable[[Any], str]
+    loads: Callable[[Union[str, bytes]], Any]
+
+
+def _stdlib_backend() -> JsonBackend:
+    return JsonBackend("json", json.dumps, json.loads)
+
+
+def _orjson_backend() -> JsonBackend:
+    import orjson
+
+    def dumps(obj: Any) -> str:
+        # orjson возвращает bytes, а aiohttp, aiogram и sqlite ожидают строку
+        return orjson.dumps(obj).decode()
+
+    return JsonBackend("orjson", dumps, orjson.loads)
+
+
+_FACTORIES: Dict[str, Callable[[], JsonBackend]] = {"json": _stdlib_backend, "orjson": _orjson_backend}
+_backend = _stdlib_backend()
+
+
+def use_json_backend(name: str) -> str:
+    """
+    Выбирает реализацию JSON для всего процесса.
+
+    :param name: json или orjson. Если orjson не установлен, используется стандартный json
+    :return: Название выбранной реализации
+    """
+    global _backend
+    if name not in _FACTORIES:
+        raise ValueError(f"Неизвестная реализация JSON: {name}. Доступные: {list(_FACTORIES)}")
+    if name == "orjson" and not ORJSON_AVAILABLE:
+        logger.warning("orjson не установлен, используется стандартный json")
+        name = "json"
+    _backend = _FACTORIES[name]()
+    return _backend.name
+
+
+def json_backend() -> str:
+    return _backend.name
+
+
+def json_dumps(obj: Any) -> str:
+    return _backend.dumps(obj)
+
+
+def json_loads(data: Union[str, bytes]) -> Any:
+    return _backend.loads(data)
@@ -0,0 +1,228 @@
+import functools
+import json
+import logging
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+from settings.runtime import TRACE_LOG_MAX_CHARS, TRACE_MAX_SPANS, TRACE_STORE_MAX_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    """Замер одного этапа подготовки отчета"""
+    name: str
+    span_id: str
+    parent_id: Optional[str]
+    start: float
+    duration: Optional[float] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def set(self, **attributes) -> None:
+        """Добавляет атрибуты к замеру (например, число строк)"""
+        self.attributes.update(attributes)
+
+
+class _NullSpan:
+    """Замер вне трассировки: атрибуты игнорируются"""
+
+    def set(self, **attributes) -> None:
+        pass
+
+
+@dataclass
+class Trace:
+    """
+    Трассировка одного отчета: дерево замеров от обработчика до запросов к API.
+    Записывается не больше max_spans замеров; остальные (запросы по сотням аккаунтов) только подсчитываются
+    по названиям в dropped, поэтому размер трассировки в trace_store не зависит от числа аккаунтов.
+    """
+    trace_id: str
+    name: str
+    started_at: float = field(default_factory=time.time)
+    spans: List[Span] = field(default_factory=list)
+    max_spans: int = TRACE_MAX_SPANS
+    dropped: Counter = field(default_factory=Counter)
+    _origin: float = field(default_factory=time.perf_counter, repr=False)
+
+    def add(self, item: Span) -> None:
+        if len(self.spans) < self.max_spans:
+            self.spans.append(item)
+        else:
+            self.dropped[item.name] += 1
+
+    @staticmethod
+    def _span_dict(item: Span) -> dict:
+        return {
+            "name": item.name,
+            "span_id": item.span_id,
+            "parent_id": item.parent_id,
+            "start_ms": round(item.start * 1000, 1),
+            "duration_ms": round(item.duration * 1000, 1) if item.duration is not None else None,
+            "attributes": item.attributes,
+            "error": item.error,
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "spans": [self._span_dict(item) for item in self.spans],
+            "dropped_spans": dict(self.dropped),
+        }
+
+    def to_log_line(self, max_chars: Optional[int] = None) -> str:
+        """
+        Трассировка одной JSON-строкой не длиннее max_chars (по умолчанию TRACE_LOG_MAX_CHARS): замеры,
+        которые не поместились, не выводятся, их число указывается в omitted_spans
+        """
+        if max_chars is None:
+            max_chars = TRACE_LOG_MAX_CHARS
+        data = self.to_dict()
+        line = json.dumps({"trace": data}, ensure_ascii=False, default=str)
+        if len(line) <= max_chars:
+            return line
+        spans = data["spans"]
+        data["spans"] = []
+        size = len(json.dumps({"trace": data}, ensure_ascii=False, default=str)) + 40
+        for item in spans:
+            size += len(json.dumps(item, ensure_ascii=False, default=str)) + 2
+            if size > max_chars:
+                break
+            data["spans"].append(item)
+        data["omitted_spans"] = len(spans) - len(data["spans"])
+        return json.dumps({"trace": data}, ensure_ascii=False, default=str)
+
+
+class TraceStore:
+    """Хранит последние завершенные трассировки для просмотра командой /trace"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._traces: "OrderedDict[str, Trace]" = OrderedDict()
+
+    def put(self, trace: Trace) -> None:
+        self._traces[trace.trace_id] = trace
+        while len(self._traces) > self.max_size:
+            self._traces.popitem(last=False)
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        return self._traces.get(trace_id)
+
+
+# Последние трассировки процесса
+trace_store = TraceStore(max_size=TRACE_STORE_MAX_SIZE)
+
+# Текущая трассировка и замер. Контекст копируется в задачи asyncio, поэтому замеры
+# параллельных запросов попадают в трассировку отчета, который их запустил
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_trace_id() -> Optional[str]:
+    """Возвращает идентификатор текущей трассировки или None"""
+    trace = _current_trace.get()
+    return trace.trace_id if trace else None
+
+
+def current_span() -> Union[Span, _NullSpan]:
+    """Возвращает текущий замер, чтобы добавить к нему атрибуты. Вне трассировки - пустой замер"""
+    return _current_span.get() or _NullSpan()
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Span]:
+    """
+    Замеряет этап подготовки отчета. Вне трассировки ничего не записывает.
+
+    :param name: Название этапа, например api.get_statistics
+    :param attributes: Атрибуты замера (логин, параметр группировки и т.п.)
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield _NullSpan()
+        return
+
+    parent = _current_span.get()
+    current = Span(
+        name=name,
+        span_id=uuid.uuid4().hex[:8],
+        parent_id=parent.span_id if parent else None,
+        start=time.perf_counter() - trace._origin,
+        attributes=dict(attributes),
+    )
+    trace.add(current)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.duration = time.perf_counter() - trace._origin - current.start
+        _current_span.reset(token)
+
+
+def traced(name: str) -> Callable:
+    """Декоратор асинхронной функции: каждый вызов записывается замером span с указанным названием"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def start_trace(name: str, **attributes) -> Iterator[Trace]:
+    """
+    Начинает трассировку отчета. Все замеры span внутри блока (в том числе в запущенных задачах asyncio)
+    попадают в нее. По завершении трассировка пишется в лог одной JSON-строкой и сохраняется в trace_store.
+
+    :param name: Название отчета, например summary_report
+    :param attributes: Атрибуты корневого замера (пользователь, аккаунт, период)
+    """
+    trace = Trace(trace_id=uuid.uuid4().hex[:12], name=name)
+    trace_token = _current_trace.set(trace)
+    try:
+        with span(name, **attributes):
+            yield trace
+    finally:
+        _current_trace.reset(trace_token)
+        trace_store.put(trace)
+        logger.info(trace.to_log_line())
+
+
+def format_trace(trace: Trace) -> str:
+    """
+    Форматирует трассировку деревом замеров: смещение от начала, длительность, название и атрибуты.
+    Результат предназначен для вывода в блоке кода.
+    """
+    children: Dict[Optional[str], List[Span]] = {}
+    for item in trace.spans:
+        children.setdefault(item.parent_id, []).append(item)
+
+    lines = [f"{trace.name} {trace.trace_id}"]
+
+    def walk(parent_id: Optional[str], depth: int) -> None:
+        for item in sorted(children.get(parent_id, []), key=lambda s: s.start):
+            duration = f"{item.duration * 1000:8.0f}" if item.duration is not None else "       ?"
+            attributes = " ".join(f"{key}={value}" for key, value in item.attributes.items())
+            error = f" ! {item.error}" if item.error else ""
+            lines.append(f"+{item.start * 1000:7.0f} {duration} ms {'  ' * depth}{item.name} {attributes}{error}".rstrip())
+            walk(item.span_id, depth + 1)
+
+    walk(None, 0)
+    if trace.dropped:
+        dropped = " ".join(f"{name}={count}" for name, count in trace.dropped.most_common())
+        lines.append(f"... не записано замеров: {dropped}")
+    return "\n".join(lines)
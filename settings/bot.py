@@ -0,0 +1,15 @@
+import os
+
+# Лимиты Telegram на отправку сообщений
+TELEGRAM_GLOBAL_RATE: float = 30.0       # Сообщений в секунду от бота во все чаты
+TELEGRAM_CHAT_INTERVAL: float = 1.0      # Минимальный интервал между сообщениями в один чат, секунд
+TELEGRAM_SEND_MAX_RETRIES: int = 3       # Повторы отправки при флуд-контроле и сетевых ошибках
+TELEGRAM_MESSAGE_LIMIT: int = 4096       # Максимальная длина сообщения
+
+# Минимальный интервал между обновлениями сообщения о ходе подготовки отчета, секунд
+PROGRESS_EDIT_INTERVAL_SECONDS: float = 3.0
+
+
+def get_admin_ids() -> set[int]:
+    """Возвращает ID администраторов бота из переменной окружения ADMIN_IDS (через запятую)"""
+    return {int(admin_id) for admin_id in os.getenv("ADMIN_IDS", "").split(",") if admin_id.strip()}
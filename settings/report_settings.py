@@ -18,3 +18,14 @@ def get_default_date_range() -> tuple[str, str]:
 def get_yesterday_date() -> str:
     """Возвращает вчерашнюю дату по московскому времени"""
     return (datetime.now(MOSCOW_TZ) - timedelta(days=1)).strftime("%Y-%m-%d")
+
+# Выгрузка отчетов файлом: поддерживаемые форматы и формат по умолчанию
+EXPORT_FORMATS: tuple[str, ...] = ("csv", "xlsx", "html")
+EXPORT_DEFAULT_FORMAT: str = "xlsx"
+
+# Сводный отчет по большему числу аккаунтов отправляется одним файлом, в чат выводится только общий итог
+SUMMARY_EXPORT_ACCOUNTS_THRESHOLD: int = 30
+
+# Срок готовности отчета, секунд: по истечении срока отчет выводится по полученным данным,
+# остальные аккаунты отмечаются "⏳ не успели"
+REPORT_DEADLINE_SECONDS: float = 180.0
@@ -0,0 +1,28 @@
+# Выполнение CPU-емкой обработки отчетов вне цикла событий
+CPU_THREAD_WORKERS: int = 4          # Потоков для обработки отчетов
+CPU_PROCESS_WORKERS: int = 2         # Процессов для обработки больших таблиц (0 - не использовать процессы)
+CPU_PROCESS_MIN_ROWS: int = 50000    # С какого числа строк обработка выполняется в отдельном процессе
+CPU_MAX_CONCURRENT: int = 4          # Одновременно выполняемых задач обработки
+
+# Мониторинг задержки цикла событий
+LOOP_LAG_CHECK_INTERVAL: float = 0.5    # Интервал проверки, секунд
+LOOP_LAG_WARNING_SECONDS: float = 0.2   # Задержка, после которой в лог пишется предупреждение
+
+# HTTP-эндпоинт метрик в формате Prometheus
+METRICS_ENABLED: bool = True
+METRICS_HOST: str = "127.0.0.1"
+METRICS_PORT: int = 9821  # 9100 занят node_exporter по умолчанию
+
+# Трассировка отчетов: число последних трассировок, доступных команде /trace
+TRACE_STORE_MAX_SIZE: int = 200
+# Замеров в одной трассировке: сверх лимита замеры только подсчитываются по названиям
+TRACE_MAX_SPANS: int = 300
+# Максимальная длина JSON-строки трассировки в логе, символов
+TRACE_LOG_MAX_CHARS: int = 20000
+
+# Профиль выполнения: fast - uvloop и orjson, если установлены (иначе стандартные реализации),
+# standard - только стандартная библиотека
+RUNTIME_PROFILE: str = "fast"
+
+# Загрузка модулей отчетов (pandas, numpy) в фоне сразу после запуска, а не при первом отчете
+PRELOAD_REPORT_MODULES: bool = True
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List, Tuple
 
 ATTRIBUTION_MODEL: List[str] = "AUTO"
 INCLUDE_VAT: bool = True
@@ -15,3 +15,77 @@ LOW_BUDGET_THRESHOLD: float = 3000.0
 # Порог для предупреждения о высоком проценте отказов
 HIGH_BOUNCE_RATE_THRESHOLD: float = 40.0
 
+# Адреса API Яндекс.Директ: v4 Live (бюджеты) и v5 (отчеты)
+YANDEX_DIRECT_BUDGETS_URL: str = "https://api.direct.yandex.ru/live/v4/json/"
+YANDEX_DIRECT_REPORTS_URL: str = "https://api.direct.yandex.com/json/v5/reports"
+
+# Таймауты одного запроса к API, секунд: установка соединения и ожидание данных ответа
+API_CONNECT_TIMEOUT_SECONDS: float = 10.0
+API_READ_TIMEOUT_SECONDS: float = 120.0
+# Максимальное время ожидания формирования офлайн-отчета (ответы 201/202), секунд
+OFFLINE_REPORT_MAX_WAIT_SECONDS: float = 600.0
+
+# Повтор запроса при временных ошибках API (5xx, ошибки сети, превышение лимитов): число попыток с первой
+# и границы паузы перед повтором (экспоненциальный рост от базовой паузы со случайным разбросом), секунд
+API_RETRY_ATTEMPTS: int = 3
+API_RETRY_BASE_DELAY_SECONDS: float = 1.0
+API_RETRY_MAX_DELAY_SECONDS: float = 30.0
+
+# Аккаунт с недействительным токеном или закрытым доступом пропускается после этого числа ошибок авторизации
+# подряд; через паузу (секунд) выполняется пробный запрос
+CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 3
+CIRCUIT_BREAKER_COOLDOWN_SECONDS: float = 1800.0
+
+# Баллы API (заголовок Units): фоновая работа откладывается, когда остаток ниже этой доли суточного лимита,
+# чтобы баллы остались интерактивным отчетам. Остаток старше UNITS_BALANCE_TTL_SECONDS считается неизвестным
+UNITS_BACKGROUND_RESERVE_FRACTION: float = 0.2
+UNITS_BALANCE_TTL_SECONDS: float = 600.0
+
+# Общий лимит запросов к API (20 запросов в течение 10 секунд, не более 5 одновременно)
+MAX_CONCURRENT_REQUESTS: int = 5
+MAX_REQUESTS_PER_WINDOW: int = 20
+REQUESTS_WINDOW_SECONDS: float = 10.0
+# Доли мест общего лимита по приоритетам запросов (interactive - отчеты по кнопкам, scheduled - задачи
+# по расписанию, bulk - бэкфилл) и число одновременных запросов, которые доступны только интерактивным отчетам
+REQUEST_PRIORITY_WEIGHTS: Dict[str, int] = {"interactive": 16, "scheduled": 4, "bulk": 1}
+INTERACTIVE_RESERVED_REQUESTS: int = 1
+
+# Число аккаунтов (и параметров детального отчета), которые загружаются одновременно
+ACCOUNT_FAN_OUT_WORKERS: int = 10
+
+# Наборы данных до этого числа строк рассчитываются без pandas (lean_stat_processor)
+LEAN_STATISTICS_MAX_ROWS: int = 10000
+
+# Бэкфилл исторической статистики
+BACKFILL_MONTHS: int = 12
+BACKFILL_CHUNK_MONTHS: int = 3
+BACKFILL_WORKERS: int = 3
+# Пауза перед повторной попыткой аккаунта, отложенного из-за нехватки баллов API, секунд
+BACKFILL_UNITS_DEFER_SECONDS: float = 60.0
+# Сколько раз аккаунт откладывается из-за нехватки баллов, прежде чем бэкфилл прекращает его загрузку
+BACKFILL_MAX_UNITS_DEFERRALS: int = 10
+
+# Детальный отчет: число строк на странице (остальные строки сворачиваются в строку "Остальные")
+DETAIL_REPORT_PAGE_SIZE: int = 10
+
+# Варианты сортировки детального отчета: ключ -> (поле, по возрастанию)
+# name - сортировка по значению параметра (для дат - хронологически)
+DETAIL_REPORT_SORT_OPTIONS: Dict[str, Tuple[str, bool]] = {
+    "cost": ("Cost", False),
+    "conv": ("Conversions", False),
+    "cpa": ("CPA", True),
+    "name": ("", True),
+}
+DETAIL_REPORT_DEFAULT_SORT: str = "cost"
+DETAIL_REPORT_DEFAULT_SORT_BY_DIMENSION: Dict[str, str] = {"Date": "name"}
+
+# Время хранения рассчитанных детальных отчетов для перелистывания страниц
+DETAIL_REPORT_CACHE_TTL_SECONDS: int = 3600
+DETAIL_REPORT_CACHE_MAX_SIZE: int = 200
+
+# Графики детального отчета: параметры, по которым строятся графики, и число потоков отрисовки
+DETAIL_REPORT_CHART_DIMENSIONS: List[str] = ["Date", "Device", "Age", "Gender"]
+CHART_WORKERS: int = 2
+
+# Число file_id загруженных в Telegram графиков, которые хранятся для повторной отправки
+CHART_CACHE_MAX_SIZE: int = 500
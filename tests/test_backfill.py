@@ -0,0 +1,144 @@
+import os
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в PYTHONPATH
+root_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, root_dir)
+os.chdir(root_dir)  # Меняем текущую директорию на корневую
+
+
+import asyncio
+from datetime import date
+
+import aiosqlite
+
+from connectors.exceptions import YandexDirectUnitsError
+from database.db import init_db, add_account
+from database.statistics_history import get_backfill_checkpoint
+from enums.sources import Source
+from models.yandex_direct import YandexDirectStatistics
+from services.backfill import BackfillService, split_period
+
+TEST_DB_PATH = "test_backfill.db"
+
+
+class FakeBuilder:
+    """Отдает по одной строке статистики на каждый день периода и может упасть на заданном вызове"""
+
+    def __init__(self, fail_on_call: int | None = None, units_low_on_call: int | None = None,
+                 units_low_account: int | None = None):
+        self.calls = []
+        self.fail_on_call = fail_on_call
+        self.units_low_on_call = units_low_on_call
+        # Аккаунт, для которого баллов не хватает ни на один запрос после первого
+        self.units_low_account = units_low_account
+
+    async def fetch_daily_statistics(self, account, date_from: str, date_to: str):
+        self.calls.append((account.id, date_from, date_to))
+        if self.fail_on_call is not None and len(self.calls) == self.fail_on_call:
+            raise Exception("Обрыв соединения")
+        low_account = account.id == self.units_low_account and sum(call[0] == account.id for call in self.calls) > 1
+        if low_account or self.units_low_on_call is not None and len(self.calls) == self.units_low_on_call:
+            raise YandexDirectUnitsError("Фоновый запрос отложен: осталось 10 из 100 баллов API")
+        start, end = date.fromisoformat(date_from), date.fromisoformat(date_to)
+        return [
+            YandexDirectStatistics(Date=date.fromordinal(day).isoformat(), Impressions="10", Cost="1.5")
+            for day in range(start.toordinal(), end.toordinal() + 1)
+        ]
+
+
+def test_split_period():
+    chunks = list(split_period(date(2024, 1, 31), date(2024, 7, 15), chunk_months=3))
+    assert chunks == [
+        (date(2024, 1, 31), date(2024, 4, 29)),
+        (date(2024, 4, 30), date(2024, 7, 15)),
+    ]
+    assert list(split_period(date(2024, 2, 1), date(2024, 1, 1), chunk_months=1)) == []
+
+
+async def _count_days(db_path: str) -> int:
+    async with aiosqlite.connect(db_path) as db:
+        async with db.execute("SELECT COUNT(*) FROM statistics_daily") as cursor:
+            return (await cursor.fetchone())[0]
+
+
+async def _run_backfill_with_resume():
+    await init_db(TEST_DB_PATH)
+    await add_account("YANDEX_DIRECT", {"login": "l", "token": "t", "goals": []}, "test", db_path=TEST_DB_PATH)
+
+    service = BackfillService(Source.YANDEX_DIRECT, db_path=TEST_DB_PATH, months=6, chunk_months=2, workers=2)
+    date_from, date_to = service._get_period()
+
+    # Первый запуск падает на втором отрезке: первый отрезок должен сохраниться
+    service.builder = FakeBuilder(fail_on_call=2)
+    result = await service.run()
+    assert result["failed"] == 1
+    first_chunk_to = service.builder.calls[0][2]
+    assert await get_backfill_checkpoint(1, TEST_DB_PATH) == first_chunk_to
+
+    # Повторный запуск продолжает с места остановки
+    service.builder = FakeBuilder()
+    result = await service.run()
+    assert result["completed"] == 1
+    assert service.builder.calls[0][1] > first_chunk_to
+    assert await get_backfill_checkpoint(1, TEST_DB_PATH) == date_to.isoformat()
+    assert await _count_days(TEST_DB_PATH) == (date_to - date_from).days + 1
+
+    # Третий запуск ничего не запрашивает
+    service.builder = FakeBuilder()
+    await service.run()
+    assert service.builder.calls == []
+
+
+def test_backfill_resumes_from_checkpoint():
+    try:
+        asyncio.run(_run_backfill_with_resume())
+        print("✓ Бэкфилл продолжает загрузку с сохраненного прогресса")
+    finally:
+        if os.path.exists(TEST_DB_PATH):
+            os.remove(TEST_DB_PATH)
+
+
+async def _run_backfill_deferred_by_units():
+    await init_db(TEST_DB_PATH)
+    for login in ("a", "b"):
+        await add_account("YANDEX_DIRECT", {"login": login, "token": "t", "goals": []}, login, db_path=TEST_DB_PATH)
+
+    service = BackfillService(
+        Source.YANDEX_DIRECT, db_path=TEST_DB_PATH, months=2, chunk_months=1, workers=1, units_defer_seconds=0
+    )
+    # Второй отрезок первого аккаунта отложен из-за нехватки баллов: аккаунт уходит в конец очереди
+    # и продолжается с сохраненного отрезка после второго аккаунта
+    service.builder = FakeBuilder(units_low_on_call=2)
+    result = await service.run()
+    assert result == {**result, "completed": 2, "failed": 0, "deferred": 1}
+    assert [call[0] for call in service.builder.calls] == [1, 1, 2, 2, 1]
+    assert service.builder.calls[4][1:] == service.builder.calls[1][1:]
+
+    # Баллы первого аккаунта не восстанавливаются: после max_units_deferrals откладываний загрузка прекращается,
+    # прогресс сохранен по первый отрезок
+    service = BackfillService(
+        Source.YANDEX_DIRECT, db_path=TEST_DB_PATH, months=2, chunk_months=1, workers=1,
+        units_defer_seconds=0, max_units_deferrals=2, ignore_checkpoints=True,
+    )
+    service.builder = FakeBuilder(units_low_account=1)
+    result = await service.run()
+    assert result == {**result, "completed": 1, "failed": 1, "deferred": 2}
+    assert [call[0] for call in service.builder.calls] == [1, 1, 2, 2, 1, 1]
+    assert await get_backfill_checkpoint(1, TEST_DB_PATH) == service.builder.calls[0][2]
+
+
+def test_backfill_deferred_by_units():
+    try:
+        asyncio.run(_run_backfill_deferred_by_units())
+        print("✓ Аккаунт, отложенный из-за нехватки баллов, загружается позже")
+    finally:
+        if os.path.exists(TEST_DB_PATH):
+            os.remove(TEST_DB_PATH)
+
+
+if __name__ == "__main__":
+    test_split_period()
+    test_backfill_resumes_from_checkpoint()
+    test_backfill_deferred_by_units()
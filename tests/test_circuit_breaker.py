@@ -0,0 +1,100 @@
+import os
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в PYTHONPATH
+root_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, root_dir)
+os.chdir(root_dir)  # Меняем текущую директорию на корневую
+
+import asyncio
+
+import pytest
+
+from benchmarks.fake_yandex_server import FakeServerConfig, FakeYandexDirectServer, TOKEN_PREFIX
+from connectors.circuit_breaker import CircuitBreaker
+from connectors.exceptions import YandexDirectAuthError, YandexDirectCircuitOpenError, YandexDirectTransientError
+from connectors.yandex_direct import YandexDirectAPI
+from models.account import Account
+from modules.yandex_direct.yandex_direct_report_builder import YandexDirectReportBuilder
+
+
+def _account(login: str) -> Account:
+    return Account(account_name=login, source="YANDEX_DIRECT",
+                   auth={"login": login, "token": f"{TOKEN_PREFIX}{login}", "goals": [1]})
+
+
+async def _run_breaker_checks():
+    opened = []
+    breaker = CircuitBreaker(failure_threshold=2, cooldown_seconds=0.05)
+    breaker.add_listener(lambda key, error: opened.append(key))
+    calls = []
+    healthy = False
+
+    async def request():
+        calls.append(1)
+        if healthy:
+            return "ok"
+        raise YandexDirectAuthError("Ошибка авторизации", status=403, error_code=53)
+
+    async def transient():
+        raise YandexDirectTransientError("503", status=503)
+
+    # Временные ошибки не размыкают цепь
+    for _ in range(3):
+        with pytest.raises(YandexDirectTransientError):
+            await breaker.call("a", transient)
+    assert not breaker.is_open("a")
+
+    for _ in range(2):
+        with pytest.raises(YandexDirectAuthError):
+            await breaker.call("a", request)
+    assert breaker.is_open("a") and opened == ["a"]
+
+    # Разомкнутая цепь: запрос не выполняется, возвращается последняя ошибка
+    with pytest.raises(YandexDirectCircuitOpenError, match="Ошибка авторизации"):
+        await breaker.call("a", request)
+    assert len(calls) == 2
+
+    # Неудачный пробный запрос продлевает паузу без повторного уведомления
+    await asyncio.sleep(0.06)
+    with pytest.raises(YandexDirectAuthError):
+        await breaker.call("a", request)
+    assert len(calls) == 3 and opened == ["a"]
+    with pytest.raises(YandexDirectCircuitOpenError):
+        await breaker.call("a", request)
+
+    # Успешный пробный запрос замыкает цепь
+    await asyncio.sleep(0.06)
+    healthy = True
+    assert await breaker.call("a", request) == "ok"
+    assert not breaker.is_open("a") and breaker.open_circuits() == {}
+
+
+def test_circuit_breaker():
+    asyncio.run(_run_breaker_checks())
+    print("✓ Цепь размыкается после ошибок авторизации и замыкается после успешной проверки")
+
+
+def test_revoked_account_is_skipped(monkeypatch):
+    """Аккаунт с отозванным доступом перестает запрашиваться, остальные аккаунты не затронуты"""
+    async def run():
+        config = FakeServerConfig(offline_polls=0, revoked_logins=("revoked",))
+        async with FakeYandexDirectServer(config) as server:
+            monkeypatch.setattr(YandexDirectAPI, "BUDGETS_URL", server.budgets_url)
+            monkeypatch.setattr(YandexDirectAPI, "REPORTS_URL", server.reports_url)
+            builder = YandexDirectReportBuilder()
+            builder.circuit_breaker = CircuitBreaker(failure_threshold=2, cooldown_seconds=60)
+            accounts = [_account("ok-1"), _account("revoked"), _account("ok-2")]
+            reports = []
+            for _ in range(3):
+                reports.append(await builder.fetch_budgets(accounts))
+            return reports, server.calls, builder.circuit_breaker
+
+    reports, calls, breaker = asyncio.run(run())
+    # Две ошибки авторизации (по два запроса v4 на каждую), третий отчет обходится без запросов к аккаунту
+    assert calls[("v4", 401)] == 4
+    assert calls[("v4", 200)] == 6
+    assert breaker.is_open("revoked")
+    assert "Аккаунт временно пропускается" in reports[-1]
+    print("✓ Аккаунт с отозванным доступом пропускается без запросов к API")
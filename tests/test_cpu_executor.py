@@ -0,0 +1,78 @@
+import os
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в PYTHONPATH
+root_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, root_dir)
+os.chdir(root_dir)  # Меняем текущую директорию на корневую
+
+import asyncio
+import threading
+import time
+
+from models.yandex_direct import YandexDirectStatistics
+from modules.yandex_direct.yandex_direct_report_builder import _calculate_dimension_statistics
+from services.cpu_executor import CpuExecutor
+from services.loop_monitor import LoopLagMonitor
+
+
+# Число одновременно выполняющихся задач и его максимум
+_running = {"now": 0, "peak": 0}
+_running_lock = threading.Lock()
+
+
+def _blocking_task(delay: float) -> int:
+    with _running_lock:
+        _running["now"] += 1
+        _running["peak"] = max(_running["peak"], _running["now"])
+    time.sleep(delay)
+    with _running_lock:
+        _running["now"] -= 1
+    return threading.get_ident()
+
+
+async def _run_executor_checks():
+    executor = CpuExecutor(thread_workers=4, process_workers=1, process_min_rows=100, max_concurrent=2)
+    try:
+        # Задачи выполняются в потоках, не более max_concurrent одновременно
+        started = time.perf_counter()
+        results = await asyncio.gather(*(executor.run(_blocking_task, 0.1) for _ in range(4)))
+        elapsed = time.perf_counter() - started
+        assert threading.get_ident() not in results
+        assert elapsed >= 0.2
+        assert _running["peak"] == 2
+
+        # Большие таблицы обрабатываются в отдельном процессе
+        stats = [YandexDirectStatistics(Device="MOBILE", Impressions=1, Clicks=1, Cost=1.0) for _ in range(100)]
+        frame = await executor.run(_calculate_dimension_statistics, stats, "Device", rows=len(stats))
+        assert frame['Impressions'].tolist() == [100]
+        assert executor._processes is not None
+    finally:
+        executor.shutdown()
+
+
+async def _run_monitor_checks():
+    monitor = LoopLagMonitor(interval=0.05, warning_threshold=0.1)
+    monitor.start()
+    await asyncio.sleep(0.1)
+    time.sleep(0.3)  # Блокируем цикл событий
+    await asyncio.sleep(0.1)
+    await monitor.stop()
+    assert monitor.max_lag >= 0.2
+    assert monitor.slow_checks >= 1
+
+
+def test_cpu_executor():
+    asyncio.run(_run_executor_checks())
+    print("✓ Обработка выполняется в пуле потоков и процессов с ограничением параллельности")
+
+
+def test_loop_lag_monitor():
+    asyncio.run(_run_monitor_checks())
+    print("✓ Блокировка цикла событий обнаруживается")
+
+
+if __name__ == "__main__":
+    test_cpu_executor()
+    test_loop_lag_monitor()
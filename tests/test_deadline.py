@@ -0,0 +1,128 @@
+import os
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в PYTHONPATH
+root_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, root_dir)
+os.chdir(root_dir)  # Меняем текущую директорию на корневую
+
+import asyncio
+import time
+
+import pytest
+
+from benchmarks.fake_yandex_server import FakeServerConfig, FakeYandexDirectServer, TOKEN_PREFIX
+from connectors.yandex_direct import YandexDirectAPI, _retry_in
+from models.account import Account
+from modules.yandex_direct.yandex_direct_report_builder import YandexDirectReportBuilder
+from services.deadline import DeadlineExceeded, LATE_TEXT, report_deadline, time_left, within_deadline
+
+
+async def _run_deadline_checks():
+    assert time_left() is None
+    assert await within_deadline(asyncio.sleep(0, result=1)) == 1
+
+    started = []
+
+    async def slow(delay: float) -> float:
+        started.append(delay)
+        await asyncio.sleep(delay)
+        return delay
+
+    with report_deadline(0.1):
+        assert await within_deadline(slow(0.01)) == 0.01
+        begin = time.perf_counter()
+        with pytest.raises(DeadlineExceeded):
+            await within_deadline(slow(10))
+        assert time.perf_counter() - begin < 0.2
+
+        # После срока корутина не запускается
+        with pytest.raises(DeadlineExceeded):
+            await within_deadline(slow(0))
+        assert started == [0.01, 10]
+
+        # Вложенный срок не продлевает внешний
+        with report_deadline(100):
+            assert time_left() == 0
+    assert time_left() is None
+
+    # Срок наследуется задачами, созданными внутри отчета
+    with report_deadline(5):
+        assert 4 < await asyncio.create_task(asyncio.sleep(0, result=time_left())) <= 5
+
+
+def test_within_deadline():
+    asyncio.run(_run_deadline_checks())
+    print("✓ Ожидание ограничено сроком отчета, после срока запросы не запускаются")
+
+
+class _SlowAccountsBuilder(YandexDirectReportBuilder):
+    """Запросы аккаунтов с логином slow-* не завершаются до срока"""
+
+    async def _make_api_request(self, api_func, *args, **kwargs):
+        if api_func.__self__._login.startswith("slow"):
+            await asyncio.sleep(10)
+        return await api_func(*args, **kwargs)
+
+
+def _account(login: str) -> Account:
+    return Account(account_name=login, source="YANDEX_DIRECT",
+                   auth={"login": login, "token": f"{TOKEN_PREFIX}{login}", "goals": [1]})
+
+
+def test_report_partial_results(monkeypatch):
+    """По истечении срока отчет выводится по полученным данным, остальные аккаунты отмечаются"""
+    async def run():
+        async with FakeYandexDirectServer(FakeServerConfig(offline_polls=0)) as server:
+            monkeypatch.setattr(YandexDirectAPI, "BUDGETS_URL", server.budgets_url)
+            monkeypatch.setattr(YandexDirectAPI, "REPORTS_URL", server.reports_url)
+            builder = _SlowAccountsBuilder()
+            accounts = [_account("fast-1"), _account("slow-1"), _account("fast-2")]
+            started = time.perf_counter()
+            with report_deadline(1):
+                budgets = await builder.fetch_budgets(accounts)
+            with report_deadline(1):
+                summary = await builder.fetch_summary_statistics(accounts, "2024-01-01", "2024-01-01")
+            return budgets, summary, time.perf_counter() - started
+
+    budgets, summary, elapsed = asyncio.run(run())
+    assert elapsed < 4
+    lines = budgets.split("\n\n")
+    assert "₽" in lines[0] and "₽" in lines[2]
+    assert lines[1] == f"*slow-1* - {LATE_TEXT}"
+    blocks = summary.split("\n\n")
+    assert "Показы" in blocks[0] and "Показы" in blocks[2]
+    assert f"Баланс: {LATE_TEXT}\n{LATE_TEXT}" in blocks[1]
+    print(f"✓ Отчет готов за {elapsed:.1f} с, медленный аккаунт отмечен \"{LATE_TEXT}\"")
+
+
+def test_offline_report_max_wait(monkeypatch):
+    """Ожидание офлайн-отчета ограничено, бесконечные ответы 201/202 завершаются ошибкой"""
+    async def run():
+        async with FakeYandexDirectServer(FakeServerConfig(offline_polls=1000, retry_in=0.01)) as server:
+            monkeypatch.setattr(YandexDirectAPI, "REPORTS_URL", server.reports_url)
+            monkeypatch.setattr(YandexDirectAPI, "OFFLINE_MAX_WAIT", 0.1)
+            api = YandexDirectAPI("bench-1", f"{TOKEN_PREFIX}bench-1")
+            with pytest.raises(asyncio.TimeoutError, match="не сформирован"):
+                await api.get_statistics(
+                    "2024-01-01", "2024-01-01", [], ["AUTO"], ["Impressions"], "CUSTOM_REPORT", True
+                )
+
+    asyncio.run(run())
+    print("✓ Ожидание офлайн-отчета прервано")
+
+
+def test_retry_in_header():
+    """Некорректный заголовок retryIn не прерывает отчет, пауза не выходит за срок"""
+    assert _retry_in({"retryIn": "5"}, 2) == 5
+    assert _retry_in({}, 2) == 2
+    for value in ("", "скоро", "nan", "-1"):
+        assert _retry_in({"retryIn": value}, 2) == 2
+
+    async def run():
+        with report_deadline(0.5):
+            return _retry_in({"retryIn": "60"}, 2)
+
+    assert 0 < asyncio.run(run()) <= 0.5
+    print("✓ Пауза из retryIn разбирается безопасно и ограничена сроком отчета")
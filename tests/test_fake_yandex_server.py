@@ -0,0 +1,76 @@
+import os
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в PYTHONPATH
+root_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, root_dir)
+os.chdir(root_dir)  # Меняем текущую директорию на корневую
+
+import asyncio
+
+import pytest
+
+from benchmarks.fake_yandex_server import FakeServerConfig, FakeYandexDirectServer, TOKEN_PREFIX
+from connectors.exceptions import YandexDirectRateLimitError
+from connectors.retry import RetryPolicy
+from connectors.yandex_direct import YandexDirectAPI
+
+
+def _use_server(monkeypatch, server: FakeYandexDirectServer, page_limit: int = 50000) -> None:
+    monkeypatch.setattr(YandexDirectAPI, "BUDGETS_URL", server.budgets_url)
+    monkeypatch.setattr(YandexDirectAPI, "REPORTS_URL", server.reports_url)
+    monkeypatch.setattr(YandexDirectAPI, "PAGE_LIMIT", page_limit)
+
+
+def test_statistics_offline_and_pagination(monkeypatch):
+    """Коннектор ждет по retryIn и собирает отчет из нескольких страниц"""
+    async def run():
+        config = FakeServerConfig(rows_per_report=25, offline_polls=2, retry_in=0.01)
+        async with FakeYandexDirectServer(config) as server:
+            _use_server(monkeypatch, server, page_limit=10)
+            api = YandexDirectAPI("bench-1", f"{TOKEN_PREFIX}bench-1")
+            rows = await api.get_statistics(
+                "2024-01-01", "2024-01-07", [1, 2], ["AUTO"], ["Date", "Impressions", "Clicks", "Cost", "Conversions"],
+                "CUSTOM_REPORT", True,
+            )
+            return rows, server.summary()
+
+    rows, calls = asyncio.run(run())
+    assert len(rows) == 25
+    assert {row.Date for row in rows} == {f"2024-01-0{day}" for day in range(1, 8)}
+    # Три страницы, каждая - новый отчет: два ответа 201/202 и ответ с данными
+    assert calls["reports"] == 3
+    assert calls["offline"] == 6
+    print(f"✓ Отчет из {len(rows)} строк собран за {calls['total']} запросов")
+
+
+def test_budgets(monkeypatch):
+    async def run():
+        async with FakeYandexDirectServer() as server:
+            _use_server(monkeypatch, server)
+            budget = await YandexDirectAPI("bench-2", f"{TOKEN_PREFIX}bench-2").get_budgets(include_vat=False)
+            return budget, server.summary()
+
+    budget, calls = asyncio.run(run())
+    assert budget.budget >= 0
+    assert calls["budgets"] == 1
+    print(f"✓ Бюджет: {budget.budget}")
+
+
+def test_rate_limit_error(monkeypatch):
+    """Ошибка превышения лимита приходит с кодом 429 и после исчерпания повторов поднимается коннектором"""
+    async def run():
+        async with FakeYandexDirectServer(FakeServerConfig(offline_polls=0, rate_limit_every=1)) as server:
+            _use_server(monkeypatch, server)
+            retry = RetryPolicy(attempts=2, base_delay=0.001, max_delay=0.001)
+            api = YandexDirectAPI("bench-3", f"{TOKEN_PREFIX}bench-3", retry_policy=retry)
+            with pytest.raises(YandexDirectRateLimitError, match="429"):
+                await api.get_statistics(
+                    "2024-01-01", "2024-01-01", [], ["AUTO"], ["Impressions"], "CUSTOM_REPORT", True
+                )
+            return server.summary()
+
+    calls = asyncio.run(run())
+    assert calls["errors"] == 2
+    print("✓ Ошибка лимита обработана")
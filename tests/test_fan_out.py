@@ -0,0 +1,123 @@
+import os
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в PYTHONPATH
+root_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, root_dir)
+os.chdir(root_dir)  # Меняем текущую директорию на корневую
+
+import asyncio
+import random
+from contextlib import aclosing
+
+import pytest
+
+from services.fan_out import fan_out, fan_out_list
+
+
+async def _run_order_checks():
+    active = 0
+    max_active = 0
+    rng = random.Random(0)
+
+    async def handle(item: int) -> int:
+        nonlocal active, max_active
+        active += 1
+        max_active = max(max_active, active)
+        await asyncio.sleep(rng.uniform(0, 0.01))
+        active -= 1
+        if item % 7 == 0:
+            raise ValueError(item)
+        return item * 2
+
+    results = await fan_out_list(range(100), handle, workers=5)
+    assert max_active == 5
+    assert len(results) == 100
+    for item, result in enumerate(results):
+        if item % 7 == 0:
+            assert isinstance(result, ValueError) and result.args == (item,)
+        else:
+            assert result == item * 2
+
+    assert await fan_out_list([], handle, workers=5) == []
+
+
+def test_fan_out_order_and_concurrency():
+    asyncio.run(_run_order_checks())
+    print("✓ Результаты возвращаются в порядке элементов, одновременно работает не больше workers корутин")
+
+
+async def _run_back_pressure_checks():
+    pulled = []
+
+    def items():
+        for i in range(1000):
+            pulled.append(i)
+            yield i
+
+    async def handle(item: int) -> int:
+        return item
+
+    stream = fan_out(items(), handle, workers=2, window=4)
+    assert await stream.__anext__() == 0
+    # Потребитель не забирает результаты: воркеры останавливаются, заполнив окно
+    await asyncio.sleep(0.05)
+    assert len(pulled) <= 5
+    await stream.aclose()
+
+    # Медленный первый элемент не дает воркерам уйти дальше окна
+    started = []
+    release = asyncio.Event()
+
+    async def slow_first(item: int) -> int:
+        started.append(item)
+        if item == 0:
+            await release.wait()
+        return item
+
+    task = asyncio.create_task(fan_out_list(range(100), slow_first, workers=3, window=6))
+    await asyncio.sleep(0.05)
+    assert len(started) == 6
+    release.set()
+    assert await task == list(range(100))
+
+
+def test_fan_out_back_pressure():
+    asyncio.run(_run_back_pressure_checks())
+    print("✓ Воркеры не забирают элементы, пока потребитель не освободит окно результатов")
+
+
+async def _run_cancel_checks():
+    cancelled = 0
+
+    async def handle(item: int) -> int:
+        nonlocal cancelled
+        try:
+            await asyncio.sleep(0 if item == 0 else 10)
+        except asyncio.CancelledError:
+            cancelled += 1
+            raise
+        return item
+
+    async with aclosing(fan_out(range(10), handle, workers=3)) as stream:
+        async for result in stream:
+            assert result == 0
+            break
+    # Воркеры отменяются, когда потребитель прекращает итерацию
+    assert cancelled == 3
+
+    def broken_items():
+        yield 1
+        raise RuntimeError("items")
+
+    with pytest.raises(RuntimeError):
+        await fan_out_list(broken_items(), handle, workers=2)
+
+    with pytest.raises(ValueError):
+        await fan_out_list([1], handle, workers=0)
+
+
+def test_fan_out_cancel():
+    asyncio.run(_run_cancel_checks())
+    print("✓ Незавершенные воркеры отменяются, ошибка итератора элементов передается потребителю")
@@ -0,0 +1,84 @@
+import os
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в PYTHONPATH
+root_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, root_dir)
+os.chdir(root_dir)  # Меняем текущую директорию на корневую
+
+import random
+
+import numpy as np
+import pytest
+
+from modules.yandex_direct import lean_stat_processor
+from modules.yandex_direct.lean_stat_processor import round2
+from modules.yandex_direct.pandas_stat_proccessor import proccess_data, proccess_accounts_data
+
+
+def _random_data(rng: random.Random, rows: int) -> list[dict]:
+    data = []
+    for _ in range(rows):
+        data.append({
+            'CampaignName': rng.choice(['A', 'B', 'C', None]),
+            'Date': f"2024-01-0{rng.randint(1, 9)}",
+            'Impressions': rng.randint(0, 5000),
+            'Clicks': rng.randint(0, 300),
+            'Cost': round(rng.uniform(0, 4000), 2) if rng.random() > 0.1 else 0,
+            'Conversions': rng.randint(0, 3),
+            'Sessions': rng.randint(0, 50),
+            'Bounces': rng.randint(0, 30),
+            'account_id': rng.randint(0, 5),
+        })
+    return data
+
+
+def test_round2_matches_numpy():
+    """Округление совпадает с pandas/numpy, в том числе на значениях ровно посередине"""
+    rng = random.Random(0)
+    values = [0.125, 0.135, 2.675, 1.005, 0.285, 5.015, 1234.565] + [rng.uniform(0, 10000) for _ in range(10000)]
+    assert [round2(v) for v in values] == np.round(np.array(values), 2).tolist()
+    print("✓ round2 совпадает с numpy")
+
+
+@pytest.mark.parametrize("group_by", [None, 'CampaignName', 'Date', 'Missing'])
+def test_backends_match(group_by):
+    """Облегченный расчет и pandas дают одинаковый результат"""
+    rng = random.Random(42)
+    for _ in range(100):
+        data = _random_data(rng, rng.randint(0, 40))
+        assert proccess_data(data, group_by, backend='lean') == proccess_data(data, group_by, backend='pandas')
+    print(f"✓ Результаты совпадают, группировка: {group_by}")
+
+
+def test_backends_match_missing_values():
+    data = [
+        {'CampaignName': 'A', 'Impressions': 1000, 'Clicks': 100, 'Cost': 1000, 'Conversions': 0},
+        {'CampaignName': 'A', 'Impressions': 2000, 'Clicks': 200, 'Cost': 2000, 'Conversions': 20},
+        {'CampaignName': 'B', 'Impressions': 0, 'Clicks': 0, 'Cost': 0, 'Conversions': 0},
+    ]
+    for group_by in (None, 'CampaignName'):
+        assert proccess_data(data, group_by, backend='lean') == proccess_data(data, group_by, backend='pandas')
+    assert proccess_data([], backend='lean') == proccess_data([], backend='pandas') == []
+    print("✓ Отсутствующие метрики обрабатываются одинаково")
+
+
+def test_accounts_backends_match():
+    rng = random.Random(7)
+    for _ in range(50):
+        data = _random_data(rng, rng.randint(0, 40))
+        account_ids = list(range(7))
+        assert proccess_accounts_data(data, account_ids, backend='lean') == \
+            proccess_accounts_data(data, account_ids, backend='pandas')
+    print("✓ Итоги по аккаунтам совпадают")
+
+
+def test_backend_selection(monkeypatch):
+    calls = []
+    monkeypatch.setattr(lean_stat_processor, "proccess_data", lambda data, group_by: calls.append(len(data)) or [])
+    proccess_data([{'Impressions': 1}])
+    assert calls == [1]
+    with pytest.raises(ValueError):
+        proccess_data([], backend='unknown')
+    print("✓ Небольшие наборы данных считаются без pandas")
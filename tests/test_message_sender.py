@@ -0,0 +1,69 @@
+import os
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в PYTHONPATH
+root_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, root_dir)
+os.chdir(root_dir)  # Меняем текущую директорию на корневую
+
+
+import asyncio
+
+from aiogram.exceptions import TelegramRetryAfter, TelegramBadRequest
+from aiogram.methods import SendMessage
+
+from bot.sender import MessageSender
+
+
+class FakeBot:
+    """Записывает время отправки сообщений и может вернуть флуд-контроль на заданное сообщение"""
+
+    def __init__(self, retry_after_text: str | None = None):
+        self.sent = []
+        self.retry_after_text = retry_after_text
+
+    async def send_message(self, chat_id: int, text: str, **kwargs):
+        if text == self.retry_after_text:
+            self.retry_after_text = None
+            raise TelegramRetryAfter(SendMessage(chat_id=chat_id, text=text), "Too Many Requests", retry_after=0.2)
+        if text == "bad":
+            raise TelegramBadRequest(SendMessage(chat_id=chat_id, text=text), "can't parse entities")
+        self.sent.append((chat_id, text, asyncio.get_running_loop().time()))
+        return text
+
+
+async def _send_and_check_pacing():
+    sender = MessageSender(global_rate=100, chat_interval=0.05)
+    bot = FakeBot(retry_after_text="1-1")
+    futures = [sender.send_message(bot, chat_id, f"{chat_id}-{i}") for i in range(3) for chat_id in (1, 2)]
+    bad_future = sender.send_message(bot, 3, "bad")
+    await asyncio.gather(*futures)
+    await asyncio.gather(bad_future, return_exceptions=True)
+    await sender.stop()
+    return bot.sent, bad_future
+
+
+def test_message_sender_keeps_order_and_pacing():
+    sent, bad_future = asyncio.run(_send_and_check_pacing())
+
+    for chat_id in (1, 2):
+        chat_messages = [(text, sent_at) for sent_chat_id, text, sent_at in sent if sent_chat_id == chat_id]
+        # Порядок сообщений в чате сохраняется, в том числе после повтора из-за флуд-контроля
+        assert [text for text, _ in chat_messages] == [f"{chat_id}-{i}" for i in range(3)]
+        # Интервал между сообщениями одного чата не меньше заданного
+        intervals = [b - a for (_, a), (_, b) in zip(chat_messages, chat_messages[1:])]
+        assert all(interval >= 0.049 for interval in intervals)
+
+    # Повтор после флуд-контроля выполняется не раньше retry_after
+    chat_1_times = [sent_at for chat_id, _, sent_at in sent if chat_id == 1]
+    chat_2_times = [sent_at for chat_id, _, sent_at in sent if chat_id == 2]
+    assert chat_1_times[1] - chat_2_times[0] >= 0.19
+
+    # Ошибка запроса не повторяется и возвращается через Future
+    assert isinstance(bad_future.exception(), TelegramBadRequest)
+    print("✓ Очередь сообщений соблюдает порядок и лимиты")
+
+
+if __name__ == "__main__":
+    test_message_sender_keeps_order_and_pacing()
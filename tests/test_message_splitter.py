@@ -0,0 +1,47 @@
+import os
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в PYTHONPATH
+root_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, root_dir)
+os.chdir(root_dir)  # Меняем текущую директорию на корневую
+
+
+from bot.message_splitter import split_message, is_markdown_balanced, escape_markdown
+
+
+def _account_block(i: int) -> str:
+    return f"•*Аккаунт {i}*\n" + "".join(f"Метрика {j}: `{i * j}`\n" for j in range(11)) + "\n"
+
+
+def test_split_message_packs_blocks():
+    report = "".join(_account_block(i) for i in range(100))
+    messages = split_message(report, limit=4096)
+
+    assert all(len(message) <= 4096 for message in messages)
+    assert all(is_markdown_balanced(message) for message in messages)
+    # Блоки не разрываются: каждое сообщение начинается с заголовка аккаунта
+    assert all(message.startswith("•*Аккаунт") for message in messages)
+    # Блоки упакованы плотно: сообщений не больше, чем нужно по длине с запасом на один блок
+    assert len(messages) <= len(report) // (4096 - len(_account_block(99))) + 1
+    assert "".join(messages).replace("\n", "") == report.replace("\n", "")
+    print(f"✓ Отчет из 100 аккаунтов упакован в {len(messages)} сообщений")
+
+
+def test_split_message_escapes_broken_markdown():
+    messages = split_message("*ok*\n\nРасход_без конверсий *bold\n\n`code`")
+    assert messages == ["*ok*\n\nРасход\\_без конверсий \\*bold\n\n`code`"]
+
+    # Строка длиннее лимита режется с экранированием и без отрыва обратной косой черты
+    long_line = "*" + "а_" * 30 + "*"
+    messages = split_message(long_line, limit=10)
+    assert all(len(message) <= 10 for message in messages)
+    assert all(is_markdown_balanced(message) and not message.endswith("\\") for message in messages)
+    assert "".join(messages) == escape_markdown(long_line)
+    print("✓ Незакрытая разметка экранируется")
+
+
+if __name__ == "__main__":
+    test_split_message_packs_blocks()
+    test_split_message_escapes_broken_markdown()
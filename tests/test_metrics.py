@@ -0,0 +1,82 @@
+import os
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в PYTHONPATH
+root_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, root_dir)
+os.chdir(root_dir)  # Меняем текущую директорию на корневую
+
+import asyncio
+
+import aiohttp
+
+from services.metrics import MetricsRegistry
+from services.metrics_server import start_metrics_server
+
+
+def _registry() -> MetricsRegistry:
+    registry = MetricsRegistry()
+    requests = registry.histogram("api_request_seconds", "Длительность запроса", ["endpoint"], buckets=(0.1, 1.0))
+    requests.observe(0.05, endpoint="reports")
+    requests.observe(0.5, endpoint="reports")
+    requests.observe(5, endpoint="reports")
+    registry.counter("rows_total", "Строки").inc(10)
+    registry.gauge("lag_seconds", "Задержка").set(0.25)
+    return registry
+
+
+def test_metrics_render():
+    text = _registry().render()
+
+    assert "# TYPE api_request_seconds histogram" in text
+    assert 'api_request_seconds_bucket{endpoint="reports",le="0.1"} 1' in text
+    assert 'api_request_seconds_bucket{endpoint="reports",le="1"} 2' in text
+    assert 'api_request_seconds_bucket{endpoint="reports",le="+Inf"} 3' in text
+    assert 'api_request_seconds_sum{endpoint="reports"} 5.55' in text
+    assert 'api_request_seconds_count{endpoint="reports"} 3' in text
+    assert "rows_total 10" in text
+    assert "lag_seconds 0.25" in text
+    print("✓ Метрики выводятся в формате Prometheus")
+
+
+async def _fetch_metrics() -> str:
+    runner = await start_metrics_server("127.0.0.1", 0, _registry())
+    try:
+        host, port = runner.addresses[0][:2]
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"http://{host}:{port}/metrics") as response:
+                assert response.status == 200
+                return await response.text()
+    finally:
+        await runner.cleanup()
+
+
+def test_metrics_endpoint():
+    text = asyncio.run(_fetch_metrics())
+    assert "rows_total 10" in text
+    print("✓ Эндпоинт /metrics отдает метрики")
+
+
+async def _start_on_busy_port() -> None:
+    runner = await start_metrics_server("127.0.0.1", 0, _registry())
+    try:
+        port = runner.addresses[0][1]
+        try:
+            await start_metrics_server("127.0.0.1", port, _registry())
+        except OSError:
+            return
+        raise AssertionError("Ожидалась ошибка OSError для занятого порта")
+    finally:
+        await runner.cleanup()
+
+
+def test_metrics_busy_port():
+    asyncio.run(_start_on_busy_port())
+    print("✓ Занятый порт приводит к OSError, а не к зависшему серверу")
+
+
+if __name__ == "__main__":
+    test_metrics_render()
+    test_metrics_endpoint()
+    test_metrics_busy_port()
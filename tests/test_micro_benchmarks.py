@@ -0,0 +1,35 @@
+import os
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в PYTHONPATH
+root_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, root_dir)
+os.chdir(root_dir)  # Меняем текущую директорию на корневую
+
+from benchmarks import micro_benchmarks
+from benchmarks.micro_benchmarks import CASES, Dataset, compare, run
+
+
+def test_cases_run_on_small_dataset():
+    """Все замеряемые функции выполняются на сгенерированном наборе данных"""
+    data = Dataset(20)
+    assert len(data.statistics) == 20
+    assert sum(len(stats) for stats in data.account_statistics) == 20
+    for name, case in CASES.items():
+        assert case(data) is not None, name
+    print(f"✓ Замеров: {len(CASES)}")
+
+
+def test_save_and_compare_baseline(tmp_path, monkeypatch):
+    monkeypatch.setattr(micro_benchmarks, "BASELINES_DIR", tmp_path)
+    results = run([10], ["parse_statistics_tsv"], repeat=1, min_time=0.001)
+    micro_benchmarks.save_baseline("test", results)
+    baseline = micro_benchmarks.load_baseline("test")
+    assert set(baseline["parse_statistics_tsv"]) == {"10"}
+
+    # Замедление в 10 раз считается регрессией
+    slower = {"parse_statistics_tsv": {"10": baseline["parse_statistics_tsv"]["10"] * 10}}
+    assert compare(results, baseline, max_regression=1.5)
+    assert not compare(slower, baseline, max_regression=1.5)
+    print("✓ Сравнение с сохраненными результатами")
@@ -16,7 +16,7 @@ from pathlib import Path
 root_dir = str(Path(__file__).parent.parent)
 sys.path.insert(0, root_dir)
 
-from modules.yandex_direct.pandas_stat_proccessor import proccess_data
+from modules.yandex_direct.pandas_stat_proccessor import proccess_data, proccess_accounts_data, calculate_statistics, render_statistics, sort_statistics, paginate_statistics
 
 
 def test_proccess_data_with_grouping():
@@ -37,6 +37,75 @@ def test_proccess_data_with_zero_values():
     result = proccess_data(test_data)
     print(result)
 
+def test_proccess_accounts_data():
+    test_data = [
+        {'account_id': 0, 'Impressions': 1000, 'Clicks': 100, 'Cost': 1000.0, 'Conversions': 10, 'Sessions': 90, 'Bounces': 9},
+        {'account_id': 0, 'Impressions': 1000, 'Clicks': 100, 'Cost': 1000.0, 'Conversions': 10, 'Sessions': 90, 'Bounces': 9},
+        {'account_id': 2, 'Impressions': 500, 'Clicks': 0, 'Cost': 3000.0, 'Conversions': 0, 'Sessions': 10, 'Bounces': 5},
+    ]
+    
+    account_totals, grand_total = proccess_accounts_data(test_data, [0, 1, 2])
+    
+    assert len(account_totals) == 3
+    assert account_totals[0]['Показы'] == '2000'
+    assert account_totals[0]['CPA'] == '100.0'
+    # Аккаунт без строк получает нулевые показатели
+    assert account_totals[1]['Показы'] == '0'
+    assert account_totals[2]['Расход'] == '3000.0 ⚠️'
+    assert account_totals[2]['Процент отказов'] == '50.0 🔴'
+    assert grand_total['Показы'] == '2500'
+    assert grand_total['Конверсии'] == '20'
+    assert grand_total['Расход'] == '5000.0'
+    assert grand_total['CPA'] == '250.0'
+    print(account_totals, grand_total)
+
+def test_calculate_statistics_keeps_numbers():
+    test_data = [
+        {'CampaignName': 'A', 'Impressions': 1000, 'Clicks': 100, 'Cost': 3000.0, 'Conversions': 0, 'Sessions': 10, 'Bounces': 1},
+        {'CampaignName': 'B', 'Impressions': 1000, 'Clicks': 10, 'Cost': 100.0, 'Conversions': 2, 'Sessions': 10, 'Bounces': 5},
+    ]
+    
+    df = calculate_statistics(test_data, group_by='CampaignName')
+    
+    # Метрики остаются числовыми, проблемные строки отмечены флагами
+    assert df['Cost'].dtype == 'float64'
+    assert df['BounceRate'].dtype == 'float64'
+    assert df['CostWarning'].tolist() == [True, False]
+    assert df['HighBounceRate'].tolist() == [False, True]
+    assert df.sort_values('CPA')['CampaignName'].tolist() == ['A', 'B']
+    
+    rendered = render_statistics(df)
+    assert rendered[0]['Расход'] == '3000.0 ⚠️'
+    assert rendered[1]['Процент отказов'] == '50.0 🔴'
+    assert 'CostWarning' not in rendered[0]
+    # Рендеринг не изменяет числовой результат
+    assert df['Cost'].dtype == 'float64'
+
+def test_sort_and_paginate_statistics():
+    test_data = [
+        {'CampaignName': f'C{i}', 'Impressions': 100, 'Clicks': 10, 'Cost': float(i * 100), 'Conversions': i % 3}
+        for i in range(25)
+    ]
+    df = sort_statistics(calculate_statistics(test_data, group_by='CampaignName'), 'Cost')
+    
+    page_df, pages = paginate_statistics(df, 'CampaignName', 0, 10, others_label='Остальные ({count})')
+    assert pages == 3
+    assert page_df['CampaignName'].tolist()[:2] == ['C24', 'C23']
+    # Строки после страницы свернуты в одну с пересчитанными метриками
+    others = page_df.iloc[-1]
+    assert others['CampaignName'] == 'Остальные (15)'
+    assert others['Cost'] == float(sum(i * 100 for i in range(15)))
+    assert others['CPC'] == round(others['Cost'] / others['Clicks'], 2)
+    
+    # На последней странице свернутой строки нет, номер страницы ограничивается числом страниц
+    last_page_df, _ = paginate_statistics(df, 'CampaignName', 10, 10, others_label='Остальные ({count})')
+    assert len(last_page_df) == 5
+    
+    # При сортировке по CPA строки без конверсий идут в конце
+    by_cpa = sort_statistics(df, 'CPA', ascending=True)
+    assert (by_cpa['Conversions'].iloc[-8:] == 0).all()
+    assert by_cpa['CPA'].iloc[0] == by_cpa.loc[by_cpa['Conversions'] > 0, 'CPA'].min()
+
 def run_tests():
     print("Запуск тестов pandas_stat_processor...")
     
@@ -46,6 +115,15 @@ def run_tests():
     test_proccess_data_with_zero_values()
     print("✓ Тест с нулевыми значениями пройден")
     
+    test_proccess_accounts_data()
+    print("✓ Тест обработки нескольких аккаунтов пройден")
+    
+    test_calculate_statistics_keeps_numbers()
+    print("✓ Тест числового результата и отдельного форматирования пройден")
+    
+    test_sort_and_paginate_statistics()
+    print("✓ Тест сортировки и постраничного вывода пройден")
+    
     print("Все тесты pandas_stat_processor пройдены успешно!")
 
 if __name__ == "__main__":
@@ -0,0 +1,109 @@
+import os
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в PYTHONPATH
+root_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, root_dir)
+os.chdir(root_dir)  # Меняем текущую директорию на корневую
+
+import asyncio
+
+from benchmarks.fake_yandex_server import FakeServerConfig, FakeYandexDirectServer, TOKEN_PREFIX
+from connectors.yandex_direct import YandexDirectAPI
+from models.account import Account
+from models.yandex_direct import YandexDirectBudget, YandexDirectStatistics
+from modules.yandex_direct.summary_progress import SummaryProgress
+from modules.yandex_direct.yandex_direct_report_builder import YandexDirectReportBuilder
+from services.progress import ProgressReporter
+
+
+def _account(login: str) -> Account:
+    return Account(account_name=login, source="YANDEX_DIRECT",
+                   auth={"login": login, "token": f"{TOKEN_PREFIX}{login}", "goals": [1]})
+
+
+async def _run_reporter_checks():
+    published = []
+
+    async def publish(text: str):
+        published.append(text)
+
+    progress = ProgressReporter(publish, interval=0.05)
+    # Первое обновление публикуется сразу, следующие - не чаще интервала, публикуется последнее состояние
+    for i in range(100):
+        progress.update(lambda i=i: f"готово {i}")
+        await asyncio.sleep(0.002)
+    await asyncio.sleep(0.1)
+    assert published[0] == "готово 0"
+    assert published[-1] == "готово 99"
+    assert 2 <= len(published) <= 15
+
+    # Одинаковый текст повторно не публикуется, после close() обновления игнорируются
+    count = len(published)
+    progress.update(lambda: "готово 99")
+    await asyncio.sleep(0.1)
+    assert len(published) == count
+    progress.update(lambda: "после закрытия")
+    await progress.close()
+    progress.update(lambda: "после закрытия")
+    await asyncio.sleep(0.1)
+    assert published[-1] == "готово 99"
+
+
+def test_progress_reporter():
+    asyncio.run(_run_reporter_checks())
+    print("✓ Промежуточный отчет публикуется не чаще интервала")
+
+
+def test_summary_progress():
+    progress = SummaryProgress(3)
+    stats = [YandexDirectStatistics(Impressions=100, Clicks=10, Cost=50.0, Conversions=1, Sessions=8, Bounces=2)]
+    progress.add(_account("a"), stats, YandexDirectBudget(budget=5000.0))
+    progress.add(_account("b"), ValueError("нет доступа"), YandexDirectBudget(budget=100.0))
+    progress.add(_account("c"), stats * 2, ValueError("ошибка"))
+    text = progress.render()
+    assert "`3/3` аккаунтов готово" in text
+    assert "*Итого по готовым аккаунтам (3)*\nПоказы: `300`" in text
+    assert "❌ `нет доступа`" in text
+
+    # Блоки, не помещающиеся в сообщение, заменяются числом
+    small = SummaryProgress(50, limit=1500)
+    for i in range(50):
+        small.add(_account(f"account-{i}"), stats, YandexDirectBudget(budget=5000.0))
+    text = small.render()
+    assert len(text) <= 1500
+    assert "…и еще готовых аккаунтов" in text
+    assert "*Итого по готовым аккаунтам (50)*\nПоказы: `5000`" in text
+
+    hidden = SummaryProgress(2, show_accounts=False)
+    hidden.add(_account("a"), stats, None)
+    assert "•*a*" not in hidden.render()
+    print("✓ Промежуточный сводный отчет: счетчик, итог и блоки аккаунтов")
+
+
+def test_summary_report_progress(monkeypatch):
+    """Сводный отчет передает промежуточные результаты по мере готовности аккаунтов"""
+    async def run():
+        async with FakeYandexDirectServer(FakeServerConfig(offline_polls=0)) as server:
+            monkeypatch.setattr(YandexDirectAPI, "BUDGETS_URL", server.budgets_url)
+            monkeypatch.setattr(YandexDirectAPI, "REPORTS_URL", server.reports_url)
+            published = []
+
+            async def publish(text: str):
+                published.append(text)
+
+            progress = ProgressReporter(publish, interval=0)
+            accounts = [_account(f"bench-{i}") for i in range(5)]
+            report = await YandexDirectReportBuilder().fetch_summary_statistics(
+                accounts, "2024-01-01", "2024-01-01", progress=progress
+            )
+            await asyncio.sleep(0.05)
+            await progress.close()
+            return report, published
+
+    report, published = asyncio.run(run())
+    assert published
+    assert "`5/5` аккаунтов готово" in published[-1]
+    assert "Итого по всем аккаунтам" in report
+    print(f"✓ Сообщение о подготовке обновлено {len(published)} раз")
@@ -0,0 +1,75 @@
+import os
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в PYTHONPATH
+root_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, root_dir)
+os.chdir(root_dir)  # Меняем текущую директорию на корневую
+
+import asyncio
+
+import pytest
+
+from enums.sources import Source
+from modules import chart_renderer
+from modules.report_cache import CachedReport, detailed_report_cache, chart_cache
+from modules.yandex_direct import yandex_direct_report_builder
+from modules.yandex_direct.pandas_stat_proccessor import calculate_statistics
+from modules.yandex_direct.yandex_direct_report_builder import YandexDirectReportBuilder
+
+
+def _cached_report(cost: float) -> str:
+    report = CachedReport(source=Source.YANDEX_DIRECT, title="Аккаунт", account_id=1,
+                          date_from="2025-01-01", date_to="2025-01-02")
+    report.frames['Date'] = calculate_statistics([
+        {'Date': '2025-01-02', 'Impressions': 100, 'Clicks': 10, 'Cost': cost, 'Conversions': 1},
+        {'Date': '2025-01-01', 'Impressions': 200, 'Clicks': 20, 'Cost': 200, 'Conversions': 2},
+    ], group_by='Date')
+    report.frames['Device'] = calculate_statistics([
+        {'Device': 'DESKTOP', 'Impressions': 100, 'Clicks': 10, 'Cost': 100, 'Conversions': 1},
+        {'Device': 'MOBILE', 'Impressions': 200, 'Clicks': 20, 'Cost': cost, 'Conversions': 2},
+    ], group_by='Device')
+    return detailed_report_cache.put(report)
+
+
+def test_charts_reuse_uploaded_file_ids(monkeypatch):
+    rendered = []
+
+    async def fake_render_charts(charts):
+        rendered.extend(charts)
+        return [b"png"] * len(charts)
+
+    monkeypatch.setattr(yandex_direct_report_builder, "render_charts", fake_render_charts)
+    builder = YandexDirectReportBuilder()
+
+    charts = asyncio.run(builder.render_charts(_cached_report(cost=100)))
+    assert [chart.content for chart in charts] == [b"png", b"png"]
+    assert [params["kind"] for params in rendered] == ["line", "bar"]
+    assert rendered[0]["labels"] == ["2025-01-01", "2025-01-02"]
+    for i, chart in enumerate(charts):
+        chart_cache.put(chart.key, f"file_{i}")
+
+    # Повторный отчет с теми же данными отправляется по file_id без отрисовки
+    rendered.clear()
+    charts = asyncio.run(builder.render_charts(_cached_report(cost=100)))
+    assert [chart.file_id for chart in charts] == ["file_0", "file_1"]
+    assert rendered == []
+
+    # Изменившиеся данные отрисовываются заново
+    charts = asyncio.run(builder.render_charts(_cached_report(cost=300)))
+    assert [chart.file_id for chart in charts] == [None, None]
+    assert len(rendered) == 2
+
+    assert asyncio.run(builder.render_charts("missing")) is None
+    print("✓ Загруженные графики используются повторно")
+
+
+@pytest.mark.skipif(not chart_renderer.CHARTS_AVAILABLE, reason="matplotlib не установлен")
+def test_render_chart_png():
+    image = chart_renderer.render_chart(
+        kind="bar", title="Расход", labels=["A", "B"], primary=("Расход", [1.0, 2.0]), secondary=("Конверсии", [0, 1])
+    )
+    assert image.startswith(b"\x89PNG")
+    print("✓ График отрисовывается в PNG")
+
@@ -0,0 +1,78 @@
+import os
+import sys
+from io import BytesIO
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в PYTHONPATH
+root_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, root_dir)
+os.chdir(root_dir)  # Меняем текущую директорию на корневую
+
+import pandas as pd
+
+from models.account import Account
+from models.yandex_direct import YandexDirectBudget, YandexDirectStatistics
+from modules.report_exporter import export_frames
+from modules.yandex_direct.pandas_stat_proccessor import calculate_statistics, export_statistics
+from modules.yandex_direct.summary_statistics_formatter import SummaryStatisticsFormatter
+
+
+def _account(name: str) -> Account:
+    return Account(account_name=name, source="YANDEX_DIRECT", auth={"login": name, "token": "t", "goals": [1]})
+
+
+def test_summary_export_frame():
+    accounts = [_account("a"), _account("b"), _account("c")]
+    statistics = [
+        [YandexDirectStatistics(Impressions=1000, Clicks=100, Cost=3000, Sessions=90, Bounces=10)],
+        [YandexDirectStatistics(Impressions=500, Clicks=50, Cost=500, Conversions_1="5", Sessions=40, Bounces=30)],
+        Exception("Ошибка API"),
+    ]
+    budgets = [YandexDirectBudget(budget=100.0), Exception("Нет доступа"), YandexDirectBudget(budget=50.5)]
+
+    frame = export_statistics(SummaryStatisticsFormatter.build_export_frame(accounts, statistics, budgets))
+
+    assert frame['Аккаунт'].tolist() == ["a", "b", "c", "Итого по всем аккаунтам"]
+    assert frame['Баланс'].isna().tolist() == [False, True, False, False]
+    assert frame['Баланс'].iloc[-1] == 150.5
+    assert frame['Ошибка'].tolist() == ["", "", "Ошибка API", ""]
+    assert frame['Расход'].tolist() == [3000.0, 500.0, 0.0, 3500.0]
+    assert frame['Расход без конверсий'].tolist() == [True, False, False, False]
+    print("✓ Сводный отчет собирается в числовую таблицу с итогом")
+
+
+def test_export_frames_formats():
+    campaigns = export_statistics(calculate_statistics(
+        [{'CampaignName': 'A', 'Impressions': 1000, 'Clicks': 100, 'Cost': 1000.5, 'Conversions': 10}],
+        group_by='CampaignName',
+    ))
+    devices = export_statistics(calculate_statistics(
+        [{'Device': 'MOBILE', 'Impressions': 10, 'Clicks': 1, 'Cost': 5, 'Conversions': 0}],
+        group_by='Device',
+    ))
+    sheets = {'Название кампании': campaigns, 'Устройство': devices}
+
+    csv_file = export_frames(sheets, "Аккаунт 2025-01-01 - 2025-01-07", "csv")
+    assert csv_file.filename == "Аккаунт_2025-01-01_-_2025-01-07.csv"
+    csv = pd.read_csv(BytesIO(csv_file.content), sep=";", encoding="utf-8-sig")
+    assert csv['Раздел'].tolist() == ['Название кампании', 'Устройство']
+    assert csv['Значение'].tolist() == ['A', 'MOBILE']
+    assert csv['Расход'].tolist() == [1000.5, 5.0]
+
+    html_file = export_frames(sheets, "Отчет", "html")
+    assert html_file.filename == "Отчет.html"
+    html = html_file.content.decode("utf-8")
+    assert "<h2>Устройство</h2>" in html and "MOBILE" in html
+
+    # Без openpyxl XLSX заменяется на CSV, с openpyxl - книга с листом на таблицу
+    xlsx_file = export_frames(sheets, "Отчет", "xlsx")
+    if xlsx_file.filename.endswith(".xlsx"):
+        assert pd.read_excel(BytesIO(xlsx_file.content), sheet_name=None).keys() == sheets.keys()
+    else:
+        assert xlsx_file.filename == "Отчет.csv"
+    print("✓ Отчет выгружается в CSV, HTML и XLSX")
+
+
+if __name__ == "__main__":
+    test_summary_export_frame()
+    test_export_frames_formats()
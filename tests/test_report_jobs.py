@@ -0,0 +1,117 @@
+import os
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в PYTHONPATH
+root_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, root_dir)
+os.chdir(root_dir)  # Меняем текущую директорию на корневую
+
+import asyncio
+
+import pytest
+
+from benchmarks.fake_yandex_server import FakeServerConfig, FakeYandexDirectServer, TOKEN_PREFIX
+from connectors.rate_limiter import RateLimiter
+from connectors.yandex_direct import YandexDirectAPI
+from services.report_jobs import ReportCancelled, ReportJobs
+
+
+async def _run_jobs_checks():
+    jobs = ReportJobs()
+    assert await jobs.run(1, asyncio.sleep(0, result="report")) == "report"
+    assert not jobs.active(1)
+    assert not jobs.cancel(1)
+
+    # Новый отчет в том же чате отменяет предыдущий, отчеты других чатов не затрагиваются
+    first = asyncio.create_task(jobs.run(1, asyncio.sleep(10)))
+    other = asyncio.create_task(jobs.run(2, asyncio.sleep(0.05, result="other")))
+    await asyncio.sleep(0)
+    assert jobs.active(1)
+    assert await jobs.run(1, asyncio.sleep(0, result="second")) == "second"
+    with pytest.raises(ReportCancelled):
+        await first
+    assert await other == "other"
+
+    # Кнопка "Отмена"
+    cancelled = asyncio.Event()
+
+    async def report():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    task = asyncio.create_task(jobs.run(3, report()))
+    await asyncio.sleep(0.01)
+    assert jobs.cancel(3)
+    with pytest.raises(ReportCancelled):
+        await task
+    assert cancelled.is_set()
+
+    # Отмена обработчика отменяет и отчет
+    cancelled.clear()
+    handler = asyncio.create_task(jobs.run(4, report()))
+    await asyncio.sleep(0.01)
+    handler.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await handler
+    await asyncio.sleep(0)
+    assert cancelled.is_set()
+    assert not jobs.active(4)
+
+
+def test_report_jobs():
+    asyncio.run(_run_jobs_checks())
+    print("✓ Отчет чата отменяется новым запросом, кнопкой \"Отмена\" и вместе с обработчиком")
+
+
+async def _run_rate_limiter_checks():
+    limiter = RateLimiter(max_concurrent=1, max_requests=10, window_seconds=60)
+    release = asyncio.Event()
+
+    async def request():
+        await release.wait()
+
+    running = asyncio.create_task(limiter.run(request))
+    waiting = asyncio.create_task(limiter.run(request))
+    await asyncio.sleep(0.01)
+    assert len(limiter._timestamps) == 1 and limiter.queued() == 1
+
+    # Запрос, отмененный в ожидании лимита, не занимает место в окне
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert len(limiter._timestamps) == 1 and limiter.queued() == 0
+    release.set()
+    await running
+
+
+def test_rate_limiter_cancel():
+    asyncio.run(_run_rate_limiter_checks())
+    print("✓ Отмененный запрос освобождает место в окне лимита")
+
+
+def test_offline_polling_cancel(monkeypatch):
+    """Отмена прекращает опрос офлайн-отчета: запросы к API после отмены не отправляются"""
+    async def run():
+        async with FakeYandexDirectServer(FakeServerConfig(offline_polls=1000, retry_in=0.02)) as server:
+            monkeypatch.setattr(YandexDirectAPI, "REPORTS_URL", server.reports_url)
+            api = YandexDirectAPI("bench-1", f"{TOKEN_PREFIX}bench-1")
+            jobs = ReportJobs()
+            report = asyncio.create_task(jobs.run(1, api.get_statistics(
+                "2024-01-01", "2024-01-01", [], ["AUTO"], ["Impressions"], "CUSTOM_REPORT", True
+            )))
+            await asyncio.sleep(0.2)
+            jobs.cancel(1)
+            with pytest.raises(ReportCancelled):
+                await report
+            polls = server.summary()["offline"]
+            await asyncio.sleep(0.2)
+            return polls, server.summary()["offline"]
+
+    polls, polls_later = asyncio.run(run())
+    assert polls > 0
+    assert polls_later == polls
+    print(f"✓ Опрос отчета остановлен после {polls} запросов")
@@ -0,0 +1,99 @@
+import os
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в PYTHONPATH
+root_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, root_dir)
+os.chdir(root_dir)  # Меняем текущую директорию на корневую
+
+import asyncio
+
+from connectors.rate_limiter import RateLimiter, request_priority
+from enums.priorities import RequestPriority
+
+INTERACTIVE, SCHEDULED, BULK = RequestPriority.INTERACTIVE, RequestPriority.SCHEDULED, RequestPriority.BULK
+
+
+async def _submit(limiter: RateLimiter, priority: RequestPriority, func):
+    with request_priority(priority):
+        return await limiter.run(func)
+
+
+async def _run_priority_checks():
+    limiter = RateLimiter(max_concurrent=1, max_requests=1000, window_seconds=60)
+    release = asyncio.Event()
+    started = []
+
+    async def blocking():
+        await release.wait()
+
+    def recorder(name: str):
+        async def request():
+            started.append(name)
+        return request
+
+    # Интерактивный запрос обгоняет фоновые, уже ожидающие места
+    running = asyncio.create_task(_submit(limiter, BULK, blocking))
+    await asyncio.sleep(0.01)
+    tasks = [asyncio.create_task(_submit(limiter, BULK, recorder(f"bulk-{i}"))) for i in range(5)]
+    await asyncio.sleep(0.01)
+    tasks.append(asyncio.create_task(_submit(limiter, INTERACTIVE, recorder("interactive"))))
+    await asyncio.sleep(0.01)
+    assert limiter.queued(BULK) == 5 and limiter.queued(INTERACTIVE) == 1
+    release.set()
+    await asyncio.gather(running, *tasks)
+    assert started[0] == "interactive"
+
+    # Места распределяются по весам 16:4:1, фоновые запросы не простаивают
+    started.clear()
+    release.clear()
+    running = asyncio.create_task(_submit(limiter, INTERACTIVE, blocking))
+    await asyncio.sleep(0.01)
+    tasks = [
+        asyncio.create_task(_submit(limiter, priority, recorder(priority.value)))
+        for i in range(42) for priority in (INTERACTIVE, SCHEDULED, BULK)
+    ]
+    await asyncio.sleep(0.01)
+    release.set()
+    await asyncio.gather(running, *tasks)
+    first = started[:42]
+    assert first.count("interactive") >= 30
+    assert first.count("scheduled") >= 6
+    assert first.count("bulk") >= 1
+
+
+async def _run_reservation_checks():
+    limiter = RateLimiter(max_concurrent=2, max_requests=1000, window_seconds=60, reserved_interactive=1)
+    release = asyncio.Event()
+
+    async def blocking():
+        await release.wait()
+
+    async def instant():
+        return "ok"
+
+    # Фоновые запросы занимают не больше одного места из двух: интерактивный выполняется без ожидания
+    background = [asyncio.create_task(_submit(limiter, BULK, blocking)) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    assert limiter.queued(BULK) == 2
+    assert await asyncio.wait_for(_submit(limiter, INTERACTIVE, instant), 0.5) == "ok"
+    release.set()
+    await asyncio.gather(*background)
+
+    # Исчерпанное окно: запрос ждет, пока освободится место
+    limiter = RateLimiter(max_concurrent=5, max_requests=2, window_seconds=0.1)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    await asyncio.gather(*(_submit(limiter, INTERACTIVE, instant) for _ in range(3)))
+    assert loop.time() - started >= 0.09
+
+
+def test_request_priority():
+    asyncio.run(_run_priority_checks())
+    print("✓ Интерактивные запросы обгоняют фоновые, места делятся по весам")
+
+
+def test_interactive_reservation():
+    asyncio.run(_run_reservation_checks())
+    print("✓ Часть одновременных запросов зарезервирована для интерактивных отчетов")
@@ -0,0 +1,150 @@
+import os
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в PYTHONPATH
+root_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, root_dir)
+os.chdir(root_dir)  # Меняем текущую директорию на корневую
+
+import asyncio
+import socket
+
+import pytest
+
+from benchmarks.fake_yandex_server import FakeServerConfig, FakeYandexDirectServer, TOKEN_PREFIX
+from connectors.exceptions import (
+    YandexDirectAuthError, YandexDirectNetworkError, YandexDirectRateLimitError, YandexDirectRequestError,
+    YandexDirectTransientError, error_from_response,
+)
+from connectors.rate_limiter import RateLimiter
+from connectors.retry import RetryPolicy
+from connectors.yandex_direct import YandexDirectAPI
+from services.deadline import report_deadline
+
+FAST_RETRY = RetryPolicy(attempts=3, base_delay=0.001, max_delay=0.002)
+
+
+def _use_server(monkeypatch, server: FakeYandexDirectServer) -> None:
+    monkeypatch.setattr(YandexDirectAPI, "BUDGETS_URL", server.budgets_url)
+    monkeypatch.setattr(YandexDirectAPI, "REPORTS_URL", server.reports_url)
+
+
+async def _statistics(api: YandexDirectAPI):
+    return await api.get_statistics(
+        "2024-01-01", "2024-01-01", [1], ["AUTO"], ["Date", "Impressions", "Clicks"], "CUSTOM_REPORT", True
+    )
+
+
+def test_error_classification():
+    assert isinstance(error_from_response("", status=429), YandexDirectRateLimitError)
+    assert isinstance(error_from_response("", error_code=56), YandexDirectRateLimitError)
+    assert isinstance(error_from_response("", status=503), YandexDirectTransientError)
+    assert isinstance(error_from_response("", status=403), YandexDirectAuthError)
+    assert isinstance(error_from_response("", status=400, error_code=8000), YandexDirectRequestError)
+    assert not error_from_response("", status=400).retryable
+
+    # Пауза растет экспоненциально, но не больше max_delay и не меньше рекомендованной API
+    policy = RetryPolicy(attempts=5, base_delay=1.0, max_delay=4.0)
+    assert all(0 <= policy.delay(n, YandexDirectTransientError("")) <= min(4.0, 2 ** n) for n in range(6))
+    assert policy.delay(0, YandexDirectRateLimitError("", retry_after=3)) >= 3
+    print("✓ Ошибки API классифицируются, пауза ограничена")
+
+
+def test_transient_errors_are_retried(monkeypatch):
+    """Отчеты и бюджеты собираются, несмотря на 503 и ошибки лимита в API v4 и v5"""
+    async def run():
+        config = FakeServerConfig(offline_polls=1, rows_per_report=5, server_error_every=3, rate_limit_every=4)
+        async with FakeYandexDirectServer(config) as server:
+            _use_server(monkeypatch, server)
+            budgets, stats = [], []
+            # Повторы занимают места в окне лимита: отдельный лимитер, чтобы тест не ждал окна общего
+            limiter = RateLimiter(max_concurrent=5, max_requests=1000, window_seconds=10)
+            for i in range(4):
+                api = YandexDirectAPI(f"bench-{i}", f"{TOKEN_PREFIX}bench-{i}", retry_policy=FAST_RETRY,
+                                      rate_limiter=limiter)
+                budgets.append(await api.get_budgets(include_vat=False))
+                stats.append(await _statistics(api))
+            return budgets, stats, server.summary()
+
+    budgets, stats, calls = asyncio.run(run())
+    assert len(budgets) == 4
+    assert all(len(rows) == 5 for rows in stats)
+    assert calls["errors"] > 0
+    print(f"✓ Повторено {calls['errors']} запросов с ошибками из {calls['total']}")
+
+
+def test_permanent_error_is_not_retried(monkeypatch):
+    async def run():
+        async with FakeYandexDirectServer(FakeServerConfig(offline_polls=0)) as server:
+            _use_server(monkeypatch, server)
+            # Сервер отвечает 404 на неизвестный адрес: такая ошибка не повторяется
+            monkeypatch.setattr(YandexDirectAPI, "REPORTS_URL", f"{server.base_url}/json/v5/unknown")
+            api = YandexDirectAPI("bench-1", f"{TOKEN_PREFIX}bench-1", retry_policy=FAST_RETRY)
+            with pytest.raises(YandexDirectRequestError, match="404"):
+                await _statistics(api)
+
+    asyncio.run(run())
+    print("✓ Постоянная ошибка поднимается без повторов")
+
+
+def test_network_error_after_attempts(monkeypatch):
+    # Свободный порт, на котором никто не слушает
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    monkeypatch.setattr(YandexDirectAPI, "BUDGETS_URL", f"http://127.0.0.1:{port}/live/v4/json/")
+    attempts = []
+
+    async def run():
+        policy = RetryPolicy(attempts=3, base_delay=0.001, max_delay=0.002)
+        original = YandexDirectAPI._send
+
+        async def counting_send(*args, **kwargs):
+            attempts.append(1)
+            return await original(*args, **kwargs)
+
+        monkeypatch.setattr(YandexDirectAPI, "_send", staticmethod(counting_send))
+        api = YandexDirectAPI("bench-1", f"{TOKEN_PREFIX}bench-1", retry_policy=policy)
+        with pytest.raises(YandexDirectNetworkError):
+            await api.get_budgets(include_vat=False)
+        assert len(attempts) == 3
+
+        # Повтор, который не укладывается в срок отчета, не выполняется
+        # (разброс паузы фиксирован на верхней границе, иначе пауза может оказаться короче срока)
+        attempts.clear()
+        monkeypatch.setattr("connectors.retry.random.uniform", lambda low, high: high)
+        slow = RetryPolicy(attempts=3, base_delay=10.0, max_delay=10.0)
+        api = YandexDirectAPI("bench-1", f"{TOKEN_PREFIX}bench-1", retry_policy=slow)
+        with report_deadline(1.0):
+            with pytest.raises(YandexDirectNetworkError):
+                await api.get_budgets(include_vat=False)
+
+    asyncio.run(run())
+    assert len(attempts) == 1
+    print("✓ Ошибка соединения поднимается после всех попыток")
+
+
+def test_retry_releases_rate_limiter(monkeypatch):
+    """Пауза перед повтором не держит место в лимите, а каждая попытка занимает место в окне"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    monkeypatch.setattr(YandexDirectAPI, "BUDGETS_URL", f"http://127.0.0.1:{port}/live/v4/json/")
+    monkeypatch.setattr("connectors.retry.random.uniform", lambda low, high: high)
+
+    async def run():
+        limiter = RateLimiter(max_concurrent=1, max_requests=100, window_seconds=60)
+        policy = RetryPolicy(attempts=2, base_delay=0.5, max_delay=0.5)
+        api = YandexDirectAPI("bench-1", f"{TOKEN_PREFIX}bench-1", retry_policy=policy, rate_limiter=limiter)
+        budgets = asyncio.create_task(api.get_budgets(include_vat=False))
+        await asyncio.sleep(0.1)
+        # Первая попытка завершилась ошибкой соединения, запрос ждет повтора: единственное место свободно
+        await asyncio.wait_for(limiter.run(asyncio.sleep, 0), 0.2)
+        with pytest.raises(YandexDirectNetworkError):
+            await budgets
+        return len(limiter._timestamps)
+
+    # Две попытки запроса бюджетов и один сторонний запрос
+    assert asyncio.run(run()) == 3
+    print("✓ Повтор занимает новое место в лимите и не держит его во время паузы")
@@ -0,0 +1,87 @@
+import os
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в PYTHONPATH
+root_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, root_dir)
+os.chdir(root_dir)  # Меняем текущую директорию на корневую
+
+import asyncio
+import json
+
+import pytest
+
+from database.db import init_db, add_account, get_all_accounts
+from services import runtime_profile, serializers
+from services.serializers import json_backend, json_dumps, json_loads, use_json_backend
+
+TEST_DB_PATH = "test_serializers.db"
+
+AUTH = {"login": "клиент-1", "token": "y0_token", "goals": [1, 2, 3]}
+
+
+@pytest.fixture(autouse=True)
+def restore_defaults():
+    yield
+    use_json_backend("json")
+    asyncio.set_event_loop_policy(None)
+
+
+@pytest.mark.skipif(not serializers.ORJSON_AVAILABLE, reason="orjson не установлен")
+def test_orjson_compatible_with_stdlib():
+    assert use_json_backend("orjson") == "orjson"
+    encoded = json_dumps(AUTH)
+    assert isinstance(encoded, str)
+    # Записанное одной реализацией читается другой
+    assert json.loads(encoded) == AUTH
+    assert json_loads(json.dumps(AUTH)) == AUTH
+    assert json_loads(encoded.encode()) == AUTH
+    with pytest.raises(ValueError):
+        json_loads("{")
+    print("✓ orjson и json дают совместимый JSON")
+
+
+def test_fallback_to_stdlib(monkeypatch):
+    monkeypatch.setattr(serializers, "ORJSON_AVAILABLE", False)
+    assert use_json_backend("orjson") == "json"
+    assert json_loads(json_dumps(AUTH)) == AUTH
+    with pytest.raises(ValueError):
+        use_json_backend("pickle")
+
+    monkeypatch.setattr(runtime_profile, "UVLOOP_AVAILABLE", False)
+    assert runtime_profile.apply_runtime_profile("fast") == {"loop": "asyncio", "json": "json"}
+    assert asyncio.run(asyncio.sleep(0, "ok")) == "ok"
+    print("✓ Без uvloop и orjson используется стандартная библиотека")
+
+
+def test_runtime_profiles():
+    assert runtime_profile.apply_runtime_profile("standard") == {"loop": "asyncio", "json": "json"}
+    selected = runtime_profile.apply_runtime_profile("fast")
+    assert selected["loop"] == ("uvloop" if runtime_profile.UVLOOP_AVAILABLE else "asyncio")
+    assert selected["json"] == json_backend()
+    with pytest.raises(ValueError):
+        runtime_profile.apply_runtime_profile("turbo")
+    print(f"✓ Профиль fast: {selected}")
+
+
+def test_accounts_db_with_selected_backend():
+    async def run():
+        await init_db(TEST_DB_PATH)
+        use_json_backend("json")
+        await add_account("YANDEX_DIRECT", AUTH, "stdlib", db_path=TEST_DB_PATH)
+        use_json_backend("orjson")
+        await add_account("YANDEX_DIRECT", AUTH, "fast", db_path=TEST_DB_PATH)
+        fast = await get_all_accounts(TEST_DB_PATH)
+        use_json_backend("json")
+        stdlib = await get_all_accounts(TEST_DB_PATH)
+        return fast, stdlib
+
+    try:
+        fast, stdlib = asyncio.run(run())
+    finally:
+        if os.path.exists(TEST_DB_PATH):
+            os.remove(TEST_DB_PATH)
+    assert [account["auth"] for account in fast] == [AUTH, AUTH]
+    assert [account["auth"] for account in stdlib] == [AUTH, AUTH]
+    print("✓ Аккаунты, записанные разными реализациями JSON, читаются обеими")
@@ -0,0 +1,45 @@
+import os
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в PYTHONPATH
+root_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, root_dir)
+os.chdir(root_dir)  # Меняем текущую директорию на корневую
+
+import subprocess
+
+import pytest
+
+from benchmarks.startup_benchmark import HEAVY_MODULES, parse_importtime
+from enums.sources import Source
+from modules.report_builder_factory import ReportBuilderFactory
+
+
+def test_handlers_import_without_heavy_modules():
+    """Обработчики бота импортируются без pandas, numpy и matplotlib"""
+    code = f"import sys, bot.handlers; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert completed.stdout.strip() == ""
+    print("✓ Тяжелые модули не загружаются при импорте обработчиков")
+
+
+def test_factory_loads_builder_lazily():
+    builder = ReportBuilderFactory.get_builder(Source.YANDEX_DIRECT)
+    assert type(builder).__name__ == "YandexDirectReportBuilder"
+    with pytest.raises(ValueError):
+        ReportBuilderFactory.get_builder("INVALID_SOURCE")
+    print("✓ Построитель загружен фабрикой")
+
+
+def test_parse_importtime():
+    output = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |     settings.bot\n"
+        "import time:       300 |        420 |   bot.sender\n"
+        "import time:       500 |        920 | bot.handlers\n"
+    )
+    records = parse_importtime(output)
+    assert [(r.module, r.level) for r in records] == [("settings.bot", 2), ("bot.sender", 1), ("bot.handlers", 0)]
+    assert records[-1].cumulative_us == 920
+    print("✓ Вывод -X importtime разобран")
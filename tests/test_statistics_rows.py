@@ -0,0 +1,106 @@
+import os
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в PYTHONPATH
+root_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, root_dir)
+os.chdir(root_dir)  # Меняем текущую директорию на корневую
+
+import gc
+import pickle
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.fake_yandex_server import build_report_tsv
+from models.yandex_direct import StatisticsRow, YandexDirectStatistics, parse_statistics_tsv, statistics_columns
+from modules.yandex_direct.lean_stat_processor import StatRecord
+from modules.yandex_direct.pandas_stat_proccessor import calculate_statistics
+
+PARAMS = {
+    "SelectionCriteria": {"DateFrom": "2024-01-01", "DateTo": "2024-01-07"},
+    "FieldNames": ["CampaignName", "Date", "Impressions", "Clicks", "Cost", "Conversions", "Sessions", "Bounces"],
+    "Goals": [1001, 1002],
+    "AttributionModels": ["AUTO"],
+}
+
+
+def _tsv_dicts(tsv: str) -> list[dict]:
+    """Строки TSV словарями {колонка: значение} для проверки моделью YandexDirectStatistics"""
+    lines = tsv.strip().split("\n")
+    headers = lines[0].split("\t")
+    return [dict(zip(headers, line.split("\t"))) for line in lines[1:]]
+
+
+def _model_rows(tsv: str) -> list[StatisticsRow]:
+    return [StatisticsRow(**YandexDirectStatistics(**row).model_dump()) for row in _tsv_dicts(tsv)]
+
+
+def test_rows_match_pydantic_model():
+    tsv = build_report_tsv("bench", PARAMS, 200)
+    # Нет данных ("--") и пустые значения
+    tsv += "Кампания X\t2024-01-01\t--\t5\t--\t3\t--\t\t2\n"
+    expected = [YandexDirectStatistics(**row) for row in _tsv_dicts(tsv)]
+    rows = parse_statistics_tsv(tsv)
+
+    assert rows == _model_rows(tsv)
+    assert [row.as_dict() for row in rows] == [stat.model_dump() for stat in expected]
+    assert rows[-1].as_dict(["Clicks", "Conversions"]) == {"Clicks": 5, "Conversions": 3}
+    assert parse_statistics_tsv("") == []
+    assert pickle.loads(pickle.dumps(rows)) == rows
+    print("✓ Строки из TSV совпадают с YandexDirectStatistics")
+
+
+def test_edge_values_agree_with_model():
+    """Модель и разбор TSV одинаково приводят "--", пустые значения и отсутствующие колонки"""
+    header = "Date\tDevice\tImpressions\tClicks\tCost\tConversions_1_AUTO\tConversions_2_AUTO\tSessions\tBounces"
+    lines = [
+        "--\t--\t--\t--\t--\t--\t--\t--\t--",
+        "\t\t\t\t\t\t\t\t",
+        "2024-01-01\tMOBILE\t7\t3\t1.25\t\t2\t1\t",
+        # Короткая строка: отсутствующие колонки
+        "2024-01-02\tDESKTOP\t5",
+    ]
+    tsv = "\n".join([header, *lines]) + "\n"
+    expected = _model_rows(tsv)
+    assert parse_statistics_tsv(tsv) == expected
+    assert expected[2] == StatisticsRow(Date="2024-01-01", Device="MOBILE", Impressions=7, Clicks=3, Cost=1.25,
+                                        Conversions=2, Sessions=1)
+    assert expected[3] == StatisticsRow(Date="2024-01-02", Device="DESKTOP", Impressions=5)
+    print("✓ Модель и разбор TSV одинаково обрабатывают пограничные значения")
+
+
+def test_processing_without_row_dicts():
+    rows = parse_statistics_tsv(build_report_tsv("bench", PARAMS, 300))
+    expected = calculate_statistics([row.as_dict() for row in rows], group_by="Date")
+    pd.testing.assert_frame_equal(calculate_statistics(statistics_columns(rows), group_by="Date"), expected)
+
+    by_dict, by_attributes = StatRecord(), StatRecord()
+    for row in rows:
+        by_dict.add(row.as_dict())
+        by_attributes.add_stat(row)
+    assert [getattr(by_attributes, name) for name in StatRecord.__slots__[1:]] == \
+        [getattr(by_dict, name) for name in StatRecord.__slots__[1:]]
+    print("✓ Расчет по столбцам и атрибутам совпадает с расчетом по словарям")
+
+
+def _allocated(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return allocated
+
+
+def test_rows_are_compact():
+    tsv = build_report_tsv("bench", PARAMS, 5000)
+    parsed = _tsv_dicts(tsv)
+
+    pydantic_size = _allocated(lambda: [YandexDirectStatistics(**row) for row in parsed])
+    rows_size = _allocated(lambda: parse_statistics_tsv(tsv))
+    assert not hasattr(StatisticsRow(), "__dict__")
+    assert rows_size * 3 < pydantic_size
+    print(f"✓ 5000 строк: {rows_size / 1e6:.2f} МБ вместо {pydantic_size / 1e6:.2f} МБ")
@@ -0,0 +1,89 @@
+import os
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в PYTHONPATH
+root_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, root_dir)
+os.chdir(root_dir)  # Меняем текущую директорию на корневую
+
+import asyncio
+import json
+import logging
+
+from services.tracing import start_trace, span, traced, current_span, trace_store, format_trace
+
+
+@traced("api.get_statistics")
+async def _fake_request(dimension: str, delay: float) -> int:
+    current_span().set(dimension=dimension)
+    await asyncio.sleep(delay)
+    if dimension == "Age":
+        raise ValueError("Ошибка API")
+    return 1
+
+
+async def _build_report():
+    with span("builder.fetch"):
+        return await asyncio.gather(
+            _fake_request("Date", 0.05), _fake_request("Device", 0.01), _fake_request("Age", 0.01),
+            return_exceptions=True,
+        )
+
+
+def test_trace_spans(caplog):
+    with caplog.at_level(logging.INFO, logger="services.tracing"):
+        with start_trace("detailed_report", account_id=1) as trace:
+            asyncio.run(_build_report())
+
+    names = [item.name for item in trace.spans]
+    assert names[:2] == ["detailed_report", "builder.fetch"]
+    assert names.count("api.get_statistics") == 3
+
+    # Параллельные запросы - дочерние замеры этапа, который их запустил
+    by_name = {item.name: item for item in trace.spans}
+    requests = [item for item in trace.spans if item.name == "api.get_statistics"]
+    assert all(item.parent_id == by_name["builder.fetch"].span_id for item in requests)
+    slow = next(item for item in requests if item.attributes["dimension"] == "Date")
+    assert slow.duration >= 0.05
+    assert next(item for item in requests if item.attributes["dimension"] == "Age").error == "ValueError: Ошибка API"
+
+    assert trace_store.get(trace.trace_id) is trace
+    logged = json.loads(caplog.records[-1].getMessage())
+    assert logged["trace"]["trace_id"] == trace.trace_id
+    assert len(logged["trace"]["spans"]) == 5
+
+    text = format_trace(trace)
+    assert "    api.get_statistics dimension=Date" in text
+    print(text)
+
+
+def test_span_without_trace():
+    with span("api.get_budgets") as item:
+        item.set(rows=1)
+    current_span().set(rows=1)
+    print("✓ Замеры вне трассировки ничего не записывают")
+
+
+def test_trace_size_is_bounded(caplog, monkeypatch):
+    monkeypatch.setattr("services.tracing.TRACE_LOG_MAX_CHARS", 2000)
+
+    async def build():
+        with span("builder.fetch"):
+            await asyncio.gather(*(_fake_request(f"Login{i}", 0) for i in range(500)), return_exceptions=True)
+
+    with caplog.at_level(logging.INFO, logger="services.tracing"):
+        with start_trace("summary_report") as trace:
+            trace.max_spans = 50
+            asyncio.run(build())
+
+    assert len(trace.spans) == 50
+    assert trace.dropped["api.get_statistics"] == 452
+    assert "не записано замеров: api.get_statistics=452" in format_trace(trace)
+
+    line = caplog.records[-1].getMessage()
+    logged = json.loads(line)["trace"]
+    assert len(line) <= 2000
+    assert logged["dropped_spans"] == {"api.get_statistics": 452}
+    assert logged["omitted_spans"] == 50 - len(logged["spans"]) > 0
+    print(f"✓ Трассировка ограничена: {len(trace.spans)} замеров, строка лога {len(line)} символов")
@@ -0,0 +1,85 @@
+import os
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в PYTHONPATH
+root_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, root_dir)
+os.chdir(root_dir)  # Меняем текущую директорию на корневую
+
+import asyncio
+
+import pytest
+
+from benchmarks.fake_yandex_server import FakeServerConfig, FakeYandexDirectServer, TOKEN_PREFIX
+from connectors.exceptions import YandexDirectUnitsError
+from connectors.rate_limiter import request_priority
+from connectors.units import UnitsTracker, parse_units
+from connectors.yandex_direct import YandexDirectAPI, UNITS_TRACKER
+from enums.priorities import RequestPriority
+from models.account import Account
+from modules.yandex_direct.yandex_direct_report_builder import YandexDirectReportBuilder
+from services.metrics import API_UNITS_REMAINING
+
+
+def _account(login: str) -> Account:
+    return Account(account_name=login, source="YANDEX_DIRECT",
+                   auth={"login": login, "token": f"{TOKEN_PREFIX}{login}", "goals": [1]})
+
+
+def test_units_tracker():
+    assert parse_units("10/20828/64000").remaining == 20828
+    assert parse_units(None) is None and parse_units("n/a") is None
+
+    tracker = UnitsTracker(reserve_fraction=0.2, balance_ttl=60)
+    tracker.record("client-1", {"Units": "10/50000/64000", "Units-Used-Login": "agency"})
+    assert not tracker.is_low("client-1")
+    # Баллы агентства общие: остаток, полученный по другому клиенту, виден и первому
+    tracker.record("client-2", {"Units": "10/1000/64000", "Units-Used-Login": "agency"})
+    assert tracker.is_low("client-1") and tracker.balance("client-1").remaining == 1000
+    assert not tracker.is_low("unknown")
+    assert tracker.record("client-3", {}) is None
+
+    # Устаревший остаток считается неизвестным
+    tracker.balance_ttl = 0
+    assert tracker.balance("client-1") is None and not tracker.is_low("client-1")
+    print("✓ Остаток баллов учитывается по логину, с которого они списываются")
+
+
+def test_bulk_work_deferred_when_units_low(monkeypatch):
+    """Фоновые запросы откладываются при нехватке баллов, интерактивные отчеты продолжают расходовать резерв"""
+    async def run():
+        config = FakeServerConfig(offline_polls=0, units_limit=100, units_per_request=10, units_payer="agency")
+        async with FakeYandexDirectServer(config) as server:
+            monkeypatch.setattr(YandexDirectAPI, "BUDGETS_URL", server.budgets_url)
+            monkeypatch.setattr(YandexDirectAPI, "REPORTS_URL", server.reports_url)
+            builder = YandexDirectReportBuilder()
+            accounts = [_account(f"client-{i}") for i in range(3)]
+            background = 0
+            with request_priority(RequestPriority.BULK):
+                for _ in range(20):
+                    try:
+                        await builder.fetch_daily_statistics(accounts[background % 3], "2024-01-01", "2024-01-02")
+                    except YandexDirectUnitsError:
+                        break
+                    background += 1
+            # Остаток 10 из 100 баллов - ниже резерва 20%: больше фоновых запросов не было
+            spent_by_background = server.units_spent["agency"]
+            with pytest.raises(YandexDirectUnitsError, match="Фоновый запрос отложен"):
+                with request_priority(RequestPriority.BULK):
+                    await builder.fetch_daily_statistics(accounts[0], "2024-01-01", "2024-01-02")
+
+            interactive = await builder.fetch_daily_statistics(accounts[1], "2024-01-01", "2024-01-02")
+            return background, spent_by_background, interactive, server.units_spent["agency"]
+
+    UNITS_TRACKER.reset()
+    try:
+        background, spent_by_background, interactive, spent = asyncio.run(run())
+    finally:
+        UNITS_TRACKER.reset()
+    assert background == 9
+    assert spent_by_background == 90
+    assert interactive
+    assert spent == 100
+    assert API_UNITS_REMAINING.value(login="agency") == 0
+    print(f"✓ Фоновая работа остановлена после {background} запросов, интерактивный отчет выполнен")